@@ -5,10 +5,17 @@ from pathlib import Path
 from typing import Dict, Tuple, Optional, List, Any
 from datetime import datetime
 
+MARKDOWN_EXTRAS = [
+    'metadata', 'tables', 'fenced-code-blocks', 
+    'header-ids', 'footnotes', 'smarty-pants'
+]
+
 class ContentProcessor:
-    def __init__(self, root_path: str):
+    def __init__(self, root_path: str, render_cache=None):
         self.root_path = Path(root_path)
         self.library_metadata = self._load_library_metadata()
+        # Callers that share rendered markdown, such as the Flask server, pass their MarkdownRenderCache
+        self.render_cache = render_cache
         
     def _load_library_metadata(self) -> Dict[str, Any]:
         """Load global library metadata"""
@@ -32,6 +39,23 @@ class ContentProcessor:
         
         return {}, content
         
+    def strip_markdown(self, content: str) -> str:
+        """Reduce processed markdown to plain text for indexing"""
+        content = re.sub(r'<!--.*?-->', ' ', content, flags=re.DOTALL)
+        content = re.sub(r'!?\[(.*?)\]\([^)]*\)', r'\1', content)
+        content = re.sub(r'<[^>]+>', ' ', content)
+        content = re.sub(r'^\s*(#{1,6}|>|[-*+]|\d+\.)\s+', '', content, flags=re.MULTILINE)
+        content = re.sub(r'[*_`~|]+', ' ', content)
+        return content
+        
+    def extract_text(self, file_path: Path) -> Tuple[Dict, str]:
+        """Extract frontmatter and plain text from a markdown file"""
+        file_path = Path(file_path)
+        content = file_path.read_text(encoding='utf-8')
+        metadata, markdown_content = self.parse_frontmatter(content)
+        markdown_content = self._process_content(markdown_content, file_path.parent)
+        return metadata, self.strip_markdown(markdown_content)
+        
     def process_markdown(self, folder_path: Path) -> Tuple[Dict, str]:
         """Process markdown file with frontmatter and additional resources"""
         readme_path = folder_path / 'README.md'
@@ -44,17 +68,18 @@ class ContentProcessor:
         # Enhance metadata with library-wide information
         metadata = self._enhance_metadata(metadata, folder_path)
         
-        # Process content
-        markdown_content = self._process_content(markdown_content, folder_path)
-        
-        # Convert to HTML with extras
-        html_content = markdown2.markdown(
-            markdown_content,
-            extras=[
-                'metadata', 'tables', 'fenced-code-blocks', 
-                'header-ids', 'footnotes', 'smarty-pants'
-            ]
-        )
+        # Convert to HTML with extras; @include directives pull in other
+        # files, so only self-contained READMEs can be cached by path
+        if self.render_cache is not None and '@include(' not in markdown_content:
+            html_content = self.render_cache.render_file(
+                str(readme_path),
+                extras=MARKDOWN_EXTRAS,
+                variant='content_processor',
+                preprocess=lambda text: self._process_content(self.parse_frontmatter(text)[1], folder_path)
+            )
+        else:
+            markdown_content = self._process_content(markdown_content, folder_path)
+            html_content = markdown2.markdown(markdown_content, extras=MARKDOWN_EXTRAS)
         
         # Add additional resources section if available
         resources = self._gather_resources(folder_path)
@@ -1,38 +1,77 @@
 from typing import Any, List, Optional, Union, Dict, Callable
 import os
+import re
 import json
 import markdown2
 
+TEMPLATE_TYPE_PATTERN = re.compile(r'^- \*\*Type\*\*: *(\S+)', re.MULTILINE)
+
 class MetadataEnricher:
 
-    def __init__(self: Any, root_path: str, *args: Any, **kwargs: Any) -> Any:
+    def __init__(self: Any, root_path: str, *args: Any, facet_index: Optional[Any] = None, **kwargs: Any) -> Any:
         self.root_path = root_path
+        # src.facets.FacetIndex, when the caller wants library_facets.json written next to the metadata
+        self.facet_index = facet_index
         self.metadata_file = os.path.join(root_path, 'library_metadata.json')
+        self.facets_file = os.path.join(root_path, 'library_facets.json')
+
+    def _read_readme(self: Any, folder_path: str) -> Optional[str]:
+        """Read README.md, or None if the folder has none"""
+        try:
+            with open(os.path.join(folder_path, 'README.md'), 'r', encoding='utf-8') as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
 
-    def extract_readme_summary(self: Any, folder_path: str) -> str:
-        """Extract summary from README.md"""
-        readme_path = os.path.join(folder_path, 'README.md')
-        if not os.path.exists(readme_path):
+    def extract_readme_summary(self: Any, folder_path: str, content: Optional[str] = None) -> str:
+        """Extract summary from README.md, or from its already read ``content``"""
+        if content is None:
+            content = self._read_readme(folder_path)
+        if content is None:
             return 'No description available.'
-        with open(readme_path, 'r', encoding='utf-8') as f:
-            content = f.read()
-            summary = content.split('\n\n')[0] if content.split('\n\n') else content[:200]
-            return summary
+        summary = content.split('\n\n')[0] if content.split('\n\n') else content[:200]
+        return summary
 
-    def generate_folder_metadata(self: Any, folder_name: str) -> Dict[str, Any]:
-        """Generate comprehensive metadata for a folder"""
-        folder_path = os.path.join(self.root_path, folder_name)
+    def extract_template_type(self: Any, folder_path: str, content: Optional[str] = None) -> Optional[str]:
+        """Extract the template type recorded in a generated template's README, or in its already read ``content``"""
+        if content is None:
+            content = self._read_readme(folder_path)
+        if content is None:
+            return None
+        match = TEMPLATE_TYPE_PATTERN.search(content)
+        return match.group(1) if match else None
+
+    def derive_name_metadata(self: Any, folder_name: str) -> Dict[str, Any]:
+        """Derive the metadata that depends only on a folder's name; no files are read"""
         try:
             prefix, title = folder_name.split('_', 1)
         except ValueError:
             prefix, title = ('00', folder_name)
         categories = {'01-10': 'Introduction and Fundamentals', '11-20': 'Advanced Strategies', '21-30': 'Professional Development', '31-40': 'Tools and Resources', '41-50': 'Advanced Topics'}
         category = next((cat for range_key, cat in categories.items() if self._in_range(prefix, range_key)), 'Uncategorized')
-        metadata = {'id': folder_name, 'title': title.replace('_', ' '), 'category': category, 'summary': self.extract_readme_summary(folder_path), 'tags': [word.lower() for word in title.split('_')], 'content_files': [f for f in os.listdir(folder_path) if f.endswith(('.md', '.txt', '.html'))], 'difficulty': self._determine_difficulty(folder_name)}
+        return {'id': folder_name, 'title': title.replace('_', ' '), 'category': category, 'tags': [word.lower() for word in title.split('_')], 'difficulty': self._determine_difficulty(folder_name)}
+
+    def generate_facet_metadata(self: Any, folder_name: str, content: Optional[str] = None) -> Dict[str, Any]:
+        """Generate the metadata facets are built from, reading README.md at most once"""
+        folder_path = os.path.join(self.root_path, folder_name)
+        if content is None:
+            content = self._read_readme(folder_path)
+        metadata = self.derive_name_metadata(folder_name)
+        metadata['template_type'] = self.extract_template_type(folder_path, content=content or '')
+        return metadata
+
+    def generate_folder_metadata(self: Any, folder_name: str) -> Dict[str, Any]:
+        """Generate comprehensive metadata for a folder"""
+        folder_path = os.path.join(self.root_path, folder_name)
+        content = self._read_readme(folder_path)
+        facets = self.generate_facet_metadata(folder_name, content=content)
+        metadata = {'id': facets['id'], 'title': facets['title'], 'category': facets['category'], 'summary': self.extract_readme_summary(folder_path, content=content), 'tags': facets['tags'], 'content_files': [f for f in os.listdir(folder_path) if f.endswith(('.md', '.txt', '.html'))], 'difficulty': facets['difficulty'], 'template_type': facets['template_type']}
         return metadata
 
     def _in_range(self: Any, prefix: str, range_key: str) -> bool:
         """Check if prefix is in the specified range"""
+        if not prefix.isdigit():
+            return False
         start, end = map(int, range_key.split('-'))
         return start <= int(prefix) <= end
 
@@ -54,10 +93,16 @@ class MetadataEnricher:
                 library_metadata['total_knowledge_blocks'] += 1
         with open(self.metadata_file, 'w', encoding='utf-8') as f:
             json.dump(library_metadata, f, indent=2)
+        if self.facet_index is not None:
+            self.facet_index.from_blocks(library_metadata['knowledge_blocks']).save(self.facets_file)
         return library_metadata
 
 def main(root_path: str, *args: Any, **kwargs: Any) -> Any:
-    enricher = MetadataEnricher(root_path)
+    try:
+        from src.facets import FacetIndex
+    except ImportError:  # Run as a plain script rather than with -m from the project root
+        FacetIndex = None
+    enricher = MetadataEnricher(root_path, facet_index=FacetIndex)
     library_metadata = enricher.enrich_library_metadata()
     print('Library Metadata Generated Successfully:')
     print(f'Total Knowledge Blocks: {library_metadata["total_knowledge_blocks"]}')
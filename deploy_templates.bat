@@ -7,7 +7,7 @@ REM Install dependencies
 pip install -r requirements.txt
 
 REM Generate metadata
-python Library_Resources\metadata_enricher.py
+python -m Library_Resources.metadata_enricher
 
 REM Deploy to Cloudflare
 wrangler publish
@@ -7,7 +7,7 @@ source venv/bin/activate
 pip install -r requirements.txt
 
 # Generate metadata
-python Library_Resources/metadata_enricher.py
+python -m Library_Resources.metadata_enricher
 
 # Deploy to Cloudflare
 wrangler publish
@@ -0,0 +1,19 @@
+"""
+Gunicorn configuration for the Knowledge Library server.
+
+Picked up automatically by ``gunicorn src.local_server:app`` when started
+from the project root (Procfile, render.yaml).
+"""
+import os
+import sys
+
+# With --preload the app is imported once in the master before workers are
+# forked, so warm the caches there and let every worker inherit them.
+if '--preload' in sys.argv:
+    os.environ.setdefault('CRL_CACHE_WARMUP', '1')
+
+
+def worker_exit(server, worker):
+    """Flush background cache writes before a worker process exits."""
+    from src.local_server import shutdown_caches
+    shutdown_caches()
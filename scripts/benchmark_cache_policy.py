@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Cache Eviction Policy Benchmark
+
+Replays a template access trace against the in-process cache policies and
+compares hit ratios. The trace is reconstructed from logs/knowledge_library.log
+when it has enough template accesses; otherwise a synthetic trace is used:
+Zipf-distributed traffic over the catalog, interrupted by crawler sweeps
+that request every template once.
+
+Usage:
+    python scripts/benchmark_cache_policy.py [--log PATH] [--sizes 50,100,500]
+"""
+
+import os
+import re
+import sys
+import random
+import argparse
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, PROJECT_ROOT)
+
+from src.eviction import EVICTION_POLICIES  # noqa: E402
+
+DEFAULT_LOG = os.path.join(PROJECT_ROOT, 'logs', 'knowledge_library.log')
+
+# Log lines emitted by local_server for template reads
+ACCESS_PATTERNS = [
+    re.compile(r' - Template (.+) accessed$'),
+    re.compile(r' - API: Template (.+) preview requested$'),
+]
+
+
+def load_log_trace(log_path):
+    """
+    Reconstruct the sequence of accessed template names from the server log
+    """
+    trace = []
+    if not os.path.exists(log_path):
+        return trace
+
+    with open(log_path, 'r', encoding='utf-8', errors='replace') as log_file:
+        for line in log_file:
+            line = line.rstrip('\n')
+            for pattern in ACCESS_PATTERNS:
+                match = pattern.search(line)
+                if match:
+                    trace.append(match.group(1))
+                    break
+    return trace
+
+
+def synthetic_trace(catalog_size=5000, length=200000, sweep_every=40000, skew=1.1, seed=7):
+    """
+    Build a Zipf-skewed trace with periodic full-catalog crawler sweeps
+    """
+    rng = random.Random(seed)
+    weights = [1.0 / (rank ** skew) for rank in range(1, catalog_size + 1)]
+    names = [f"{rank:05d}_Template" for rank in range(1, catalog_size + 1)]
+    rng.shuffle(names)
+
+    trace = []
+    while len(trace) < length:
+        trace.extend(rng.choices(names, weights=weights, k=sweep_every))
+        trace.extend(f"crawl_{len(trace)}_{index}" for index in range(catalog_size))
+    return trace[:length]
+
+
+def replay(trace, policy, size):
+    """
+    Replay a trace against one policy and return its hit ratio
+    """
+    cache = EVICTION_POLICIES[policy](size)
+    for key in trace:
+        if cache.get(key) is None:
+            cache.put(key, True)
+    stats = cache.stats()
+    total = stats['hits'] + stats['misses']
+    return stats['hits'] / total if total else 0.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare cache eviction policies on an access trace')
+    parser.add_argument('--log', default=DEFAULT_LOG, help='Server log to reconstruct the trace from')
+    parser.add_argument('--sizes', default='50,100,500,1000', help='Comma-separated cache sizes')
+    parser.add_argument('--min-log-events', type=int, default=1000,
+                        help='Fall back to a synthetic trace below this many logged accesses')
+    args = parser.parse_args()
+
+    trace = load_log_trace(args.log)
+    source = f"log ({args.log})"
+    if len(trace) < args.min_log_events:
+        trace = synthetic_trace()
+        source = 'synthetic (Zipf 1.1 over 5000 templates + crawler sweeps)'
+
+    print(f"Trace: {source}, {len(trace)} accesses, {len(set(trace))} distinct keys")
+    header = f"{'size':>8}" + ''.join(f"{policy:>12}" for policy in EVICTION_POLICIES)
+    print(header)
+    print('-' * len(header))
+    for size in (int(value) for value in args.sizes.split(',')):
+        ratios = [replay(trace, policy, size) for policy in EVICTION_POLICIES]
+        print(f"{size:>8}" + ''.join(f"{ratio:>12.2%}" for ratio in ratios))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Logging Pipeline Benchmark
+
+Measures request throughput and latency of a small Flask app whose views log
+like the library server's, once with the file and console handlers attached
+directly to the app logger (the previous setup) and once behind the queued
+LogPipeline, optionally with access-line sampling. Log output goes to files
+in a temporary directory; the rotating file handler is given a small size
+limit so rotation happens during the run.
+
+Usage:
+    python scripts/benchmark_logging.py [--threads 8] [--duration 5] [--sampling 0.1] [--write-delay 0.5]
+"""
+
+import os
+import sys
+import time
+import logging
+import argparse
+import tempfile
+import threading
+from logging.handlers import RotatingFileHandler
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, PROJECT_ROOT)
+
+from flask import Flask, jsonify, request  # noqa: E402
+from src.log_pipeline import LogPipeline, JsonFormatter  # noqa: E402
+
+TEXT_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - [%(filename)s:%(lineno)d] - %(message)s'
+
+
+class SlowStream:
+    """File wrapper that sleeps on every write, standing in for a slow disk or log pipe."""
+
+    def __init__(self, stream, delay):
+        self.stream = stream
+        self.delay = delay
+
+    def write(self, text):
+        time.sleep(self.delay)
+        return self.stream.write(text)
+
+    def flush(self):
+        self.stream.flush()
+
+    def close(self):
+        self.stream.close()
+
+
+def build_handlers(log_dir, json_file, write_delay):
+    file_handler = RotatingFileHandler(os.path.join(log_dir, 'knowledge_library.log'),
+                                       maxBytes=1024 * 1024, backupCount=5)
+    console_stream = open(os.path.join(log_dir, 'console.log'), 'a')
+    if write_delay:
+        console_stream = SlowStream(console_stream, write_delay / 1000)
+    console_handler = logging.StreamHandler(console_stream)
+    formatter = logging.Formatter(TEXT_FORMAT, datefmt='%Y-%m-%d %H:%M:%S')
+    file_handler.setFormatter(JsonFormatter() if json_file else formatter)
+    console_handler.setFormatter(formatter)
+    return [file_handler, console_handler]
+
+
+def build_app(mode, log_dir, sampling, write_delay):
+    app = Flask(f"benchmark_{mode}")
+    app.logger.handlers = []
+    app.logger.propagate = False
+    app.logger.setLevel(logging.INFO)
+    access_log = app.logger.getChild('access')
+    pipeline = None
+    if mode == 'direct':
+        for handler in build_handlers(log_dir, json_file=False, write_delay=write_delay):
+            app.logger.addHandler(handler)
+    else:
+        rates = {access_log.name: sampling} if mode == 'queued+sampling' else None
+        pipeline = LogPipeline(build_handlers(log_dir, json_file=True, write_delay=write_delay), sampling=rates)
+        app.logger.addHandler(pipeline.handler)
+
+    @app.route('/template/<name>', methods=['POST'])
+    def template(name):
+        access_log.info(f"Template {name} accessed")
+        app.logger.info(f"Template generation request received: {request.get_json()}")
+        return jsonify({'name': name})
+
+    return app, pipeline
+
+
+def run(app, threads, duration):
+    latencies = []
+    stop = time.monotonic() + duration
+    payload = {'template_type': 'document', 'name': 'Benchmark', 'tags': ['a', 'b', 'c'] * 10}
+
+    def worker():
+        client = app.test_client()
+        local = []
+        while time.monotonic() < stop:
+            started = time.perf_counter()
+            client.post('/template/Benchmark', json=payload)
+            local.append((time.perf_counter() - started) * 1000)
+        latencies.extend(local)
+
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    return latencies
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(int(len(ordered) * fraction), len(ordered) - 1)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare direct and queued logging under request load')
+    parser.add_argument('--threads', type=int, default=8, help='Concurrent client threads')
+    parser.add_argument('--duration', type=float, default=5.0, help='Seconds per mode')
+    parser.add_argument('--sampling', type=float, default=0.1, help='Fraction of access lines kept when sampling')
+    parser.add_argument('--write-delay', type=float, default=0.0,
+                        help='Milliseconds added to every console write, to model slow log I/O')
+    args = parser.parse_args()
+
+    for mode in ('direct', 'queued', 'queued+sampling'):
+        with tempfile.TemporaryDirectory() as log_dir:
+            app, pipeline = build_app(mode, log_dir, args.sampling, args.write_delay)
+            latencies = run(app, args.threads, args.duration)
+            drain_started = time.perf_counter()
+            if pipeline is not None:
+                pipeline.stop()
+            drain = time.perf_counter() - drain_started
+            dropped = pipeline.stats()['dropped'] if pipeline is not None else 0
+            print(f"{mode:<16} {len(latencies) / args.duration:8.0f} req/s  p50 {percentile(latencies, 0.5):6.2f} ms  "
+                  f"p99 {percentile(latencies, 0.99):6.2f} ms  drain {drain:5.2f} s  dropped {dropped}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Search Index Benchmark
+
+Builds a SearchIndex over synthetic documents drawn from a Zipf-distributed
+vocabulary, then reports query latency percentiles, build time and the
+size of the persisted index.
+
+Usage:
+    python scripts/benchmark_search.py [--documents 100000] [--queries 2000]
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+import tempfile
+from itertools import accumulate
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, PROJECT_ROOT)
+
+from src.search import SearchIndex  # noqa: E402
+
+
+def build_corpus(documents, vocabulary_size=20000, length=60, skew=1.1, seed=11):
+    """
+    Generate documents whose word frequencies follow a Zipf distribution
+    """
+    rng = random.Random(seed)
+    vocabulary = [f"w{rank}" for rank in range(vocabulary_size)]
+    cumulative = list(accumulate(1.0 / ((rank + 1) ** skew) for rank in range(vocabulary_size)))
+    for doc_id in range(documents):
+        yield f"doc{doc_id}", ' '.join(rng.choices(vocabulary, cum_weights=cumulative, k=length))
+
+
+def build_queries(count, vocabulary_size=20000, seed=13):
+    """
+    Mix one-word, two-word and phrase queries over common and rare terms
+    """
+    rng = random.Random(seed)
+    queries = []
+    for index in range(count):
+        words = [f"w{int(rng.paretovariate(0.6)) % vocabulary_size}" for _ in range(2)]
+        kind = index % 4
+        if kind == 0:
+            queries.append(words[0])
+        elif kind == 3:
+            queries.append(f'"{words[0]} {words[1]}"')
+        else:
+            queries.append(' '.join(words))
+    return queries
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(int(len(ordered) * fraction), len(ordered) - 1)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure search latency on a synthetic corpus')
+    parser.add_argument('--documents', type=int, default=100000, help='Number of documents to index')
+    parser.add_argument('--queries', type=int, default=2000, help='Number of queries to run')
+    args = parser.parse_args()
+
+    index = SearchIndex()
+    started = time.perf_counter()
+    for key, text in build_corpus(args.documents):
+        index.add(key, text, title=key)
+    build_seconds = time.perf_counter() - started
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'search_index.bin')
+        started = time.perf_counter()
+        index.save(path)
+        save_seconds = time.perf_counter() - started
+        size = os.path.getsize(path)
+        started = time.perf_counter()
+        index = SearchIndex.load(path)
+        load_seconds = time.perf_counter() - started
+
+    latencies = []
+    for query in build_queries(args.queries):
+        started = time.perf_counter()
+        index.search(query)
+        latencies.append((time.perf_counter() - started) * 1000)
+
+    print(f"Documents: {args.documents}, queries: {args.queries}")
+    print(f"Build {build_seconds:.1f}s, save {save_seconds:.1f}s, load {load_seconds:.1f}s, "
+          f"index file {size / 1024 / 1024:.1f} MiB")
+    print(f"Latency p50 {percentile(latencies, 0.5):.2f} ms, p95 {percentile(latencies, 0.95):.2f} ms, "
+          f"p99 {percentile(latencies, 0.99):.2f} ms, max {max(latencies):.2f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""
+Write Admission Load Test
+
+Starts the server in a subprocess, measures read latency on its own, then
+again while a burst of template generation requests is running: once with
+write admission control effectively disabled and once with the configured
+limits. Templates created by the burst are deleted afterwards.
+
+Usage:
+    python scripts/load_test_admission.py [--readers 8] [--writers 32] [--duration 10]
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import socket
+import argparse
+import threading
+import subprocess
+import urllib.error
+import urllib.request
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, PROJECT_ROOT)
+
+TEMPLATES_DIR = os.path.join(PROJECT_ROOT, 'Templates_NEW')
+READ_PATHS = ['/api/templates?limit=50', '/api/templates?kind=new&fields=name', '/health']
+
+# Server settings per scenario; 'unlimited' lifts the write limits out of reach
+SCENARIOS = {
+    'unlimited': {'CRL_WRITE_CONCURRENCY': '1000000', 'CRL_WRITE_QUEUE': '0', 'CRL_WRITE_READ_THRESHOLD': '0'},
+    'limited': {},
+}
+
+
+def serve(port):
+    """
+    Run the app on a threaded development server (child process mode)
+    """
+    from werkzeug.serving import make_server
+    from src.local_server import app
+    make_server('127.0.0.1', port, app, threaded=True).serve_forever()
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def start_server(env_overrides):
+    port = free_port()
+    env = dict(os.environ, **env_overrides)
+    process = subprocess.Popen([sys.executable, __file__, '--serve', str(port)], env=env, cwd=PROJECT_ROOT,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    base_url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        try:
+            urllib.request.urlopen(f"{base_url}/health", timeout=1).read()
+            return process, base_url
+        except OSError:
+            time.sleep(0.2)
+    process.kill()
+    raise RuntimeError('server did not start')
+
+
+def request(url, payload=None):
+    """
+    Send one request and return (status, elapsed ms, headers, body)
+    """
+    data = json.dumps(payload).encode('utf-8') if payload is not None else None
+    req = urllib.request.Request(url, data=data, headers={'Content-Type': 'application/json'})
+    started = time.perf_counter()
+    try:
+        with urllib.request.urlopen(req, timeout=60) as response:
+            body = response.read()
+            status, headers = response.status, response.headers
+    except urllib.error.HTTPError as e:
+        body, status, headers = e.read(), e.code, e.headers
+    return status, (time.perf_counter() - started) * 1000, headers, body
+
+
+def read_load(base_url, readers, duration):
+    latencies = []
+    stop = time.monotonic() + duration
+
+    def reader(offset):
+        index = offset
+        while time.monotonic() < stop:
+            _, elapsed, _, _ = request(base_url + READ_PATHS[index % len(READ_PATHS)])
+            latencies.append(elapsed)
+            index += 1
+
+    threads = [threading.Thread(target=reader, args=(i,)) for i in range(readers)]
+    for thread in threads:
+        thread.start()
+    return threads, latencies
+
+
+def write_burst(base_url, writers, duration, created):
+    outcomes = {'created': 0, 'rejected': 0, 'failed': 0}
+    lock = threading.Lock()
+    stop = time.monotonic() + duration
+
+    def writer(worker):
+        count = 0
+        while time.monotonic() < stop:
+            status, _, headers, body = request(f"{base_url}/generate_template",
+                                               {'template_type': 'document', 'name': f'LoadTest_{worker}_{count}'})
+            count += 1
+            with lock:
+                if status == 201:
+                    outcomes['created'] += 1
+                    created.append(json.loads(body)['path'])
+                elif status == 429:
+                    outcomes['rejected'] += 1
+                else:
+                    outcomes['failed'] += 1
+            if status == 429:
+                # Well-behaved clients honour Retry-After
+                time.sleep(min(float(headers.get('Retry-After', 1)), max(stop - time.monotonic(), 0)))
+
+    threads = [threading.Thread(target=writer, args=(i,)) for i in range(writers)]
+    for thread in threads:
+        thread.start()
+    return threads, outcomes
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(int(len(ordered) * fraction), len(ordered) - 1)] if ordered else float('nan')
+
+
+def report(label, latencies, outcomes=None):
+    line = (f"{label:<28} reads {len(latencies):>6}  p50 {percentile(latencies, 0.5):7.1f} ms  "
+            f"p99 {percentile(latencies, 0.99):7.1f} ms")
+    if outcomes is not None:
+        line += f"  writes created {outcomes['created']}, 429 {outcomes['rejected']}, failed {outcomes['failed']}"
+    print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure read latency during a write burst')
+    parser.add_argument('--readers', type=int, default=8, help='Concurrent read clients')
+    parser.add_argument('--writers', type=int, default=32, help='Concurrent write clients during the burst')
+    parser.add_argument('--duration', type=float, default=10.0, help='Seconds per phase')
+    parser.add_argument('--serve', type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args.serve)
+        return
+
+    created = []
+    try:
+        for scenario, env_overrides in SCENARIOS.items():
+            process, base_url = start_server(env_overrides)
+            try:
+                threads, latencies = read_load(base_url, args.readers, args.duration)
+                for thread in threads:
+                    thread.join()
+                report(f"{scenario}: reads only", latencies)
+
+                threads, latencies = read_load(base_url, args.readers, args.duration)
+                write_threads, outcomes = write_burst(base_url, args.writers, args.duration, created)
+                for thread in threads + write_threads:
+                    thread.join()
+                report(f"{scenario}: reads + write burst", latencies, outcomes)
+            finally:
+                process.terminate()
+                process.wait()
+    finally:
+        for path in created:
+            shutil.rmtree(os.path.join(TEMPLATES_DIR, path), ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
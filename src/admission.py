@@ -0,0 +1,190 @@
+import math
+import threading
+import time
+from typing import Any, Dict, Iterable, Optional
+
+from flask import g, jsonify, request
+
+
+class AdmissionRejected(Exception):
+    """A write could not be admitted; ``retry_after`` is the suggested wait in seconds."""
+
+    def __init__(self, reason: str, retry_after: int):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    """
+    Concurrency limit with a bounded wait queue for write requests.
+
+    At most ``max_concurrent`` writes run at once; up to ``max_queue`` more
+    wait for a slot for at most ``queue_timeout`` seconds, and anything
+    beyond that is rejected immediately. Reads are never limited. A write
+    that finds a free slot and an empty queue starts at once; queued writes
+    are held back while ``read_threshold`` or more reads are in flight, so
+    a write burst cannot take the threads reads need, but for no longer
+    than ``max_read_hold`` seconds, so steady read traffic cannot starve
+    writes. Limits apply per process; under gunicorn each worker has its
+    own.
+    """
+
+    def __init__(self, max_concurrent: int = 2, max_queue: int = 16, queue_timeout: float = 5.0,
+                 read_threshold: Optional[int] = 2, max_read_hold: float = 0.5):
+        """
+        Initialize the controller.
+
+        Args:
+            max_concurrent (int, optional): Writes allowed to run at once
+            max_queue (int, optional): Writes allowed to wait for a slot
+            queue_timeout (float, optional): Seconds a write waits before it is rejected
+            read_threshold (int, optional): In-flight reads at which queued writes are held back; None disables
+            max_read_hold (float, optional): Longest time in seconds a queued write is held back for reads
+        """
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.read_threshold = read_threshold
+        self.max_read_hold = max_read_hold
+
+        self.active = 0
+        self.waiting = 0
+        self.reads = 0
+        self.admitted = 0
+        self.rejected = 0
+        self._write_seconds = 0.0
+        self._condition = threading.Condition()
+
+    def _can_start(self, queued: float) -> bool:
+        return (self.active < self.max_concurrent
+                and (self.read_threshold is None or self.reads < self.read_threshold
+                     or time.monotonic() - queued >= self.max_read_hold))
+
+    def retry_after(self) -> int:
+        """
+        Estimate when a rejected write should be retried.
+
+        Returns:
+            int: Seconds until the current backlog is expected to drain, at least 1
+        """
+        average = self._write_seconds / self.admitted if self.admitted else 1.0
+        backlog = self.active + self.waiting + 1
+        return max(1, math.ceil(backlog * average / self.max_concurrent))
+
+    def acquire_write(self) -> float:
+        """
+        Wait for a write slot.
+
+        Returns:
+            float: Monotonic start time, to pass to release_write()
+
+        Raises:
+            AdmissionRejected: If the queue is full or the wait timed out
+        """
+        with self._condition:
+            if self.active >= self.max_concurrent or self.waiting:
+                if self.waiting >= self.max_queue:
+                    self.rejected += 1
+                    raise AdmissionRejected('Write queue is full', self.retry_after())
+                self.waiting += 1
+                queued = time.monotonic()
+                deadline = queued + self.queue_timeout
+                try:
+                    while not self._can_start(queued):
+                        timeout = deadline - time.monotonic()
+                        if timeout <= 0:
+                            break
+                        if self.active < self.max_concurrent:
+                            # Held back by reads only; wake up when the hold runs out
+                            timeout = min(timeout, queued + self.max_read_hold - time.monotonic())
+                        self._condition.wait(max(timeout, 0))
+                    admitted = self._can_start(queued)
+                finally:
+                    self.waiting -= 1
+                if not admitted:
+                    self.rejected += 1
+                    raise AdmissionRejected('Timed out waiting for a write slot', self.retry_after())
+            self.active += 1
+            return time.monotonic()
+
+    def release_write(self, started: float):
+        """
+        Free a write slot.
+
+        Args:
+            started (float): Value returned by acquire_write()
+        """
+        with self._condition:
+            self.active -= 1
+            self.admitted += 1
+            self._write_seconds += time.monotonic() - started
+            self._condition.notify_all()
+
+    def begin_read(self):
+        """Count a read as in flight."""
+        with self._condition:
+            self.reads += 1
+
+    def end_read(self):
+        """Count a read as finished, letting a held-back write start."""
+        with self._condition:
+            self.reads -= 1
+            if self.waiting:
+                self._condition.notify_all()
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Report limiter state.
+
+        Returns:
+            dict: Limits, current load and admission counters
+        """
+        with self._condition:
+            return {
+                'max_concurrent': self.max_concurrent,
+                'max_queue': self.max_queue,
+                'active_writes': self.active,
+                'waiting_writes': self.waiting,
+                'active_reads': self.reads,
+                'admitted': self.admitted,
+                'rejected': self.rejected
+            }
+
+
+def init_admission_control(app, controller: AdmissionController, write_endpoints: Iterable[str]):
+    """
+    Gate the given endpoints through ``controller`` and count every other request as a read.
+
+    Rejected writes get 429 with a Retry-After header.
+
+    Args:
+        app (Flask): Flask application instance
+        controller (AdmissionController): Limiter shared by the app's requests
+        write_endpoints (iterable): Flask endpoint names treated as writes
+    """
+    write_endpoints = frozenset(write_endpoints)
+
+    @app.before_request
+    def admit_request():
+        if request.endpoint in write_endpoints:
+            try:
+                g.admission_write = controller.acquire_write()
+            except AdmissionRejected as e:
+                app.logger.warning(f"Write to {request.endpoint} rejected: {e.reason}")
+                response = jsonify({'error': {'message': e.reason,
+                                              'details': {'retry_after': e.retry_after}}})
+                response.status_code = 429
+                response.headers['Retry-After'] = str(e.retry_after)
+                return response
+        else:
+            controller.begin_read()
+            g.admission_read = True
+
+    @app.teardown_request
+    def release_request(error=None):
+        started = g.pop('admission_write', None)
+        if started is not None:
+            controller.release_write(started)
+        elif g.pop('admission_read', False):
+            controller.end_read()
@@ -0,0 +1,169 @@
+import os
+import struct
+import hashlib
+import mimetypes
+from typing import Dict, NamedTuple, Optional
+
+from flask import Response, abort, request
+
+from .http_cache import build_cache_control
+
+# Characters of the content hash inserted into fingerprinted file names
+FINGERPRINT_LENGTH = 10
+
+# Files under the static directory that are source code rather than assets
+_SKIPPED_SUFFIXES = ('.py', '.pyc')
+
+
+class Asset(NamedTuple):
+    """A static file held in memory."""
+    body: bytes
+    mimetype: str
+    etag: str
+    fingerprinted: bool
+
+
+def build_default_favicon(color=(33, 150, 243)) -> bytes:
+    """
+    Encode a 16x16 single-colour icon in the ICO format.
+
+    Args:
+        color (tuple, optional): RGB colour, Material Blue by default
+
+    Returns:
+        bytes: ICO file contents
+    """
+    size = 16
+    red, green, blue = color
+    pixels = bytes((blue, green, red, 255)) * (size * size)
+    # 1-bit AND mask, rows padded to 32 bits; all zero as the alpha channel is used
+    mask = bytes(4 * size)
+    bitmap_header = struct.pack('<IiiHHIIiiII', 40, size, size * 2, 1, 32, 0, len(pixels) + len(mask), 0, 0, 0, 0)
+    image = bitmap_header + pixels + mask
+    icon_dir = struct.pack('<HHH', 0, 1, 1)
+    icon_entry = struct.pack('<BBBBHHII', size, size, 0, 0, 1, 32, len(image), 6 + 16)
+    return icon_dir + icon_entry + image
+
+
+def fingerprint_name(path: str, body: bytes) -> str:
+    """
+    Insert a content hash before the extension, e.g. css/app.css -> css/app.3f9a1c0b2d.css.
+
+    Args:
+        path (str): Asset path relative to the static directory
+        body (bytes): Asset contents
+
+    Returns:
+        str: Fingerprinted path
+    """
+    digest = hashlib.sha256(body).hexdigest()[:FINGERPRINT_LENGTH]
+    stem, extension = os.path.splitext(path)
+    return f"{stem}.{digest}{extension}"
+
+
+class AssetTable:
+    """
+    Every static asset loaded into memory once, under its plain and its fingerprinted path.
+
+    Fingerprinted paths change whenever the content does, so they can be
+    cached by browsers forever; plain paths stay valid for links that
+    cannot be rewritten and are served for revalidation. A favicon.ico is
+    synthesised when the static directory has none, so no image library
+    is needed at request time.
+    """
+
+    def __init__(self, static_dir: str):
+        """
+        Load and fingerprint every file below ``static_dir``.
+
+        Args:
+            static_dir (str): Static asset directory
+        """
+        self.static_dir = static_dir
+        self.assets: Dict[str, Asset] = {}
+        self.fingerprints: Dict[str, str] = {}
+
+        for root, dirs, files in os.walk(static_dir):
+            dirs[:] = sorted(d for d in dirs if d != '__pycache__')
+            for file in sorted(files):
+                if file.endswith(_SKIPPED_SUFFIXES):
+                    continue
+                full_path = os.path.join(root, file)
+                with open(full_path, 'rb') as f:
+                    body = f.read()
+                self.add(os.path.relpath(full_path, static_dir).replace(os.sep, '/'), body)
+
+        if 'favicon.ico' not in self.fingerprints:
+            self.add('favicon.ico', build_default_favicon())
+
+    def add(self, path: str, body: bytes):
+        """
+        Register an asset under its plain and fingerprinted paths.
+
+        Args:
+            path (str): Path relative to the static directory, with forward slashes
+            body (bytes): Asset contents
+        """
+        mimetype = mimetypes.guess_type(path)[0] or 'application/octet-stream'
+        etag = hashlib.sha1(body).hexdigest()
+        fingerprinted = fingerprint_name(path, body)
+        self.assets[path] = Asset(body, mimetype, etag, False)
+        self.assets[fingerprinted] = Asset(body, mimetype, etag, True)
+        self.fingerprints[path] = fingerprinted
+
+    def get(self, path: str) -> Optional[Asset]:
+        """
+        Look up an asset by plain or fingerprinted path.
+
+        Args:
+            path (str): Requested path relative to the static directory
+
+        Returns:
+            The asset, or None if there is no such file
+        """
+        return self.assets.get(path)
+
+    def url_path(self, path: str) -> str:
+        """
+        Map a plain asset path to its fingerprinted path; unknown paths are returned unchanged.
+
+        Args:
+            path (str): Path relative to the static directory
+
+        Returns:
+            str: Path to put in URLs
+        """
+        return self.fingerprints.get(path, path)
+
+
+def init_static_assets(app, assets: AssetTable):
+    """
+    Serve ``assets`` at /static/ and make url_for('static', ...) produce fingerprinted URLs.
+
+    Fingerprinted paths are sent with a one-year immutable Cache-Control;
+    plain paths must be revalidated with their ETag. The app must be
+    created with ``static_folder=None`` so this route can take the
+    'static' endpoint.
+
+    Args:
+        app (Flask): Flask application instance
+        assets (AssetTable): Assets loaded at startup
+    """
+    immutable = build_cache_control({'max_age': 31536000, 'immutable': True})
+    revalidate = build_cache_control({'max_age': 0})
+
+    @app.url_defaults
+    def fingerprint_static_urls(endpoint, values):
+        if endpoint == 'static' and 'filename' in values:
+            values['filename'] = assets.url_path(values['filename'])
+
+    def static(filename):
+        asset = assets.get(filename)
+        if asset is None:
+            abort(404)
+        response = Response(asset.body, mimetype=asset.mimetype)
+        response.headers['Cache-Control'] = immutable if asset.fingerprinted else revalidate
+        response.set_etag(asset.etag)
+        return response.make_conditional(request)
+
+    app.add_url_rule('/static/<path:filename>', endpoint='static', view_func=static)
@@ -1,111 +1,737 @@
 import os
 import json
-from typing import Dict, Any
-from functools import lru_cache
-from datetime import datetime, timedelta
+import time
+import logging
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Callable, Hashable
+from datetime import datetime
+
+from .eviction import create_memory_cache
+from .procutil import register_after_fork
+
+
+class _InFlightCall:
+    """A computation that other callers for the same key are waiting on."""
+    __slots__ = ('event', 'result', 'error')
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent calls for the same key onto a single computation.
+
+    The first caller for a key runs the function; callers arriving while it
+    is still running block until it finishes and receive the same result
+    (or exception). Nothing is remembered once the call completes, so this
+    sits in front of a cache rather than replacing it.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def do(self, key: Hashable, fn: Callable, *args, **kwargs) -> Any:
+        """
+        Run ``fn(*args, **kwargs)`` unless a call for ``key`` is already in flight.
+
+        Args:
+            key (Hashable): Identity of the computation
+            fn (callable): Function producing the value
+
+        Returns:
+            The value computed by whichever caller ran ``fn``
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _InFlightCall()
+
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn(*args, **kwargs)
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.event.set()
+        return call.result
+
+    def in_flight(self) -> int:
+        """Number of keys currently being computed."""
+        with self._lock:
+            return len(self._calls)
+
+
+class SQLiteCacheStore:
+    """
+    Size-bounded persistent key/value store backed by a single SQLite database.
+
+    The database runs in WAL mode so gunicorn workers can read concurrently
+    while one of them writes. Entries expire after ``ttl`` seconds and the
+    total payload size is capped at ``max_bytes``; when the cap is exceeded
+    the least recently (``'lru'``) or least frequently (``'lfu'``) used
+    entries are evicted.
+
+    Reads never write: access times, hit counts and expired keys are
+    buffered in memory and written by the next write transaction or by
+    flush_accesses(), which WriteBehindWriter calls from its thread.
+    """
+
+    EVICTION_ORDER = {
+        'lru': 'accessed_at ASC',
+        'lfu': 'hits ASC, accessed_at ASC',
+    }
+
+    def __init__(self, db_path: str, ttl: Optional[float] = 3600,
+                 max_bytes: int = 64 * 1024 * 1024, eviction: str = 'lru'):
+        """
+        Open (and create if needed) the cache database.
+
+        Args:
+            db_path (str): Path of the SQLite database file
+            ttl (float, optional): Seconds an entry stays valid; None disables expiry
+            max_bytes (int, optional): Cap on the total size of stored values
+            eviction (str, optional): Eviction policy, 'lru' or 'lfu'
+        """
+        if eviction not in self.EVICTION_ORDER:
+            raise ValueError(f"Unknown eviction policy: {eviction}")
+
+        self.db_path = db_path
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.eviction = eviction
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._counter_lock = threading.Lock()
+        self._local = threading.local()
+        # Buffered reads: key -> [last access time, hits], and expired keys seen
+        self._accesses: Dict[str, list] = {}
+        self._expired = set()
+        register_after_fork(self, '_reset_after_fork')
+
+        self._initialize_database()
+
+    def _reset_after_fork(self):
+        """Drop connections and buffered reads inherited from the parent process."""
+        self._counter_lock = threading.Lock()
+        self._local = threading.local()
+        self._accesses = {}
+        self._expired = set()
+
+    def _connection(self) -> sqlite3.Connection:
+        """Return this thread's connection, opening it on first use."""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def _initialize_database(self):
+        """Create the entries table, its indexes and the size-tracking triggers."""
+        conn = self._connection()
+        conn.executescript('''
+            CREATE TABLE IF NOT EXISTS entries (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                accessed_at REAL NOT NULL,
+                hits INTEGER NOT NULL DEFAULT 0
+            );
+            CREATE INDEX IF NOT EXISTS idx_entries_accessed ON entries (accessed_at);
+            CREATE INDEX IF NOT EXISTS idx_entries_hits ON entries (hits, accessed_at);
+            CREATE INDEX IF NOT EXISTS idx_entries_created ON entries (created_at);
+
+            CREATE TABLE IF NOT EXISTS totals (id INTEGER PRIMARY KEY CHECK (id = 0), bytes INTEGER NOT NULL);
+            INSERT OR IGNORE INTO totals (id, bytes) VALUES (0, 0);
+
+            CREATE TRIGGER IF NOT EXISTS entries_insert AFTER INSERT ON entries BEGIN
+                UPDATE totals SET bytes = bytes + NEW.size WHERE id = 0;
+            END;
+            CREATE TRIGGER IF NOT EXISTS entries_delete AFTER DELETE ON entries BEGIN
+                UPDATE totals SET bytes = bytes - OLD.size WHERE id = 0;
+            END;
+            CREATE TRIGGER IF NOT EXISTS entries_update AFTER UPDATE OF size ON entries BEGIN
+                UPDATE totals SET bytes = bytes - OLD.size + NEW.size WHERE id = 0;
+            END;
+        ''')
+
+    def _count(self, counter: str, amount: int = 1):
+        with self._counter_lock:
+            setattr(self, counter, getattr(self, counter) + amount)
+
+    def get(self, key: str) -> Optional[Any]:
+        """
+        Fetch a value, treating expired entries as missing.
+
+        Args:
+            key (str): Entry key
+
+        Returns:
+            The stored value, or None on a miss
+        """
+        row = self._connection().execute('SELECT value, created_at FROM entries WHERE key = ?', (key,)).fetchone()
+        now = time.time()
+
+        if row is None:
+            self._count('misses')
+            return None
+
+        with self._counter_lock:
+            if self.ttl is not None and now - row[1] >= self.ttl:
+                self.misses += 1
+                self._expired.add(key)
+                self._accesses.pop(key, None)
+                return None
+            self.hits += 1
+            access = self._accesses.get(key)
+            if access is None:
+                self._accesses[key] = [now, 1]
+            else:
+                access[0] = now
+                access[1] += 1
+        return json.loads(row[0])
+
+    def _write_accesses(self, conn: sqlite3.Connection):
+        """Apply buffered reads inside the caller's transaction."""
+        with self._counter_lock:
+            accesses, self._accesses = self._accesses, {}
+            expired, self._expired = self._expired, set()
+        if accesses:
+            conn.executemany('UPDATE entries SET accessed_at = MAX(accessed_at, ?), hits = hits + ? WHERE key = ?',
+                             [(accessed_at, hits, key) for key, (accessed_at, hits) in accesses.items()])
+        if expired and self.ttl is not None:
+            # An entry set again since it was read is no longer expired
+            cutoff = time.time() - self.ttl
+            conn.executemany('DELETE FROM entries WHERE key = ? AND created_at < ?',
+                             [(key, cutoff) for key in expired])
+
+    def flush_accesses(self):
+        """Write buffered access times and hit counts, and delete expired entries that were read."""
+        if not self._accesses and not self._expired:
+            return
+        conn = self._connection()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            self._write_accesses(conn)
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+
+    def set(self, key: str, value: Any):
+        """
+        Store a JSON-serializable value and evict entries if over the size cap.
+
+        Args:
+            key (str): Entry key
+            value (Any): JSON-serializable value
+        """
+        payload = json.dumps(value, separators=(',', ':'))
+        now = time.time()
+        conn = self._connection()
+        conn.execute(
+            'INSERT INTO entries (key, value, size, created_at, accessed_at, hits) '
+            'VALUES (?, ?, ?, ?, ?, 0) '
+            'ON CONFLICT(key) DO UPDATE SET value = excluded.value, size = excluded.size, '
+            'created_at = excluded.created_at, accessed_at = excluded.accessed_at',
+            (key, payload, len(payload), now, now)
+        )
+        if self.total_bytes() > self.max_bytes:
+            self._evict()
+
+    def set_many(self, items):
+        """
+        Store several values in one transaction, evicting at most once.
+
+        Buffered reads are written in the same transaction.
+
+        Args:
+            items (iterable): (key, value) pairs of JSON-serializable values
+        """
+        now = time.time()
+        rows = []
+        for key, value in items:
+            payload = json.dumps(value, separators=(',', ':'))
+            rows.append((key, payload, len(payload), now, now))
+
+        conn = self._connection()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            conn.executemany(
+                'INSERT INTO entries (key, value, size, created_at, accessed_at, hits) '
+                'VALUES (?, ?, ?, ?, ?, 0) '
+                'ON CONFLICT(key) DO UPDATE SET value = excluded.value, size = excluded.size, '
+                'created_at = excluded.created_at, accessed_at = excluded.accessed_at',
+                rows
+            )
+            self._write_accesses(conn)
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        if self.total_bytes() > self.max_bytes:
+            self._evict()
+
+    def _evict(self):
+        """Drop expired entries, then the policy's victims until under the size cap."""
+        conn = self._connection()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            # Victims are chosen by access order, so it must be current
+            self._write_accesses(conn)
+            evicted = 0
+            if self.ttl is not None:
+                evicted += conn.execute('DELETE FROM entries WHERE created_at < ?',
+                                        (time.time() - self.ttl,)).rowcount
+
+            excess = self.total_bytes() - self.max_bytes
+            if excess > 0:
+                order = self.EVICTION_ORDER[self.eviction]
+                victims, freed = [], 0
+                for key, size in conn.execute(f'SELECT key, size FROM entries ORDER BY {order}'):
+                    victims.append((key,))
+                    freed += size
+                    if freed >= excess:
+                        break
+                conn.executemany('DELETE FROM entries WHERE key = ?', victims)
+                evicted += len(victims)
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+
+        self._count('evictions', evicted)
+
+    def delete(self, key: str):
+        """
+        Remove a single entry.
+
+        Args:
+            key (str): Entry key
+        """
+        self._connection().execute('DELETE FROM entries WHERE key = ?', (key,))
+
+    def clear(self):
+        """Remove every entry."""
+        self._connection().execute('DELETE FROM entries')
+
+    def total_bytes(self) -> int:
+        """Total size of stored values, maintained by triggers."""
+        return self._connection().execute('SELECT bytes FROM totals WHERE id = 0').fetchone()[0]
+
+    def __len__(self) -> int:
+        return self._connection().execute('SELECT COUNT(*) FROM entries').fetchone()[0]
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Report store effectiveness.
+
+        Returns:
+            dict: Hit, miss and eviction counters plus current size
+        """
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'bytes': self.total_bytes(),
+            'max_bytes': self.max_bytes
+        }
+
+
+class WriteBehindWriter:
+    """
+    Persist cache entries from a background thread instead of the request path.
+
+    Writes are queued in a bounded map, so repeated writes to a key that has
+    not been flushed yet collapse into one. The writer thread drains the
+    queue in batches, each committed in a single SQLite transaction. When the
+    queue is full new keys are dropped and counted: losing a cache write
+    only costs a later recomputation. The thread also writes the store's
+    buffered reads with each batch, or every ``access_interval`` seconds
+    when there are no writes.
+    """
+
+    def __init__(self, store: SQLiteCacheStore, max_pending: int = 1024,
+                 batch_size: int = 64, flush_interval: float = 0.05, access_interval: float = 1.0):
+        """
+        Start the background writer.
+
+        Args:
+            store (SQLiteCacheStore): Store receiving the writes
+            max_pending (int, optional): Maximum number of distinct keys awaiting a flush
+            batch_size (int, optional): Maximum entries committed per transaction
+            flush_interval (float, optional): Seconds to wait for more writes before committing
+            access_interval (float, optional): Seconds between writes of buffered reads while idle
+        """
+        self.store = store
+        self.max_pending = max_pending
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.access_interval = access_interval
+
+        self.written = 0
+        self.coalesced = 0
+        self.dropped = 0
+        self.errors = 0
+
+        self._pending = OrderedDict()
+        self._in_progress = {}
+        self._condition = threading.Condition()
+        self._closed = False
+        self._start_thread()
+        register_after_fork(self, '_restart_after_fork')
+
+    def _start_thread(self):
+        self._thread = threading.Thread(target=self._run, name='cache-write-behind', daemon=True)
+        self._thread.start()
+
+    def _restart_after_fork(self):
+        """Replace the writer thread, which does not exist in a forked child."""
+        self._condition = threading.Condition()
+        self._pending.update(self._in_progress)
+        self._in_progress = {}
+        if not self._closed:
+            self._start_thread()
+
+    def put(self, key: str, value: Any) -> bool:
+        """
+        Queue a value for persistence.
+
+        Args:
+            key (str): Entry key
+            value (Any): JSON-serializable value
+
+        Returns:
+            bool: False if the write was dropped because the queue is full or closed
+        """
+        with self._condition:
+            if self._closed:
+                self.dropped += 1
+                return False
+            if key in self._pending:
+                self.coalesced += 1
+                self._pending[key] = value
+                return True
+            if len(self._pending) >= self.max_pending:
+                self.dropped += 1
+                return False
+            self._pending[key] = value
+            self._condition.notify()
+        return True
+
+    def get(self, key: str) -> Optional[Any]:
+        """
+        Read a value, seeing queued writes before they reach the store.
+
+        Args:
+            key (str): Entry key
+
+        Returns:
+            The queued or stored value, or None
+        """
+        with self._condition:
+            if key in self._pending:
+                return self._pending[key]
+            if key in self._in_progress:
+                return self._in_progress[key]
+        return self.store.get(key)
+
+    def discard(self, key: str = None):
+        """
+        Drop queued writes for one key, or for every key.
+
+        Args:
+            key (str, optional): Entry key; all queued writes when None
+        """
+        with self._condition:
+            if key is None:
+                self._pending.clear()
+            else:
+                self._pending.pop(key, None)
+
+    def _run(self):
+        while True:
+            with self._condition:
+                if not self._pending and not self._closed:
+                    self._condition.wait(self.access_interval)
+                closing = self._closed
+                if self._pending and not closing and len(self._pending) < self.batch_size:
+                    # Give closely spaced writes a chance to share a transaction
+                    self._condition.wait(self.flush_interval)
+                while self._pending and len(self._in_progress) < self.batch_size:
+                    key, value = self._pending.popitem(last=False)
+                    self._in_progress[key] = value
+                batch = list(self._in_progress.items())
+
+            try:
+                if batch:
+                    self.store.set_many(batch)
+                else:
+                    self.store.flush_accesses()
+                written = len(batch)
+            except Exception as e:
+                logging.getLogger(__name__).error(f"Cache write-behind batch failed: {e}")
+                written = 0
+                self.errors += 1
+
+            with self._condition:
+                self._in_progress.clear()
+                self.written += written
+                self._condition.notify_all()
+                if closing and not self._pending:
+                    return
+
+    def pending(self) -> int:
+        """Number of writes not yet committed."""
+        with self._condition:
+            return len(self._pending) + len(self._in_progress)
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Block until every queued write has been committed.
+
+        Args:
+            timeout (float, optional): Maximum seconds to wait
+
+        Returns:
+            bool: True if the queue drained in time
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._condition:
+            self._condition.notify_all()
+            while self._pending or self._in_progress:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._condition.wait(remaining)
+        return True
+
+    def close(self, timeout: Optional[float] = 10):
+        """
+        Flush outstanding writes and stop the writer thread.
+
+        Args:
+            timeout (float, optional): Maximum seconds to wait for the flush
+        """
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+        self._thread.join(timeout)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Report writer activity.
+
+        Returns:
+            dict: Written, coalesced, dropped and pending counts
+        """
+        return {
+            'written': self.written,
+            'coalesced': self.coalesced,
+            'dropped': self.dropped,
+            'errors': self.errors,
+            'pending': self.pending()
+        }
+
 
 class TemplateMetadataCache:
     """
     Efficient caching mechanism for template metadata.
     Supports in-memory and persistent caching strategies.
     """
-    
-    def __init__(self, cache_dir: str = None, max_size: int = 100):
+
+    def __init__(self, cache_dir: str = None, max_size: int = 100,
+                 ttl: Optional[float] = None, max_bytes: int = 64 * 1024 * 1024,
+                 eviction: str = 'lru', memory_policy: str = 'tinylfu'):
         """
         Initialize the template metadata cache.
-        
+
+        Entries are validated against a directory fingerprint rather than
+        their age, so ``ttl`` is only an optional upper bound.
+
         Args:
             cache_dir (str, optional): Directory to store persistent cache
             max_size (int, optional): Maximum number of items to cache in memory
+            ttl (float, optional): Seconds a persisted entry stays valid; None keeps it until evicted
+            max_bytes (int, optional): Size cap for the persistent tier
+            eviction (str, optional): Persistent tier eviction policy, 'lru' or 'lfu'
+            memory_policy (str, optional): In-memory eviction policy, 'tinylfu' or 'lru'
         """
         self.cache_dir = cache_dir or os.path.join(os.path.dirname(__file__), '..', 'cache')
         os.makedirs(self.cache_dir, exist_ok=True)
-        
-        # In-memory LRU cache
-        self.memory_cache = lru_cache(maxsize=max_size)(self._load_metadata)
-    
-    def _get_cache_path(self, template_name: str) -> str:
-        """Generate cache file path for a template."""
-        return os.path.join(self.cache_dir, f"{template_name}_metadata.json")
-    
-    def _load_metadata(self, template_path: str) -> Dict[str, Any]:
+        self._remove_legacy_files()
+
+        # Persistent tier
+        self.store = SQLiteCacheStore(
+            os.path.join(self.cache_dir, 'template_metadata.sqlite3'),
+            ttl=ttl,
+            max_bytes=max_bytes,
+            eviction=eviction
+        )
+        # Persistence happens off the request path
+        self.writer = WriteBehindWriter(self.store)
+
+        # In-memory cache; concurrent misses for one key share a single load
+        self.memory_cache = create_memory_cache(memory_policy, max_size)
+        self._flight = SingleFlight()
+
+    def _remove_legacy_files(self):
+        """Delete per-template JSON files written before the SQLite store existed."""
+        for file in os.listdir(self.cache_dir):
+            if file.endswith('_metadata.json'):
+                os.remove(os.path.join(self.cache_dir, file))
+
+    @staticmethod
+    def fingerprint(template_path: str) -> Optional[str]:
+        """
+        Cheap change detector for a template directory.
+
+        Combines the directory inode, its modification time (bumped whenever
+        an entry is added, removed or renamed) and its link count (which
+        tracks the number of subdirectories on POSIX filesystems).
+
+        Args:
+            template_path (str): Path to template directory
+
+        Returns:
+            Fingerprint string, or None if the directory does not exist
+        """
+        try:
+            stat = os.stat(template_path)
+        except OSError:
+            return None
+        return f"{stat.st_ino}:{stat.st_mtime_ns}:{stat.st_nlink}"
+
+    def _load_metadata(self, template_path: str, fingerprint: Optional[str]) -> Dict[str, Any]:
         """
         Load metadata with caching logic.
-        
+
         Args:
             template_path (str): Path to template directory
-        
+            fingerprint (str): Current fingerprint of the directory
+
         Returns:
             Metadata dictionary
         """
-        cache_file = self._get_cache_path(os.path.basename(template_path))
-        
+        template_name = os.path.basename(template_path)
+
         # Fallback metadata if path doesn't exist
-        if not os.path.exists(template_path):
+        if fingerprint is None:
             return {
-                'name': os.path.basename(template_path),
+                'name': template_name,
                 'type': 'error',
                 'description': 'Template path not found'
             }
-        
-        # Check persistent cache first
-        if os.path.exists(cache_file):
-            with open(cache_file, 'r') as f:
-                cached_data = json.load(f)
-                cache_time = datetime.fromisoformat(cached_data.get('cached_at', datetime.utcnow().isoformat()))
-                
-                # Check cache freshness (1 hour)
-                if datetime.utcnow() - cache_time < timedelta(hours=1):
-                    return cached_data['metadata']
-        
+
+        # Check persistent cache first; entries for an older fingerprint are stale
+        cached_data = self.writer.get(template_name)
+        if cached_data is not None and cached_data.get('fingerprint') == fingerprint:
+            return cached_data['metadata']
+
         # If no valid cache, generate fallback metadata
         metadata = {
-            'name': os.path.basename(template_path),
+            'name': template_name,
             'type': 'generic',
             'description': 'Auto-generated metadata',
             'created_at': datetime.utcnow().isoformat(),
             'file_count': len([f for f in os.listdir(template_path) if os.path.isfile(os.path.join(template_path, f))]),
             'directory_count': len([d for d in os.listdir(template_path) if os.path.isdir(os.path.join(template_path, d))])
         }
-        
-        # Update persistent cache
-        cache_data = {
-            'metadata': metadata,
-            'cached_at': datetime.utcnow().isoformat()
-        }
-        
-        with open(cache_file, 'w') as f:
-            json.dump(cache_data, f, indent=2)
-        
+
+        # Queue the persistent cache update for the background writer
+        self.writer.put(template_name, {'fingerprint': fingerprint, 'metadata': metadata})
+
         return metadata
-    
+
     def get_metadata(self, template_path: str) -> Dict[str, Any]:
         """
         Retrieve metadata with efficient caching.
-        
+
+        The in-memory cache is keyed on the directory fingerprint as well as
+        the path, so a changed directory misses both tiers after one stat.
+
         Args:
             template_path (str): Path to template directory
-        
+
         Returns:
             Metadata dictionary
         """
-        return self.memory_cache(template_path)
-    
+        fingerprint = self.fingerprint(template_path)
+        key = (template_path, fingerprint)
+        metadata = self.memory_cache.get(key)
+        if metadata is None:
+            metadata = self._flight.do(key, self._load_into_memory, key)
+        return dict(metadata)
+
+    def _load_into_memory(self, key) -> Dict[str, Any]:
+        """Load metadata for a (path, fingerprint) key and offer it to the memory tier."""
+        metadata = self._load_metadata(*key)
+        self.memory_cache.put(key, metadata)
+        return metadata
+
     def invalidate_cache(self, template_name: str = None):
         """
         Invalidate cache for a specific template or entire cache.
-        
+
         Args:
             template_name (str, optional): Name of template to invalidate
         """
+        # Drop queued writes and let any batch already being committed land
+        # before deleting, so stale entries cannot reappear afterwards
+        self.writer.discard(template_name)
+        self.writer.flush()
         if template_name:
-            cache_file = self._get_cache_path(template_name)
-            if os.path.exists(cache_file):
-                os.remove(cache_file)
+            self.store.delete(template_name)
         else:
-            # Clear entire cache directory
-            for file in os.listdir(self.cache_dir):
-                os.remove(os.path.join(self.cache_dir, file))
-        
+            self.store.clear()
+
         # Clear memory cache
-        self.memory_cache.cache_clear()
+        self.memory_cache.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Report cache effectiveness for both tiers.
+
+        Returns:
+            dict: Memory and persistent tier statistics
+        """
+        return {
+            'memory': self.memory_cache.stats(),
+            'persistent': self.store.stats(),
+            'writer': self.writer.stats()
+        }
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wait for queued persistent writes to be committed.
+
+        Args:
+            timeout (float, optional): Maximum seconds to wait
+
+        Returns:
+            bool: True if everything was written in time
+        """
+        return self.writer.flush(timeout)
+
+    def close(self):
+        """Flush queued writes and stop the background writer."""
+        self.writer.close()
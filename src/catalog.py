@@ -0,0 +1,561 @@
+import os
+import json
+import base64
+import bisect
+import hashlib
+import math
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional, Iterable, Tuple
+
+# Listing order: generated templates first, then markdown files, each by name
+KIND_ORDER = {'new': 0, 'markdown': 1}
+
+
+class BloomFilter:
+    """
+    Compact probabilistic set of template names.
+
+    ``in`` never returns a false negative, so a name it rejects is certainly
+    unknown and can be turned away without touching the filesystem.
+    """
+
+    def __init__(self, capacity: int, error_rate: float = 0.01):
+        """
+        Size the filter for an expected number of names.
+
+        Args:
+            capacity (int): Expected number of names
+            error_rate (float, optional): Target false-positive probability
+        """
+        capacity = max(capacity, 1)
+        self.size = max(int(-capacity * math.log(error_rate) / (math.log(2) ** 2)), 8)
+        self.hash_count = max(int(round(self.size / capacity * math.log(2))), 1)
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, name: str) -> Iterable[int]:
+        digest = hashlib.blake2b(name.encode('utf-8'), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hash_count))
+
+    def add(self, name: str):
+        """
+        Add a name to the filter.
+
+        Args:
+            name (str): Template name
+        """
+        for position in self._positions(name):
+            self._bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, name: str) -> bool:
+        bits = self._bits
+        return all(bits[position >> 3] & (1 << (position & 7)) for position in self._positions(name))
+
+
+class NegativeLookupCache:
+    """
+    Short-lived memory of names that did not resolve to a template.
+
+    Entries expire after ``ttl`` seconds and are ignored once the catalog
+    version changes, so a template created after a miss is found on the
+    next lookup.
+    """
+
+    def __init__(self, ttl: float = 5.0, max_entries: int = 10000):
+        """
+        Initialize the negative cache.
+
+        Args:
+            ttl (float, optional): Seconds a miss is remembered
+            max_entries (int, optional): Bound on remembered names; oldest are dropped first
+        """
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def contains(self, name: str, version: int) -> bool:
+        """
+        Check whether a name is known to be missing at a catalog version.
+
+        Args:
+            name (str): Requested template name
+            version (int): Current catalog version
+
+        Returns:
+            bool: True if the name recently failed to resolve
+        """
+        record = self._entries.get(name)
+        if record is None:
+            return False
+        expires_at, recorded_version = record
+        if recorded_version != version or expires_at < time.monotonic():
+            with self._lock:
+                self._entries.pop(name, None)
+            return False
+        return True
+
+    def add(self, name: str, version: int):
+        """
+        Remember that a name failed to resolve.
+
+        Args:
+            name (str): Requested template name
+            version (int): Catalog version the lookup ran against
+        """
+        with self._lock:
+            self._entries.pop(name, None)
+            self._entries[name] = (time.monotonic() + self.ttl, version)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        """Forget every remembered miss."""
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class CatalogEntry:
+    """
+    Snapshot of a single template known to the catalog.
+    """
+    __slots__ = ('name', 'kind', 'path', 'file_count', 'directory_count', 'mtime_ns')
+
+    def __init__(self, name: str, kind: str, path: str,
+                 file_count: int = 0, directory_count: int = 0, mtime_ns: int = 0):
+        """
+        Initialize a catalog entry
+
+        Args:
+            name (str): Directory or file name of the template
+            kind (str): 'new' for Templates_NEW directories, 'markdown' for Templates_Markdown files
+            path (str): Absolute path to the template
+            file_count (int, optional): Number of files directly inside the template
+            directory_count (int, optional): Number of subdirectories inside the template
+            mtime_ns (int, optional): Modification time recorded when the entry was scanned
+        """
+        self.name = name
+        self.kind = kind
+        self.path = path
+        self.file_count = file_count
+        self.directory_count = directory_count
+        self.mtime_ns = mtime_ns
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Convert entry to dictionary for serialization
+
+        Returns:
+            dict: Catalog entry dictionary
+        """
+        return {
+            'name': self.name,
+            'kind': self.kind,
+            'file_count': self.file_count,
+            'directory_count': self.directory_count
+        }
+
+
+class _CatalogState:
+    """
+    Immutable view of the catalog; replaced wholesale on every change so
+    readers never need a lock.
+    """
+    __slots__ = ('entries', 'new_templates', 'markdown_templates', 'ordered_keys', 'aliases',
+                 'reversed_names', 'etag', 'bloom')
+
+    def __init__(self, entries: Dict[str, CatalogEntry]):
+        self.entries = entries
+        self.new_templates = sorted(n for n, e in entries.items() if e.kind == 'new')
+        self.markdown_templates = sorted(n for n, e in entries.items() if e.kind == 'markdown')
+
+        # Sort keys for keyset pagination over the combined listing
+        self.ordered_keys = ([(KIND_ORDER['new'], name) for name in self.new_templates] +
+                             [(KIND_ORDER['markdown'], name) for name in self.markdown_templates])
+
+        # Alias table: generated templates are addressed both as
+        # "<id>_<name>" and as "<name>"; the first (sorted) owner wins.
+        self.aliases = {}
+        for name in self.new_templates:
+            prefix, sep, rest = name.partition('_')
+            if sep and rest and prefix.isdigit():
+                self.aliases.setdefault(rest, name)
+
+        # Reversed names turn arbitrary suffix lookups into a bisect prefix search
+        self.reversed_names = sorted(name[::-1] for name in self.new_templates)
+
+        # Exact names and aliases; anything it rejects cannot match either
+        self.bloom = BloomFilter(len(entries) + len(self.aliases))
+        for name in entries:
+            self.bloom.add(name)
+        for alias in self.aliases:
+            self.bloom.add(alias)
+
+        # Content-derived so every worker process agrees on it
+        digest = hashlib.sha1()
+        for _, name in self.ordered_keys:
+            entry = entries[name]
+            digest.update(f"{entry.kind}\0{name}\0{entry.file_count}\0{entry.directory_count}\n".encode('utf-8'))
+        self.etag = digest.hexdigest()
+
+
+class TemplateCatalog:
+    """
+    Process-wide in-memory index of the template directories.
+
+    The catalog is built once and kept current by polling the modification
+    time of the template roots; only added or removed entries are rescanned.
+    """
+
+    def __init__(self, templates_dir: str, markdown_dir: str, poll_interval: float = 2.0,
+                 negative_ttl: float = 5.0):
+        """
+        Initialize and build the template catalog.
+
+        Args:
+            templates_dir (str): Directory holding generated template folders
+            markdown_dir (str): Directory holding markdown template files
+            poll_interval (float, optional): Minimum seconds between root mtime checks
+            negative_ttl (float, optional): Seconds an unknown name is remembered as missing
+        """
+        self.templates_dir = templates_dir
+        self.markdown_dir = markdown_dir
+        self.poll_interval = poll_interval
+        self.version = 0
+        self.negative_cache = NegativeLookupCache(ttl=negative_ttl)
+        self.negative_hits = 0
+
+        self._lock = threading.Lock()
+        self._root_mtimes = (None, None)
+        self._last_check = 0.0
+        self._state = _CatalogState({})
+
+        self.rebuild()
+
+    @staticmethod
+    def _mtime_ns(path: str) -> Optional[int]:
+        try:
+            return os.stat(path).st_mtime_ns
+        except OSError:
+            return None
+
+    def _scan_template(self, name: str) -> Optional[CatalogEntry]:
+        """
+        Scan a single template directory and count its contents.
+
+        Args:
+            name (str): Template directory name
+
+        Returns:
+            CatalogEntry or None if the directory has vanished
+        """
+        path = os.path.join(self.templates_dir, name)
+        file_count = directory_count = 0
+        try:
+            mtime_ns = os.stat(path).st_mtime_ns
+            with os.scandir(path) as it:
+                for child in it:
+                    if child.is_dir():
+                        directory_count += 1
+                    elif child.is_file():
+                        file_count += 1
+        except OSError:
+            return None
+
+        return CatalogEntry(name, 'new', path, file_count, directory_count, mtime_ns)
+
+    def _list_roots(self):
+        """Return the current template directory names and markdown file names."""
+        new_names, markdown_names = set(), set()
+        try:
+            with os.scandir(self.templates_dir) as it:
+                new_names = {d.name for d in it if d.is_dir()}
+        except OSError:
+            pass
+        try:
+            with os.scandir(self.markdown_dir) as it:
+                markdown_names = {f.name for f in it if f.name.endswith('.md')}
+        except OSError:
+            pass
+        return new_names, markdown_names
+
+    def _sync(self, full: bool = False):
+        """
+        Bring the catalog in line with the filesystem.
+
+        Args:
+            full (bool, optional): Rescan every entry instead of only added ones
+        """
+        with self._lock:
+            root_mtimes = (self._mtime_ns(self.templates_dir), self._mtime_ns(self.markdown_dir))
+            new_names, markdown_names = self._list_roots()
+            current = self._state.entries
+
+            entries = {}
+            for name in new_names:
+                entry = current.get(name)
+                if full or entry is None or entry.kind != 'new':
+                    entry = self._scan_template(name)
+                if entry is not None:
+                    entries[name] = entry
+            for name in markdown_names:
+                entry = current.get(name)
+                if entry is None or entry.kind != 'markdown':
+                    entry = CatalogEntry(name, 'markdown', os.path.join(self.markdown_dir, name), 1, 0)
+                entries[name] = entry
+
+            if full or entries.keys() != current.keys():
+                self._state = _CatalogState(entries)
+                self.version += 1
+            self._root_mtimes = root_mtimes
+            self._last_check = time.monotonic()
+
+    def rebuild(self):
+        """Rescan both template roots from scratch."""
+        self._sync(full=True)
+
+    def ensure_fresh(self):
+        """
+        Re-sync the catalog if a template root changed since the last check.
+
+        Root mtimes are only inspected once per ``poll_interval``, so the
+        common request path costs a clock read.
+        """
+        if time.monotonic() - self._last_check < self.poll_interval:
+            return
+        root_mtimes = (self._mtime_ns(self.templates_dir), self._mtime_ns(self.markdown_dir))
+        if root_mtimes != self._root_mtimes:
+            self._sync()
+        else:
+            self._last_check = time.monotonic()
+
+    def refresh(self, name: str) -> Optional[CatalogEntry]:
+        """
+        Rescan one template directory, adding, updating or removing its entry.
+
+        Args:
+            name (str): Template directory name
+
+        Returns:
+            The refreshed CatalogEntry, or None if the template no longer exists
+        """
+        return self.refresh_many([name])[name]
+
+    def refresh_many(self, names: Iterable[str]) -> Dict[str, Optional[CatalogEntry]]:
+        """
+        Rescan several template directories and publish them as one catalog change.
+
+        Args:
+            names (iterable): Template directory names
+
+        Returns:
+            dict: Name to refreshed CatalogEntry, or None for templates that no longer exist
+        """
+        scanned = {name: self._scan_template(name) for name in names}
+        with self._lock:
+            entries = dict(self._state.entries)
+            changed = False
+            for name, entry in scanned.items():
+                if entry is None:
+                    changed |= entries.pop(name, None) is not None
+                else:
+                    entries[name] = entry
+                    changed = True
+            if changed:
+                self._state = _CatalogState(entries)
+                self.version += 1
+        return scanned
+
+    def _verified(self, entry: CatalogEntry) -> Optional[CatalogEntry]:
+        """Recount a template whose directory changed since it was scanned."""
+        if entry.kind != 'new' or self._mtime_ns(entry.path) == entry.mtime_ns:
+            return entry
+        return self.refresh(entry.name)
+
+    def _miss(self, name: str) -> None:
+        self.negative_cache.add(name, self.version)
+        return None
+
+    def _known_miss(self, name: str) -> bool:
+        if self.negative_cache.contains(name, self.version):
+            self.negative_hits += 1
+            return True
+        return False
+
+    def get(self, name: str) -> Optional[CatalogEntry]:
+        """
+        Look up a template by exact name.
+
+        Args:
+            name (str): Template directory or file name
+
+        Returns:
+            CatalogEntry or None
+        """
+        self.ensure_fresh()
+        if self._known_miss(name):
+            return None
+        state = self._state
+        entry = state.entries.get(name) if name in state.bloom else None
+        if entry is None:
+            return self._miss(name)
+        return self._verified(entry)
+
+    def resolve(self, template_name: str) -> Optional[CatalogEntry]:
+        """
+        Find the template a URL name refers to.
+
+        Tries an exact directory match, then the alias table, then an exact
+        markdown file name, then any directory whose name ends with
+        ``template_name``.
+
+        Args:
+            template_name (str): Name as requested by the client
+
+        Returns:
+            CatalogEntry or None
+        """
+        self.ensure_fresh()
+        if self._known_miss(template_name):
+            return None
+        state = self._state
+
+        entry = None
+        if template_name in state.bloom:
+            entry = state.entries.get(template_name)
+            if entry is None or entry.kind != 'new':
+                name = state.aliases.get(template_name)
+                entry = state.entries.get(name) if name else entry
+        if entry is None and template_name:
+            needle = template_name[::-1]
+            index = bisect.bisect_left(state.reversed_names, needle)
+            if index < len(state.reversed_names) and state.reversed_names[index].startswith(needle):
+                entry = state.entries.get(state.reversed_names[index][::-1])
+
+        if entry is None:
+            return self._miss(template_name)
+        return self._verified(entry)
+
+    @staticmethod
+    def encode_cursor(key: Tuple[int, str]) -> str:
+        """
+        Turn a listing sort key into an opaque cursor.
+
+        Args:
+            key (tuple): (kind order, name) of the last entry on a page
+
+        Returns:
+            str: URL-safe cursor string
+        """
+        raw = json.dumps(list(key), separators=(',', ':')).encode('utf-8')
+        return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+    @staticmethod
+    def decode_cursor(cursor: str) -> Tuple[int, str]:
+        """
+        Turn a cursor produced by encode_cursor back into a sort key.
+
+        Args:
+            cursor (str): Cursor from a previous page
+
+        Returns:
+            tuple: (kind order, name)
+
+        Raises:
+            ValueError: If the cursor is malformed
+        """
+        try:
+            raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+            rank, name = json.loads(raw.decode('utf-8'))
+        except (TypeError, ValueError, UnicodeDecodeError) as e:
+            raise ValueError(f"Invalid cursor: {cursor}") from e
+        if not isinstance(rank, int) or not isinstance(name, str):
+            raise ValueError(f"Invalid cursor: {cursor}")
+        return rank, name
+
+    def page(self, cursor: Optional[str] = None, limit: int = 100,
+             kind: Optional[str] = None) -> Tuple[List[CatalogEntry], Optional[str], int]:
+        """
+        Return one page of the listing in stable (kind, name) order.
+
+        Pages are keyed on the last entry seen rather than an offset, so
+        templates added or removed between requests never shift or repeat
+        entries on later pages.
+
+        Args:
+            cursor (str, optional): Cursor returned with the previous page
+            limit (int, optional): Maximum number of entries to return
+            kind (str, optional): Restrict the listing to 'new' or 'markdown'
+
+        Returns:
+            tuple: (entries, next cursor or None, total entries matching ``kind``)
+
+        Raises:
+            ValueError: If the cursor or kind is invalid
+        """
+        self.ensure_fresh()
+        keys = self._state.ordered_keys
+        entries = self._state.entries
+
+        start, end = 0, len(keys)
+        if kind is not None:
+            if kind not in KIND_ORDER:
+                raise ValueError(f"Unknown template kind: {kind}")
+            rank = KIND_ORDER[kind]
+            start = bisect.bisect_left(keys, (rank, ''))
+            end = bisect.bisect_left(keys, (rank + 1, ''))
+        total = end - start
+
+        if cursor:
+            start = max(start, bisect.bisect_right(keys, self.decode_cursor(cursor)))
+        stop = min(start + max(limit, 0), end)
+
+        page = [entries[name] for _, name in keys[start:stop]]
+        next_cursor = self.encode_cursor(keys[stop - 1]) if page and stop < end else None
+        return page, next_cursor, total
+
+    def entries(self, kind: Optional[str] = None) -> List[CatalogEntry]:
+        """
+        Snapshot of the catalog entries.
+
+        Args:
+            kind (str, optional): Restrict to 'new' or 'markdown' entries
+
+        Returns:
+            list: Catalog entries in listing order
+        """
+        self.ensure_fresh()
+        state = self._state
+        return [state.entries[name] for _, name in state.ordered_keys
+                if kind is None or state.entries[name].kind == kind]
+
+    @property
+    def new_templates(self) -> List[str]:
+        """Sorted names of template directories in Templates_NEW."""
+        self.ensure_fresh()
+        return self._state.new_templates
+
+    @property
+    def markdown_templates(self) -> List[str]:
+        """Sorted names of markdown files in Templates_Markdown."""
+        self.ensure_fresh()
+        return self._state.markdown_templates
+
+    @property
+    def etag(self) -> str:
+        """Strong validator for the current template listing."""
+        self.ensure_fresh()
+        return self._state.etag
+
+    def __len__(self) -> int:
+        return len(self._state.entries)
+
+    def __contains__(self, name: str) -> bool:
+        self.ensure_fresh()
+        return name in self._state.entries
@@ -1,6 +1,9 @@
 import logging
-from typing import Dict, Any
-from flask import jsonify, Request
+import threading
+import time
+from typing import Dict, Any, Optional, Tuple
+from flask import jsonify, Request, Response
+from werkzeug.exceptions import HTTPException
 import json
 
 class KnowledgeLibraryError(Exception):
@@ -22,6 +25,120 @@ class ValidationError(Exception):
         # For demonstration purposes, it's left empty
         return {}
 
+class ErrorLogLimiter:
+    """
+    Rate-limit error logging per error class and status code.
+
+    Each (class, status) key may log ``max_per_window`` times per
+    ``window`` seconds. Further occurrences are only counted, and the
+    next message logged for that key reports how many were suppressed, so
+    a client hammering bad URLs costs a dictionary update per request
+    instead of a log line. Only 5xx errors are logged with a traceback.
+    """
+
+    def __init__(self, max_per_window: int = 10, window: float = 60.0):
+        """
+        Initialize the limiter.
+
+        Args:
+            max_per_window (int, optional): Messages logged per key and window
+            window (float, optional): Window length in seconds
+        """
+        self.max_per_window = max_per_window
+        self.window = window
+        self._lock = threading.Lock()
+        # key -> [window start, logged in window, suppressed since last logged]
+        self._keys: Dict[Tuple[str, int], list] = {}
+
+    def acquire(self, key: Tuple[str, int]) -> Optional[int]:
+        """
+        Decide whether an occurrence of ``key`` may be logged.
+
+        Args:
+            key (tuple): (error class name, status code)
+
+        Returns:
+            None if the occurrence is suppressed, otherwise the number of
+            occurrences suppressed since the key was last logged
+        """
+        now = time.monotonic()
+        with self._lock:
+            state = self._keys.get(key)
+            if state is None:
+                state = self._keys[key] = [now, 0, 0]
+            elif now - state[0] >= self.window:
+                state[0], state[1] = now, 0
+            if state[1] >= self.max_per_window:
+                state[2] += 1
+                return None
+            state[1] += 1
+            suppressed, state[2] = state[2], 0
+            return suppressed
+
+    def log(self, logger: logging.Logger, error: BaseException, status_code: int, message: str) -> bool:
+        """
+        Log an error unless its key is over the limit.
+
+        5xx errors are logged at ERROR level with a traceback, 4xx errors at
+        INFO level without one.
+
+        Args:
+            logger (logging.Logger): Logger to write to
+            error (BaseException): The error
+            status_code (int): HTTP status returned for it
+            message (str): Log message
+
+        Returns:
+            bool: True if the message was logged
+        """
+        suppressed = self.acquire((type(error).__name__, status_code))
+        if suppressed is None:
+            return False
+        if suppressed:
+            message = f"{message} ({suppressed} similar errors suppressed)"
+        if status_code >= 500:
+            logger.error(message, exc_info=(type(error), error, error.__traceback__))
+        else:
+            logger.info(message)
+        return True
+
+
+error_log_limiter = ErrorLogLimiter()
+
+# Response bodies for HTTP errors raised with their default description, serialised once
+_HTTP_ERROR_BODIES: Dict[int, bytes] = {}
+
+
+def _error_body(message: str, details: Dict[str, Any]) -> bytes:
+    return json.dumps({'error': {'message': message, 'details': details}}).encode('utf-8')
+
+
+def http_error_response(error: HTTPException) -> Response:
+    """
+    Build the JSON response for an HTTPException, keeping headers such as Allow or Retry-After.
+
+    Bodies of errors raised with their class's default description are
+    serialised once and reused.
+
+    Args:
+        error (HTTPException): The HTTP error
+
+    Returns:
+        Response: JSON error response
+    """
+    if error.description == type(error).description:
+        body = _HTTP_ERROR_BODIES.get(error.code)
+        if body is None:
+            body = _HTTP_ERROR_BODIES[error.code] = _error_body(error.description, {})
+    else:
+        body = _error_body(error.description, {})
+    response = Response(body, status=error.code, mimetype='application/json')
+    for name, value in error.get_headers():
+        if name.lower() != 'content-type':
+            response.headers[name] = value
+    return response
+
+
 def handle_error(error: Exception) -> Dict[str, Any]:
     """
     Centralized error handling with comprehensive error mapping.
@@ -65,8 +182,9 @@ def handle_error(error: Exception) -> Dict[str, Any]:
             }
         }
     
-    # Log the error for server-side tracking
-    logging.error(f"Error Handling: {error_info}")
+    # Log the error for server-side tracking, rate-limited per error class
+    error_log_limiter.log(logging.getLogger(__name__), error, error_info['status_code'],
+                          f"Error Handling: {error_info}")
     
     return error_info
 
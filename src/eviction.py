@@ -0,0 +1,276 @@
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+# Byte translation table halving every counter in one C-level pass
+_HALVE = bytes(value >> 1 for value in range(256))
+
+
+class FrequencySketch:
+    """
+    Count-min sketch of recent access frequencies with periodic aging.
+
+    Counters saturate at 15 and are halved once ``sample_size`` increments
+    have been recorded, so the sketch tracks recent popularity rather than
+    all-time totals.
+    """
+
+    DEPTH = 4
+    SEEDS = (0x9E3779B97F4A7C15, 0xC2B2AE3D27D4EB4F, 0x165667B19E3779F9, 0x27D4EB2F165667C5)
+
+    def __init__(self, capacity: int):
+        """
+        Size the sketch for a cache of ``capacity`` entries.
+
+        Args:
+            capacity (int): Number of entries the owning cache holds
+        """
+        width = 1
+        while width < max(capacity, 16):
+            width <<= 1
+        self.mask = width - 1
+        self.sample_size = 10 * max(capacity, 16)
+        self.additions = 0
+        self._rows = [bytearray(width) for _ in range(self.DEPTH)]
+
+    def _indexes(self, key: Hashable):
+        h = hash(key)
+        return [((h ^ seed) * seed >> 17) & self.mask for seed in self.SEEDS]
+
+    def increment(self, key: Hashable):
+        """
+        Record one access to a key.
+
+        Args:
+            key (Hashable): Cache key
+        """
+        for row, index in zip(self._rows, self._indexes(key)):
+            if row[index] < 15:
+                row[index] += 1
+        self.additions += 1
+        if self.additions >= self.sample_size:
+            self._age()
+
+    def frequency(self, key: Hashable) -> int:
+        """
+        Estimate how often a key was accessed recently.
+
+        Args:
+            key (Hashable): Cache key
+
+        Returns:
+            int: Estimated access count (0-15)
+        """
+        return min(row[index] for row, index in zip(self._rows, self._indexes(key)))
+
+    def _age(self):
+        for row in self._rows:
+            row[:] = row.translate(_HALVE)
+        self.additions //= 2
+
+
+class LRUCache:
+    """
+    Bounded mapping that evicts the least recently used entry.
+    """
+
+    def __init__(self, max_size: int):
+        """
+        Initialize the cache.
+
+        Args:
+            max_size (int): Maximum number of entries
+        """
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """
+        Fetch a value and mark it recently used.
+
+        Args:
+            key (Hashable): Cache key
+
+        Returns:
+            The cached value, or None on a miss
+        """
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: Hashable, value: Any):
+        """
+        Store a value, evicting the least recently used entry if full.
+
+        Args:
+            key (Hashable): Cache key
+            value (Any): Value to cache; None is not cacheable
+        """
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        """Remove every entry."""
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Report cache effectiveness.
+
+        Returns:
+            dict: Hit, miss and eviction counters plus size
+        """
+        return {
+            'policy': 'lru',
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'size': len(self._entries),
+            'max_size': self.max_size
+        }
+
+
+class WTinyLFUCache(LRUCache):
+    """
+    Scan-resistant bounded mapping using the W-TinyLFU policy.
+
+    New entries land in a small LRU admission window. Entries leaving the
+    window compete with the main region's eviction victim, and only the one
+    with the higher sketch frequency stays. The main region is a segmented
+    LRU: probation for entries seen once since admission, protected for
+    entries hit again. A one-off sweep over many keys therefore cycles
+    through the window without displacing the hot set.
+    """
+
+    def __init__(self, max_size: int, window_ratio: float = 0.01, protected_ratio: float = 0.8):
+        """
+        Initialize the cache.
+
+        Args:
+            max_size (int): Maximum number of entries
+            window_ratio (float, optional): Share of capacity given to the admission window
+            protected_ratio (float, optional): Share of the main region reserved for protected entries
+        """
+        super().__init__(max_size)
+        self.window_size = max(1, int(max_size * window_ratio))
+        main_size = max(max_size - self.window_size, 1)
+        self.protected_size = max(1, int(main_size * protected_ratio))
+        self.main_size = main_size
+
+        self.sketch = FrequencySketch(max_size)
+        self._window = OrderedDict()
+        self._probation = OrderedDict()
+        self._protected = OrderedDict()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            self.sketch.increment(key)
+            if key in self._window:
+                self._window.move_to_end(key)
+                value = self._window[key]
+            elif key in self._protected:
+                self._protected.move_to_end(key)
+                value = self._protected[key]
+            elif key in self._probation:
+                value = self._probation.pop(key)
+                self._promote(key, value)
+            else:
+                self.misses += 1
+                return None
+            self.hits += 1
+            return value
+
+    def _promote(self, key: Hashable, value: Any):
+        """Move a re-accessed probation entry to protected, demoting its LRU if full."""
+        self._protected[key] = value
+        if len(self._protected) > self.protected_size:
+            demoted_key, demoted_value = self._protected.popitem(last=False)
+            self._probation[demoted_key] = demoted_value
+
+    def put(self, key: Hashable, value: Any):
+        with self._lock:
+            for segment in (self._window, self._protected, self._probation):
+                if key in segment:
+                    segment[key] = value
+                    return
+
+            self._window[key] = value
+            if len(self._window) <= self.window_size:
+                return
+
+            candidate_key, candidate_value = self._window.popitem(last=False)
+            if len(self._probation) + len(self._protected) < self.main_size:
+                self._probation[candidate_key] = candidate_value
+                return
+
+            # Admission: the candidate only displaces a victim it is more popular than
+            victims = self._probation or self._protected
+            victim_key = next(iter(victims))
+            if self.sketch.frequency(candidate_key) > self.sketch.frequency(victim_key):
+                del victims[victim_key]
+                self._probation[candidate_key] = candidate_value
+            self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._window.clear()
+            self._probation.clear()
+            self._protected.clear()
+
+    def __len__(self) -> int:
+        return len(self._window) + len(self._probation) + len(self._protected)
+
+    def stats(self) -> Dict[str, Any]:
+        stats = super().stats()
+        stats.update({
+            'policy': 'tinylfu',
+            'size': len(self),
+            'window': len(self._window),
+            'probation': len(self._probation),
+            'protected': len(self._protected)
+        })
+        return stats
+
+
+# Eviction policies selectable for the in-process caches
+EVICTION_POLICIES = {
+    'lru': LRUCache,
+    'tinylfu': WTinyLFUCache,
+}
+
+
+def create_memory_cache(policy: str, max_size: int) -> LRUCache:
+    """
+    Build an in-process cache with the named eviction policy.
+
+    Args:
+        policy (str): Key of EVICTION_POLICIES
+        max_size (int): Maximum number of entries
+
+    Returns:
+        Cache instance exposing get/put/clear/stats
+
+    Raises:
+        ValueError: If the policy is unknown
+    """
+    try:
+        return EVICTION_POLICIES[policy](max_size)
+    except KeyError:
+        raise ValueError(f"Unknown eviction policy: {policy}") from None
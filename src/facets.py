@@ -0,0 +1,542 @@
+import os
+import json
+import bisect
+import threading
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .catalog import TemplateCatalog, CatalogEntry, KIND_ORDER
+from .eviction import LRUCache
+from .procutil import register_after_fork
+
+# Query parameter -> enriched metadata key
+FACETS = {
+    'category': 'category',
+    'difficulty': 'difficulty',
+    'tag': 'tags',
+    'type': 'template_type',
+}
+
+# Catalog changes applied to the bitmaps one at a time; larger batches rebuild them
+MAX_INCREMENTAL_CHANGES = 256
+
+
+def facet_values(block_metadata: Dict[str, Any]) -> Dict[str, List[str]]:
+    """
+    Extract facet values from enriched knowledge block metadata.
+
+    Args:
+        block_metadata (dict): Metadata as produced by MetadataEnricher.generate_facet_metadata or generate_folder_metadata
+
+    Returns:
+        dict: Facet name to list of values; missing facets are omitted
+    """
+    values = {}
+    for facet, key in FACETS.items():
+        raw = block_metadata.get(key)
+        if raw is None:
+            continue
+        items = raw if isinstance(raw, list) else [raw]
+        items = sorted({str(item) for item in items if item not in (None, '')})
+        if items:
+            values[facet] = items
+    return values
+
+
+if hasattr(int, 'bit_count'):
+    def bitmap_count(bitmap: int) -> int:
+        """Number of set bits in ``bitmap``."""
+        return bitmap.bit_count()
+else:
+    def bitmap_count(bitmap: int) -> int:
+        """Number of set bits in ``bitmap``; int.bit_count() needs Python 3.10."""
+        return bin(bitmap).count('1')
+
+
+def bitmap_from_ids(ids: List[int]) -> int:
+    """Bitmap with the bits of the ascending positions ``ids`` set."""
+    if not ids:
+        return 0
+    # One bytes conversion instead of a big-int OR per id
+    data = bytearray(ids[-1] // 8 + 1)
+    for doc_id in ids:
+        data[doc_id >> 3] |= 1 << (doc_id & 7)
+    return int.from_bytes(data, 'little')
+
+
+def bitmap_ids(bitmap: int, start: int = 0, limit: Optional[int] = None) -> List[int]:
+    """Positions of the set bits in ``bitmap`` at or after ``start``, lowest first."""
+    ids = []
+    remaining = bitmap >> start
+    if not remaining:
+        return ids
+    # One bytes conversion instead of a big-int shift per set bit
+    data = remaining.to_bytes((remaining.bit_length() + 7) // 8, 'little')
+    for byte_index, byte in enumerate(data):
+        while byte:
+            lowest = byte & -byte
+            ids.append(start + byte_index * 8 + lowest.bit_length() - 1)
+            if limit is not None and len(ids) >= limit:
+                return ids
+            byte ^= lowest
+    return ids
+
+
+class FacetIndex:
+    """
+    Bitmap index from facet values to templates.
+
+    Documents are numbered by their position in the sorted name list, which
+    matches the catalog's listing order, so a filtered bitmap can be paged
+    through without sorting. Each posting is a Python int used as a bitset;
+    on disk postings are stored as sorted integer arrays. An index is never
+    modified once built; updated() returns a new one.
+    """
+
+    def __init__(self, documents: Dict[str, Dict[str, List[str]]]):
+        """
+        Build the index.
+
+        Args:
+            documents (dict): Template name to its facet values
+        """
+        self.names = sorted(documents)
+        self.all = (1 << len(self.names)) - 1
+        self._documents = documents
+        ids = {facet: {} for facet in FACETS}
+        for doc_id, name in enumerate(self.names):
+            for facet, values in documents[name].items():
+                postings = ids.setdefault(facet, {})
+                for value in values:
+                    postings.setdefault(value, []).append(doc_id)
+        self._bitmaps = {facet: {value: bitmap_from_ids(doc_ids) for value, doc_ids in postings.items()}
+                         for facet, postings in ids.items()}
+        self._totals = {facet: {value: len(doc_ids) for value, doc_ids in postings.items()}
+                        for facet, postings in ids.items()}
+
+    def updated(self, changes: Dict[str, Optional[Dict[str, List[str]]]]) -> 'FacetIndex':
+        """
+        Return a copy of the index with some templates added, changed or removed.
+
+        Each change shifts the postings above the template's position, so
+        the cost grows with the number of postings rather than documents.
+
+        Args:
+            changes (dict): Template name to its new facet values, or None to remove it
+
+        Returns:
+            FacetIndex
+        """
+        index = FacetIndex.__new__(FacetIndex)
+        index.names = list(self.names)
+        index._documents = dict(self._documents)
+        index._bitmaps = {facet: dict(postings) for facet, postings in self._bitmaps.items()}
+        index._totals = {facet: dict(totals) for facet, totals in self._totals.items()}
+
+        for name in sorted(changes, reverse=True):
+            values = index._documents.pop(name, None)
+            if values is None:
+                continue
+            position = bisect.bisect_left(index.names, name)
+            del index.names[position]
+            for facet, facet_values in values.items():
+                for value in facet_values:
+                    index._totals[facet][value] -= 1
+            index._shift(position, -1)
+
+        for name, values in sorted(changes.items()):
+            if values is None:
+                continue
+            position = bisect.bisect_left(index.names, name)
+            index.names.insert(position, name)
+            index._documents[name] = values
+            index._shift(position, 1)
+            bit = 1 << position
+            for facet, facet_values in values.items():
+                postings = index._bitmaps.setdefault(facet, {})
+                totals = index._totals.setdefault(facet, {})
+                for value in facet_values:
+                    postings[value] = postings.get(value, 0) | bit
+                    totals[value] = totals.get(value, 0) + 1
+
+        for facet, totals in index._totals.items():
+            for value in [value for value, total in totals.items() if not total]:
+                del totals[value]
+                del index._bitmaps[facet][value]
+        index.all = (1 << len(index.names)) - 1
+        return index
+
+    def _shift(self, position: int, delta: int):
+        """Open a slot at ``position`` in every posting (``delta`` 1) or close it (``delta`` -1)."""
+        low = (1 << position) - 1
+        for postings in self._bitmaps.values():
+            for value, posting in postings.items():
+                if posting.bit_length() > position:
+                    if delta > 0:
+                        postings[value] = (posting & low) | ((posting >> position) << (position + 1))
+                    else:
+                        postings[value] = (posting & low) | ((posting >> (position + 1)) << position)
+
+    @classmethod
+    def from_blocks(cls, blocks: Dict[str, Dict[str, Any]]) -> 'FacetIndex':
+        """
+        Build an index from the ``knowledge_blocks`` of library_metadata.json.
+
+        Args:
+            blocks (dict): Block name to enriched metadata
+
+        Returns:
+            FacetIndex
+        """
+        return cls({name: facet_values(metadata) for name, metadata in blocks.items()})
+
+    def document(self, name: str) -> Optional[Dict[str, List[str]]]:
+        """
+        Facet values recorded for one template.
+
+        Args:
+            name (str): Template name
+
+        Returns:
+            dict or None if the template is not indexed
+        """
+        return self._documents.get(name)
+
+    def match(self, filters: Dict[str, List[str]]) -> int:
+        """
+        Select templates matching every facet filter.
+
+        Values given for the same facet are alternatives; different facets
+        must all match.
+
+        Args:
+            filters (dict): Facet name to accepted values
+
+        Returns:
+            int: Bitmap of matching document ids
+        """
+        result = self.all
+        for facet, values in filters.items():
+            postings = self._bitmaps.get(facet, {})
+            accepted = 0
+            for value in values:
+                accepted |= postings.get(value, 0)
+            result &= accepted
+            if not result:
+                break
+        return result
+
+    def counts(self, bitmap: int) -> Dict[str, Dict[str, int]]:
+        """
+        Count matches per facet value within a result set.
+
+        Args:
+            bitmap (int): Result set from match()
+
+        Returns:
+            dict: Facet name to {value: count}, omitting zero counts
+        """
+        if bitmap == self.all:
+            tallies = self._totals
+        elif bitmap_count(bitmap) <= sum(len(postings) for postings in self._bitmaps.values()):
+            # Few matches: tally their values instead of intersecting every posting
+            tallies = {facet: {} for facet in self._bitmaps}
+            for doc_id in bitmap_ids(bitmap):
+                for facet, values in self._documents[self.names[doc_id]].items():
+                    facet_counts = tallies[facet]
+                    for value in values:
+                        facet_counts[value] = facet_counts.get(value, 0) + 1
+        else:
+            tallies = {facet: {value: bitmap_count(posting & bitmap) for value, posting in postings.items()}
+                       for facet, postings in self._bitmaps.items()}
+        return {facet: dict(sorted(((value, count) for value, count in facet_counts.items() if count),
+                                   key=lambda item: (-item[1], item[0])))
+                for facet, facet_counts in tallies.items()}
+
+    def slice(self, bitmap: int, after: Optional[str] = None, limit: int = 100) -> Tuple[List[str], bool]:
+        """
+        Return matching names in listing order.
+
+        Args:
+            bitmap (int): Result set from match()
+            after (str, optional): Only return names sorting after this one
+            limit (int, optional): Maximum number of names
+
+        Returns:
+            tuple: (names, whether more matches follow)
+        """
+        start = bisect.bisect_right(self.names, after) if after is not None else 0
+        ids = bitmap_ids(bitmap, start, limit + 1)
+        return [self.names[doc_id] for doc_id in ids[:limit]], len(ids) > limit
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Convert the index to its on-disk form.
+
+        Returns:
+            dict: Document names and sorted document-id arrays per facet value
+        """
+        return {
+            'documents': self.names,
+            'postings': {
+                facet: {value: bitmap_ids(posting) for value, posting in sorted(postings.items())}
+                for facet, postings in self._bitmaps.items()
+            }
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'FacetIndex':
+        """
+        Rebuild an index saved with to_dict().
+
+        Args:
+            data (dict): On-disk index
+
+        Returns:
+            FacetIndex
+        """
+        names = data.get('documents', [])
+        documents = {name: {} for name in names}
+        for facet, postings in data.get('postings', {}).items():
+            for value, doc_ids in postings.items():
+                for doc_id in doc_ids:
+                    documents[names[doc_id]].setdefault(facet, []).append(value)
+        return cls(documents)
+
+    def save(self, path: str):
+        """
+        Atomically write the index as JSON.
+
+        Args:
+            path (str): Destination file
+        """
+        temp_path = f"{path}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, separators=(',', ':'))
+        os.replace(temp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> Optional['FacetIndex']:
+        """
+        Read an index written by save().
+
+        Args:
+            path (str): Index file
+
+        Returns:
+            FacetIndex or None if the file is missing or unreadable
+        """
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return cls.from_dict(json.load(f))
+        except (OSError, ValueError, KeyError, IndexError):
+            return None
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+
+class CatalogFacets:
+    """
+    Facet index kept in step with a TemplateCatalog.
+
+    Facet values are remembered per template along with the mtimes of its
+    directory and README.md. When the catalog changes, templates that were
+    added or whose directory changed are described again and applied to
+    the current bitmaps. An in-place README edit does not touch the
+    directory, so a background thread compares README mtimes every
+    ``resync_interval`` seconds. A saved index file seeds the first build
+    for templates not modified since it was written.
+    """
+
+    def __init__(self, catalog: TemplateCatalog, describe: Callable[[CatalogEntry], Dict[str, List[str]]],
+                 index_path: Optional[str] = None, counts_cache_size: int = 256,
+                 resync_interval: float = 300.0):
+        """
+        Initialize the catalog facets.
+
+        Args:
+            catalog (TemplateCatalog): Catalog supplying the templates
+            describe (callable): Returns facet values for a catalog entry
+            index_path (str, optional): Saved FacetIndex used to seed the first build
+            counts_cache_size (int, optional): Number of facet count results kept in memory
+            resync_interval (float, optional): Seconds between README mtime checks
+        """
+        self.catalog = catalog
+        self.describe = describe
+        self.index_path = index_path
+        self._lock = threading.Lock()
+        self._known = {}
+        self._index = None
+        self._version = None
+        self._counts = LRUCache(counts_cache_size)
+        self.resync_interval = resync_interval
+        self._reset_resync_thread()
+        register_after_fork(self, '_reset_resync_thread')
+
+    def _reset_resync_thread(self):
+        """Forget the resync thread; it does not survive a fork."""
+        self._resync_thread = None
+        self._stop = threading.Event()
+
+    def _start_resync_thread(self):
+        with self._lock:
+            if self._resync_thread is not None:
+                return
+            self._resync_thread = threading.Thread(target=self._resync_loop, name='facets-resync', daemon=True)
+        self._resync_thread.start()
+
+    def _resync_loop(self):
+        while not self._stop.wait(self.resync_interval):
+            self.resync()
+
+    def stop(self):
+        """Stop the background resync thread."""
+        self._stop.set()
+
+    @staticmethod
+    def _stamp(entry: CatalogEntry) -> Tuple[int, int]:
+        try:
+            readme_mtime = os.stat(os.path.join(entry.path, 'README.md')).st_mtime_ns
+        except OSError:
+            readme_mtime = 0
+        return entry.mtime_ns, readme_mtime
+
+    def _values(self, entry: CatalogEntry, seed: Optional[FacetIndex], seed_mtime: int) -> Dict[str, List[str]]:
+        stamp = self._stamp(entry)
+        known = self._known.get(entry.name)
+        if known is not None and known[0] == stamp:
+            return known[1]
+        values = None
+        if seed is not None and known is None and max(stamp) <= seed_mtime:
+            values = seed.document(entry.name)
+        if values is None:
+            values = self.describe(entry)
+        self._known[entry.name] = (stamp, values)
+        return values
+
+    def _changes(self, check_readme: bool) -> Dict[str, Optional[Dict[str, List[str]]]]:
+        """
+        Describe templates that changed since they were last seen.
+
+        Args:
+            check_readme (bool): Also stat every README.md, not only templates whose directory changed
+
+        Returns:
+            dict: Template name to new facet values, or None for removed templates
+        """
+        changes = {}
+        seen = set()
+        for entry in self.catalog.entries('new'):
+            seen.add(entry.name)
+            known = self._known.get(entry.name)
+            if known is not None and known[0][0] == entry.mtime_ns and not check_readme:
+                continue
+            values = self._values(entry, None, 0)
+            if known is None or values != known[1]:
+                changes[entry.name] = values
+        for name in [name for name in self._known if name not in seen]:
+            del self._known[name]
+            changes[name] = None
+        return changes
+
+    def _apply(self, changes: Dict[str, Optional[Dict[str, List[str]]]]):
+        """Publish an index with ``changes`` applied; called with the lock held."""
+        if not changes:
+            return
+        if len(changes) > MAX_INCREMENTAL_CHANGES:
+            self._index = FacetIndex({name: values for name, (_, values) in self._known.items()})
+        else:
+            self._index = self._index.updated(changes)
+        self._counts.clear()
+
+    def resync(self):
+        """Pick up README edits the catalog does not report."""
+        with self._lock:
+            if self._index is None:
+                return
+            version = self.catalog.version
+            self._apply(self._changes(check_readme=True))
+            self._version = version
+
+    def index(self) -> FacetIndex:
+        """
+        Return the facet index for the current catalog, updating it if the catalog changed.
+
+        Returns:
+            FacetIndex
+        """
+        if self._resync_thread is None and self.resync_interval > 0:
+            self._start_resync_thread()
+        self.catalog.ensure_fresh()
+        if self._index is not None and self._version == self.catalog.version:
+            return self._index
+        with self._lock:
+            version = self.catalog.version
+            if self._index is not None and self._version == version:
+                return self._index
+            if self._index is not None:
+                self._apply(self._changes(check_readme=False))
+            else:
+                seed, seed_mtime = None, 0
+                if self.index_path:
+                    seed = FacetIndex.load(self.index_path)
+                    try:
+                        seed_mtime = os.stat(self.index_path).st_mtime_ns
+                    except OSError:
+                        seed = None
+                self._index = FacetIndex({entry.name: self._values(entry, seed, seed_mtime)
+                                          for entry in self.catalog.entries('new')})
+                self._counts.clear()
+            self._version = version
+            return self._index
+
+    def counts(self, filters: Dict[str, List[str]]) -> Dict[str, Dict[str, int]]:
+        """
+        Facet counts for the templates matching ``filters``.
+
+        Args:
+            filters (dict): Facet name to accepted values
+
+        Returns:
+            dict: Facet name to {value: count}
+        """
+        index = self.index()
+        key = (self._version, tuple(sorted((facet, tuple(values)) for facet, values in filters.items())))
+        counts = self._counts.get(key)
+        if counts is None:
+            counts = index.counts(index.match(filters))
+            self._counts.put(key, counts)
+        return counts
+
+    def page(self, filters: Dict[str, List[str]], cursor: Optional[str] = None,
+             limit: int = 100) -> Tuple[List[CatalogEntry], Optional[str], int]:
+        """
+        Return one page of templates matching ``filters`` in catalog listing order.
+
+        Args:
+            filters (dict): Facet name to accepted values
+            cursor (str, optional): Cursor returned with the previous page
+            limit (int, optional): Maximum number of entries to return
+
+        Returns:
+            tuple: (entries, next cursor or None, total matches)
+
+        Raises:
+            ValueError: If the cursor is invalid
+        """
+        index = self.index()
+        matches = index.match(filters)
+        after = None
+        if cursor:
+            rank, after = self.catalog.decode_cursor(cursor)
+            if rank > KIND_ORDER['new']:
+                return [], None, bitmap_count(matches)
+            if rank < KIND_ORDER['new']:
+                after = None
+
+        names, more = index.slice(matches, after, limit)
+        entries = [entry for entry in (self.catalog.get(name) for name in names) if entry is not None]
+        next_cursor = None
+        if more and names:
+            next_cursor = self.catalog.encode_cursor((KIND_ORDER['new'], names[-1]))
+        return entries, next_cursor, bitmap_count(matches)
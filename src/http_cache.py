@@ -0,0 +1,82 @@
+import hashlib
+from typing import Dict, Any, Optional
+from flask import request
+
+# Cache-Control policy per Flask endpoint; routes not listed get no header
+DEFAULT_CACHE_POLICIES = {
+    'list_templates': {'max_age': 30, 'stale_while_revalidate': 300},
+    'get_template_metadata': {'max_age': 60, 'stale_while_revalidate': 600},
+    'view_template': {'max_age': 60, 'stale_while_revalidate': 600},
+    'template_preview': {'max_age': 60, 'stale_while_revalidate': 600},
+    'search_templates': {'max_age': 30, 'stale_while_revalidate': 300},
+    'suggest_templates': {'max_age': 60, 'stale_while_revalidate': 600},
+}
+
+
+def build_cache_control(policy: Dict[str, Any]) -> str:
+    """
+    Render a policy entry as a Cache-Control header value.
+
+    Args:
+        policy (dict): Policy with optional 'private', 'max_age',
+            'stale_while_revalidate' and 'immutable' keys
+
+    Returns:
+        str: Cache-Control header value
+    """
+    directives = ['private' if policy.get('private') else 'public']
+    directives.append(f"max-age={int(policy.get('max_age', 0))}")
+    if policy.get('stale_while_revalidate'):
+        directives.append(f"stale-while-revalidate={int(policy['stale_while_revalidate'])}")
+    if policy.get('immutable'):
+        directives.append('immutable')
+    return ', '.join(directives)
+
+
+def compute_etag(payload: bytes) -> str:
+    """
+    Derive a strong ETag from a response body.
+
+    Args:
+        payload (bytes): Response body
+
+    Returns:
+        str: Unquoted ETag value
+    """
+    return hashlib.sha1(payload).hexdigest()
+
+
+def init_http_cache(app, policies: Optional[Dict[str, Dict[str, Any]]] = None):
+    """
+    Add strong ETags, conditional GET handling and Cache-Control headers.
+
+    Policies are merged from DEFAULT_CACHE_POLICIES, the app's
+    ``CACHE_CONTROL_POLICIES`` config and the ``policies`` argument, in
+    that order; a policy of ``None`` disables caching for the endpoint.
+
+    Args:
+        app (Flask): Flask application instance
+        policies (dict, optional): Endpoint name to policy overrides
+    """
+    merged = dict(DEFAULT_CACHE_POLICIES)
+    merged.update(app.config.get('CACHE_CONTROL_POLICIES') or {})
+    merged.update(policies or {})
+    header_values = {
+        endpoint: build_cache_control(policy)
+        for endpoint, policy in merged.items() if policy
+    }
+    app.config['CACHE_CONTROL_POLICIES'] = merged
+
+    @app.after_request
+    def apply_http_cache(response):
+        cache_control = header_values.get(request.endpoint)
+        if (cache_control is None
+                or request.method not in ('GET', 'HEAD')
+                or response.status_code != 200
+                or response.is_streamed):
+            return response
+
+        response.headers['Cache-Control'] = cache_control
+        if not response.get_etag()[0]:
+            response.set_etag(compute_etag(response.get_data()))
+        return response.make_conditional(request)
@@ -0,0 +1,235 @@
+import os
+import time
+import sqlite3
+import hashlib
+import threading
+from typing import Callable, Dict, Optional, Tuple, Any
+
+from .cache import SingleFlight
+from .procutil import register_after_fork
+
+# Longest Idempotency-Key header value accepted
+MAX_KEY_LENGTH = 255
+
+
+class IdempotencyError(Exception):
+    """A keyed request cannot be answered; ``status_code`` is the HTTP status to return."""
+
+    def __init__(self, message: str, status_code: int, retry_after: Optional[int] = None):
+        super().__init__(message)
+        self.message = message
+        self.status_code = status_code
+        # Seconds after which a retry may succeed, for a Retry-After header
+        self.retry_after = retry_after
+
+
+def request_fingerprint(body: bytes) -> str:
+    """
+    Identify a request body, so a reused key with a different body can be detected.
+
+    Args:
+        body (bytes): Raw request body
+
+    Returns:
+        str: Hex digest
+    """
+    return hashlib.sha256(body).hexdigest()
+
+
+class IdempotencyStore:
+    """
+    Responses recorded per idempotency key, shared by every server process.
+
+    A key is first reserved as 'pending' by the process that runs the
+    request, then completed with the response it produced. Completed
+    entries expire after ``ttl`` seconds; a pending entry older than
+    ``pending_timeout`` is assumed abandoned by a crashed process and may
+    be reserved again. Like SQLiteCacheStore it uses WAL mode and one
+    connection per thread.
+    """
+
+    def __init__(self, db_path: str, ttl: float = 86400.0, pending_timeout: float = 120.0):
+        """
+        Open (and create if needed) the idempotency database.
+
+        Args:
+            db_path (str): Path of the SQLite database file
+            ttl (float, optional): Seconds a completed response is replayed
+            pending_timeout (float, optional): Seconds after which a pending reservation is abandoned
+        """
+        self.db_path = db_path
+        self.ttl = ttl
+        self.pending_timeout = pending_timeout
+        self._local = threading.local()
+        register_after_fork(self, '_reset_after_fork')
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self._connection().executescript('''
+            CREATE TABLE IF NOT EXISTS idempotency (
+                key TEXT PRIMARY KEY,
+                fingerprint TEXT NOT NULL,
+                state TEXT NOT NULL,
+                status_code INTEGER,
+                body TEXT,
+                created_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_idempotency_created ON idempotency (created_at);
+        ''')
+
+    def _reset_after_fork(self):
+        """Drop connections inherited from the parent process."""
+        self._local = threading.local()
+
+    def _connection(self) -> sqlite3.Connection:
+        """Return this thread's connection, opening it on first use."""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def reserve(self, key: str, fingerprint: str) -> Optional[Dict[str, Any]]:
+        """
+        Reserve a key for this caller unless a live entry already holds it.
+
+        Args:
+            key (str): Idempotency key
+            fingerprint (str): Fingerprint of the request body
+
+        Returns:
+            None if the caller now holds the reservation, otherwise the
+            existing entry ('fingerprint', 'state', 'status_code', 'body')
+        """
+        now = time.time()
+        conn = self._connection()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            row = conn.execute('SELECT fingerprint, state, status_code, body, created_at FROM idempotency '
+                               'WHERE key = ?', (key,)).fetchone()
+            if row is not None:
+                fingerprint_held, state, status_code, body, created_at = row
+                expired = now - created_at >= (self.ttl if state == 'done' else self.pending_timeout)
+                if not expired:
+                    conn.execute('COMMIT')
+                    return {'fingerprint': fingerprint_held, 'state': state, 'status_code': status_code, 'body': body}
+            conn.execute(
+                "INSERT OR REPLACE INTO idempotency (key, fingerprint, state, created_at) VALUES (?, ?, 'pending', ?)",
+                (key, fingerprint, now)
+            )
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        return None
+
+    def complete(self, key: str, status_code: int, body: str):
+        """
+        Record the response for a reserved key.
+
+        Args:
+            key (str): Idempotency key
+            status_code (int): Response status
+            body (str): Response body
+        """
+        self._connection().execute(
+            "UPDATE idempotency SET state = 'done', status_code = ?, body = ?, created_at = ? WHERE key = ?",
+            (status_code, body, time.time(), key)
+        )
+
+    def release(self, key: str):
+        """
+        Drop a reservation so the request can be retried.
+
+        Args:
+            key (str): Idempotency key
+        """
+        self._connection().execute("DELETE FROM idempotency WHERE key = ? AND state = 'pending'", (key,))
+
+    def purge(self) -> int:
+        """
+        Delete expired entries.
+
+        Returns:
+            int: Number of entries removed
+        """
+        now = time.time()
+        return self._connection().execute(
+            "DELETE FROM idempotency WHERE (state = 'done' AND created_at < ?) OR (state = 'pending' AND created_at < ?)",
+            (now - self.ttl, now - self.pending_timeout)
+        ).rowcount
+
+
+class IdempotentExecutor:
+    """
+    Run each keyed request at most once and replay its response to retries.
+
+    Concurrent duplicates in one process share the in-flight call through
+    SingleFlight. A duplicate arriving at another process finds the pending
+    reservation and is rejected with 409 at once rather than waiting, so it
+    does not hold a request slot while the original runs. Responses with a
+    5xx status are not recorded, so a retry after a server error runs again.
+    """
+
+    def __init__(self, store: IdempotencyStore, retry_after: int = 1):
+        """
+        Initialize the executor.
+
+        Args:
+            store (IdempotencyStore): Shared response store
+            retry_after (int, optional): Seconds a duplicate of an in-flight request is told to wait before retrying
+        """
+        self.store = store
+        self.retry_after = retry_after
+        self._flight = SingleFlight()
+        self._last_purge = 0.0
+
+    def execute(self, key: str, fingerprint: str, fn: Callable[[], Tuple[int, str]]) -> Tuple[int, str, bool]:
+        """
+        Produce the response for a keyed request.
+
+        Args:
+            key (str): Idempotency key, already scoped to the endpoint
+            fingerprint (str): Fingerprint of the request body
+            fn (callable): Runs the request, returning (status code, body)
+
+        Returns:
+            tuple: (status code, body, whether the response is a replay)
+
+        Raises:
+            IdempotencyError: 422 if the key was used with a different body,
+                409 if the original request is still running elsewhere
+        """
+        if time.monotonic() - self._last_purge >= 3600:
+            self._last_purge = time.monotonic()
+            self.store.purge()
+        produced = []
+
+        def run():
+            produced.append(True)
+            return self._execute(key, fingerprint, fn)
+
+        status_code, body, replayed = self._flight.do((key, fingerprint), run)
+        # Callers that joined another caller's in-flight call get a response they did not produce
+        return status_code, body, replayed or not produced
+
+    def _execute(self, key: str, fingerprint: str, fn: Callable[[], Tuple[int, str]]) -> Tuple[int, str, bool]:
+        existing = self.store.reserve(key, fingerprint)
+        if existing is not None:
+            if existing['fingerprint'] != fingerprint:
+                raise IdempotencyError('Idempotency-Key was already used with a different request', 422)
+            if existing['state'] == 'done':
+                return existing['status_code'], existing['body'], True
+            raise IdempotencyError('A request with this Idempotency-Key is still in progress', 409,
+                                   retry_after=self.retry_after)
+
+        try:
+            status_code, body = fn()
+        except BaseException:
+            self.store.release(key)
+            raise
+        if status_code >= 500:
+            self.store.release(key)
+        else:
+            self.store.complete(key, status_code, body)
+        return status_code, body, False
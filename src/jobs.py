@@ -0,0 +1,484 @@
+import os
+import json
+import time
+import uuid
+import sqlite3
+import threading
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+from .procutil import process_alive, process_start, register_after_fork
+
+# Lifecycle of a job; the last two are final
+JOB_STATUSES = ('queued', 'running', 'succeeded', 'failed')
+
+
+class JobStore:
+    """
+    SQLite table of background jobs shared by every server process.
+
+    Like SQLiteCacheStore it runs in WAL mode with one connection per
+    thread, so gunicorn workers and the pool processes running the jobs can
+    all read and update it. Each job records the pid and start time of the
+    server process that owns it, so a reused pid is not mistaken for the
+    owner; jobs whose owner died are picked up again by JobQueue.recover().
+    """
+
+    def __init__(self, db_path: str):
+        """
+        Open (and create if needed) the job database.
+
+        Args:
+            db_path (str): Path of the SQLite database file
+        """
+        self.db_path = db_path
+        self._local = threading.local()
+        register_after_fork(self, '_reset_after_fork')
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self._connection().executescript('''
+            CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                kind TEXT NOT NULL,
+                params TEXT NOT NULL,
+                status TEXT NOT NULL,
+                stage TEXT NOT NULL,
+                result TEXT,
+                error TEXT,
+                owner INTEGER NOT NULL,
+                owner_started TEXT,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                created_at REAL NOT NULL,
+                started_at REAL,
+                finished_at REAL
+            );
+            CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status);
+            CREATE INDEX IF NOT EXISTS idx_jobs_finished ON jobs (finished_at);
+        ''')
+        columns = [row['name'] for row in self._connection().execute('PRAGMA table_info(jobs)')]
+        if 'owner_started' not in columns:
+            # Databases created before owners were identified by start time
+            self._connection().execute('ALTER TABLE jobs ADD COLUMN owner_started TEXT')
+
+    def _reset_after_fork(self):
+        """Drop connections inherited from the parent process."""
+        self._local = threading.local()
+
+    def _connection(self) -> sqlite3.Connection:
+        """Return this thread's connection, opening it on first use."""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def _to_dict(row: sqlite3.Row) -> Dict[str, Any]:
+        job = dict(row)
+        job['params'] = json.loads(job['params'])
+        job['result'] = json.loads(job['result']) if job['result'] is not None else None
+        return job
+
+    def create(self, kind: str, params: Dict[str, Any], owner: int,
+               owner_started: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Record a new queued job.
+
+        Args:
+            kind (str): Job kind, selecting the handler that runs it
+            params (dict): JSON-serializable handler arguments
+            owner (int): Process id of the server process dispatching it
+            owner_started (str, optional): Start time of that process, as read from /proc
+
+        Returns:
+            dict: The stored job
+        """
+        job_id = uuid.uuid4().hex
+        self._connection().execute(
+            'INSERT INTO jobs (id, kind, params, status, stage, owner, owner_started, created_at) '
+            "VALUES (?, ?, ?, 'queued', 'queued', ?, ?, ?)",
+            (job_id, kind, json.dumps(params), owner, owner_started, time.time())
+        )
+        return self.get(job_id)
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Fetch one job.
+
+        Args:
+            job_id (str): Job id
+
+        Returns:
+            dict or None if the job is unknown
+        """
+        row = self._connection().execute('SELECT * FROM jobs WHERE id = ?', (job_id,)).fetchone()
+        return self._to_dict(row) if row is not None else None
+
+    def start(self, job_id: str, stage: str = 'running'):
+        """
+        Mark a job as running; called from the pool process executing it.
+
+        Args:
+            job_id (str): Job id
+            stage (str, optional): Progress stage shown while it runs
+        """
+        self._connection().execute(
+            "UPDATE jobs SET status = 'running', stage = ?, started_at = ?, attempts = attempts + 1 WHERE id = ?",
+            (stage, time.time(), job_id)
+        )
+
+    def set_stage(self, job_id: str, stage: str):
+        """
+        Report progress of a running job.
+
+        Args:
+            job_id (str): Job id
+            stage (str): Short description of the current step
+        """
+        self._connection().execute('UPDATE jobs SET stage = ? WHERE id = ?', (stage, job_id))
+
+    def finish(self, job_id: str, status: str, result: Any = None, error: Optional[str] = None):
+        """
+        Record a job's outcome unless one was already recorded.
+
+        Args:
+            job_id (str): Job id
+            status (str): 'succeeded' or 'failed'
+            result (Any, optional): JSON-serializable result
+            error (str, optional): Failure description
+        """
+        self._connection().execute(
+            'UPDATE jobs SET status = ?, stage = ?, result = ?, error = ?, finished_at = ? '
+            "WHERE id = ? AND status NOT IN ('succeeded', 'failed')",
+            (status, status, json.dumps(result) if result is not None else None, error, time.time(), job_id)
+        )
+
+    def claim(self, job: Dict[str, Any], owner: int, owner_started: Optional[str] = None) -> bool:
+        """
+        Take over an unfinished job from a dead owner; only one claimant wins.
+
+        Args:
+            job (dict): Job as the caller found it, with its recorded owner
+            owner (int): Process id of the claiming server process
+            owner_started (str, optional): Start time of that process
+
+        Returns:
+            bool: True if this caller now owns the job
+        """
+        return self._connection().execute(
+            "UPDATE jobs SET owner = ?, owner_started = ?, status = 'queued', stage = 'requeued' "
+            "WHERE id = ? AND owner = ? AND owner_started IS ? AND status IN ('queued', 'running')",
+            (owner, owner_started, job['id'], job['owner'], job['owner_started'])
+        ).rowcount == 1
+
+    def unfinished(self) -> List[Dict[str, Any]]:
+        """
+        Jobs that are queued or running.
+
+        Returns:
+            list: Jobs, oldest first
+        """
+        rows = self._connection().execute(
+            "SELECT * FROM jobs WHERE status IN ('queued', 'running') ORDER BY created_at").fetchall()
+        return [self._to_dict(row) for row in rows]
+
+    def counts(self) -> Dict[str, int]:
+        """
+        Number of jobs per status.
+
+        Returns:
+            dict: Status to count, including zero counts
+        """
+        counts = dict.fromkeys(JOB_STATUSES, 0)
+        for status, count in self._connection().execute('SELECT status, COUNT(*) FROM jobs GROUP BY status'):
+            counts[status] = count
+        return counts
+
+    def purge(self, max_age: float) -> int:
+        """
+        Delete jobs that finished more than ``max_age`` seconds ago.
+
+        Args:
+            max_age (float): Seconds a finished job is kept
+
+        Returns:
+            int: Number of jobs removed
+        """
+        return self._connection().execute(
+            'DELETE FROM jobs WHERE finished_at < ?', (time.time() - max_age,)
+        ).rowcount
+
+    def recent_timings(self, limit: int = 200) -> List[Dict[str, float]]:
+        """
+        Queue wait and run time of the most recently finished jobs.
+
+        Args:
+            limit (int, optional): Number of jobs
+
+        Returns:
+            list: {'queued_seconds', 'run_seconds', 'total_seconds'} per job, newest first
+        """
+        rows = self._connection().execute(
+            'SELECT created_at, started_at, finished_at FROM jobs '
+            'WHERE finished_at IS NOT NULL AND started_at IS NOT NULL ORDER BY finished_at DESC LIMIT ?',
+            (limit,)
+        ).fetchall()
+        return [{
+            'queued_seconds': started - created,
+            'run_seconds': finished - started,
+            'total_seconds': finished - created
+        } for created, started, finished in rows]
+
+
+def run_generation_job(db_path: str, job_id: str, params: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Generate a template with tools/template_generator inside a pool process.
+
+    Args:
+        db_path (str): JobStore database
+        job_id (str): Job id
+        params (dict): 'template_type', 'directory_name' and 'output_dir'
+
+    Returns:
+        dict: Generated directory name and number of files written
+    """
+    store = JobStore(db_path)
+    store.start(job_id, stage='loading template types')
+    try:
+        from pathlib import Path
+        import tools.template_generator.types  # noqa: F401  registers the template types
+        from tools.template_generator import TemplateGenerator
+
+        store.set_stage(job_id, 'writing files')
+        generator = TemplateGenerator(output_dir=Path(params['output_dir']))
+        generated_path = generator.generate(params['template_type'], params['directory_name'])
+
+        store.set_stage(job_id, 'counting files')
+        files_written = sum(len(files) for _, _, files in os.walk(generated_path))
+        result = {'path': os.path.basename(str(generated_path)), 'files_written': files_written}
+    except Exception as e:
+        store.finish(job_id, 'failed', error=f"{type(e).__name__}: {e}")
+        raise
+    store.finish(job_id, 'succeeded', result=result)
+    return result
+
+
+def _percentile(values: List[float], fraction: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    return round(ordered[min(int(len(ordered) * fraction), len(ordered) - 1)], 3)
+
+
+class JobQueue:
+    """
+    Runs jobs on a local process pool and keeps their state in a JobStore.
+
+    The pool is created on first use in each server process, so a gunicorn
+    master importing the app with ``--preload`` never starts one. Pool
+    processes are spawned rather than forked because the server process is
+    multi-threaded. On first use, and then every ``recover_interval``
+    seconds from a background thread, the queue re-dispatches unfinished
+    jobs whose owning process is gone, so queued work survives worker
+    restarts; a job is abandoned after ``max_attempts`` starts. The same
+    passes delete jobs that finished more than ``finished_ttl`` seconds ago.
+    """
+
+    def __init__(self, store: JobStore, handlers: Dict[str, Callable[[str, str, Dict[str, Any]], Any]],
+                 max_workers: int = 2, max_attempts: int = 3,
+                 on_complete: Optional[Callable[[Dict[str, Any]], None]] = None,
+                 recover_interval: Optional[float] = 60.0, finished_ttl: Optional[float] = 7 * 86400.0):
+        """
+        Initialize the queue.
+
+        Args:
+            store (JobStore): Job persistence
+            handlers (dict): Job kind to a picklable function called with
+                (database path, job id, params) in a pool process
+            max_workers (int, optional): Pool processes per server process
+            max_attempts (int, optional): Starts allowed before a recovered job is abandoned
+            on_complete (callable, optional): Called with the finished job in the server process
+            recover_interval (float, optional): Seconds between recovery passes after the first; None disables
+            finished_ttl (float, optional): Seconds finished jobs stay queryable; None keeps them forever
+        """
+        self.store = store
+        self.handlers = handlers
+        self.max_workers = max_workers
+        self.max_attempts = max_attempts
+        self.on_complete = on_complete
+        self.recover_interval = recover_interval
+        self.finished_ttl = finished_ttl
+        self._reset_after_fork()
+        register_after_fork(self, '_reset_after_fork')
+
+    def _reset_after_fork(self):
+        """Forget the parent's pool, in-flight jobs and recovery thread."""
+        self._lock = threading.Lock()
+        self._executor = None
+        self._in_flight = set()
+        self._recovery_thread = None
+        self._stop = threading.Event()
+        self._pid = os.getpid()
+        self._started = process_start(self._pid)
+
+    def _pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers,
+                                                     mp_context=multiprocessing.get_context('spawn'))
+            return self._executor
+
+    def _dispatch(self, job: Dict[str, Any]):
+        """Hand a job the caller has already added to ``_in_flight`` to the pool."""
+        future = self._pool().submit(self.handlers[job['kind']], self.store.db_path, job['id'], job['params'])
+        future.add_done_callback(lambda done: self._completed(job['id'], done))
+
+    def _completed(self, job_id: str, future):
+        error = future.exception() if not future.cancelled() else None
+        if error is not None:
+            # The handler records its own failures; this covers crashed pool processes
+            self.store.finish(job_id, 'failed', error=f"{type(error).__name__}: {error}")
+        # Only now may recover() treat an unfinished record as orphaned
+        with self._lock:
+            self._in_flight.discard(job_id)
+        job = self.store.get(job_id)
+        if self.on_complete is not None and job is not None and job['status'] in ('succeeded', 'failed'):
+            self.on_complete(job)
+
+    def recover(self) -> int:
+        """
+        Re-dispatch unfinished jobs whose owner process is no longer running.
+
+        Returns:
+            int: Number of jobs taken over
+        """
+        claimed = []
+        # Under the lock, so a job submitted meanwhile is either in flight
+        # already or not in the store yet, and never looks orphaned
+        with self._lock:
+            for job in self.store.unfinished():
+                if job['owner'] == self._pid:
+                    # Ours, unless an earlier process with the same pid recorded it
+                    orphaned = job['owner_started'] != self._started or job['id'] not in self._in_flight
+                else:
+                    orphaned = not process_alive(job['owner'], job['owner_started'])
+                if not orphaned or not self.store.claim(job, self._pid, self._started):
+                    continue
+                if job['attempts'] >= self.max_attempts:
+                    self.store.finish(job['id'], 'failed', error=f"Abandoned after {job['attempts']} attempts")
+                    continue
+                self._in_flight.add(job['id'])
+                claimed.append(job)
+        for job in claimed:
+            self._dispatch(job)
+        return len(claimed)
+
+    def _ensure_started(self):
+        if self._recovery_thread is not None:
+            return
+        with self._lock:
+            if self._recovery_thread is not None:
+                return
+            self._recovery_thread = threading.Thread(target=self._recovery_loop, name='job-recovery', daemon=True)
+        self._recovery_thread.start()
+        self.recover()
+        self.purge()
+
+    def _recovery_loop(self):
+        while self.recover_interval and not self._stop.wait(self.recover_interval):
+            try:
+                self.recover()
+                self.purge()
+            except Exception as e:
+                logging.getLogger(__name__).error(f"Job recovery failed: {e}")
+
+    def purge(self) -> int:
+        """
+        Delete finished jobs older than ``finished_ttl``.
+
+        Returns:
+            int: Number of jobs removed
+        """
+        return self.store.purge(self.finished_ttl) if self.finished_ttl is not None else 0
+
+    def submit(self, kind: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Persist a job and hand it to the pool.
+
+        Args:
+            kind (str): Key of ``handlers``
+            params (dict): JSON-serializable handler arguments
+
+        Returns:
+            dict: The queued job
+
+        Raises:
+            ValueError: If there is no handler for ``kind``
+        """
+        if kind not in self.handlers:
+            raise ValueError(f"Unknown job kind: {kind}")
+        self._ensure_started()
+        with self._lock:
+            job = self.store.create(kind, params, self._pid, self._started)
+            self._in_flight.add(job['id'])
+        self._dispatch(job)
+        return job
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Look up a job, with its queue and run times so far.
+
+        Args:
+            job_id (str): Job id
+
+        Returns:
+            dict or None if the job is unknown
+        """
+        self._ensure_started()
+        job = self.store.get(job_id)
+        if job is None:
+            return None
+        now = time.time()
+        started, finished = job['started_at'], job['finished_at']
+        job['queued_seconds'] = round((started or now) - job['created_at'], 3)
+        job['run_seconds'] = round((finished or now) - started, 3) if started else None
+        return job
+
+    def metrics(self) -> Dict[str, Any]:
+        """
+        Queue depth and latency of recent jobs.
+
+        Returns:
+            dict: Jobs per status across all processes, this process's
+            in-flight count, and percentiles of recent queue/run/total times
+        """
+        timings = self.store.recent_timings()
+        latency = {}
+        for measure in ('queued_seconds', 'run_seconds', 'total_seconds'):
+            values = [timing[measure] for timing in timings]
+            latency[measure] = {'p50': _percentile(values, 0.5), 'p95': _percentile(values, 0.95),
+                                'max': _percentile(values, 1.0)}
+        counts = self.store.counts()
+        return {
+            'queue_depth': counts['queued'],
+            'jobs': counts,
+            'in_flight': len(self._in_flight),
+            'workers': self.max_workers,
+            'latency': latency,
+            'latency_sample': len(timings)
+        }
+
+    def shutdown(self):
+        """
+        Stop the pool without waiting; jobs that never started stay queued
+        in the store and are recovered by another process.
+        """
+        self._stop.set()
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
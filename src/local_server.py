@@ -1,27 +1,76 @@
 import os
 import json
+import atexit
+import hashlib
 import logging
 from logging.handlers import RotatingFileHandler
-import markdown2
-from flask import Flask, render_template, jsonify, send_from_directory, request, abort
+from flask import Flask, Response, render_template, jsonify, send_from_directory, request, abort, stream_with_context
 from flask_cors import CORS
 import re
 import uuid
 from datetime import datetime
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, Any
 from werkzeug.exceptions import HTTPException
 
 # Import custom modules
-from .error_handler import handle_error, validate_request, create_error_response, TemplateGenerationError
+from .error_handler import (handle_error, validate_request, create_error_response, TemplateGenerationError,
+                            error_log_limiter, http_error_response)
 from .cache import TemplateMetadataCache
+from .catalog import TemplateCatalog
+from .facets import CatalogFacets, FACETS, facet_values
+from .search import LibrarySearch
+from .suggest import CatalogSuggest
+from .jobs import JobStore, JobQueue, run_generation_job
+from .idempotency import (IdempotencyStore, IdempotentExecutor, IdempotencyError, request_fingerprint,
+                          MAX_KEY_LENGTH)
+from .render_cache import markdown_cache
+from .http_cache import init_http_cache, compute_etag
+from .admission import AdmissionController, init_admission_control
+from .metrics import MetricsRegistry, init_metrics
+from .log_pipeline import LogPipeline, JsonFormatter, parse_sampling_rates
+from .profiling import RequestProfiler, init_profiling, PROFILE_HEADER, PROFILE_PARAM
+from .watchdog import SlowRequestWatchdog, init_slow_request_watchdog
+from .warmup import warm_caches
+from .assets import AssetTable, init_static_assets
 from .static.favicon import serve_favicon  # Import favicon handler
+from Library_Resources.metadata_enricher import MetadataEnricher
+from Library_Resources.content_processor import ContentProcessor
 
 # Initialize cache
 template_metadata_cache = TemplateMetadataCache()
 
+def shutdown_caches():
+    """Flush caches, the search index and view counts, and stop background threads and the job pool before the process exits."""
+    template_metadata_cache.close()
+    template_facets.stop()
+    library_search.stop()
+    library_search.save()
+    template_suggest.stop()
+    template_suggest.save()
+    generation_jobs.shutdown()
+    metrics_registry.close()
+    log_pipeline.stop()
+
+# gunicorn also calls this from the worker_exit hook in gunicorn.conf.py
+atexit.register(shutdown_caches)
+
 # Configure Logging
 def setup_logging(app):
-    """Set up application logging."""
+    """
+    Set up application logging.
+
+    Records are queued and written by a background thread, so file I/O and
+    rotation stay off the request path. The log file gets one JSON object
+    per line unless CRL_LOG_FORMAT is 'text'. The werkzeug logger, which
+    writes the development server's request lines, goes through the same
+    pipeline. CRL_LOG_SAMPLING keeps only a fraction of INFO records from
+    the given loggers, e.g. 'src.local_server.access=0.1,werkzeug=0.1'.
+
+    Returns:
+        LogPipeline: The running pipeline
+    """
     log_dir = os.path.join(os.path.dirname(__file__), '..', 'logs')
     os.makedirs(log_dir, exist_ok=True)
     
@@ -43,112 +92,210 @@ def setup_logging(app):
         datefmt='%Y-%m-%d %H:%M:%S'
     )
     
-    file_handler.setFormatter(formatter)
+    file_handler.setFormatter(formatter if os.environ.get('CRL_LOG_FORMAT') == 'text' else JsonFormatter())
     console_handler.setFormatter(formatter)
     
-    # Add handlers to app logger
-    app.logger.addHandler(file_handler)
-    app.logger.addHandler(console_handler)
+    # Add the queue in front of both handlers to the app and werkzeug loggers
+    pipeline = LogPipeline(
+        [file_handler, console_handler],
+        max_queue=int(os.environ.get('CRL_LOG_QUEUE', '10000')),
+        sampling=parse_sampling_rates(os.environ.get('CRL_LOG_SAMPLING', ''))
+    )
+    app.logger.addHandler(pipeline.handler)
+    # With a handler in place werkzeug no longer adds its own stderr handler
+    werkzeug_logger = logging.getLogger('werkzeug')
+    werkzeug_logger.addHandler(pipeline.handler)
+    if werkzeug_logger.level == logging.NOTSET:
+        werkzeug_logger.setLevel(logging.INFO)
     
     # Set logging level
     app.logger.setLevel(logging.INFO)
+    return pipeline
 
-app = Flask(__name__)
-setup_logging(app)
+# Static files are served from an in-memory table by init_static_assets
+app = Flask(__name__, static_folder=None)
+log_pipeline = setup_logging(app)
+# Per-request INFO lines go to a child logger so they can be sampled separately
+access_log = app.logger.getChild('access')
 CORS(app)
+init_http_cache(app)
 
-# Favicon handling with robust error management
-def create_default_favicon(static_dir):
-    """
-    Create a default favicon if one doesn't exist
-    
-    Args:
-        static_dir (str): Directory to save favicon
-    
-    Returns:
-        str: Path to favicon file
-    """
-    try:
-        from PIL import Image, ImageDraw
-        import os
-        
-        # Ensure static directory exists
-        os.makedirs(static_dir, exist_ok=True)
-        favicon_path = os.path.join(static_dir, 'favicon.ico')
-        
-        # Create favicon only if it doesn't exist
-        if not os.path.exists(favicon_path):
-            icon = Image.new('RGBA', (16, 16), (255, 255, 255, 0))
-            draw = ImageDraw.Draw(icon)
-            draw.rectangle([0, 0, 15, 15], fill=(33, 150, 243, 255))  # Material Blue
-            icon.save(favicon_path, 'ICO')
-        
-        return favicon_path
-    
-    except Exception as e:
-        app.logger.error(f"Favicon creation error: {e}")
-        return None
+# Prometheus metrics; every process writes snapshots to one directory that /metrics merges
+metrics_registry = MetricsRegistry(
+    os.environ.get('CRL_METRICS_DIR', os.path.join(os.path.dirname(__file__), '..', 'cache', 'metrics')),
+    flush_interval=float(os.environ.get('CRL_METRICS_FLUSH_INTERVAL', '5'))
+)
+init_metrics(app, metrics_registry)
+metrics_registry.describe('crl_template_generations_total', 'counter', 'Template generations by type and status.')
+metrics_registry.describe('crl_metadata_cache_hits_total', 'counter', 'Template metadata cache hits by tier.')
+metrics_registry.describe('crl_metadata_cache_misses_total', 'counter', 'Template metadata cache misses by tier.')
+metrics_registry.describe('crl_generation_jobs', 'gauge', 'Generation jobs in the store by status.')
+metrics_registry.describe('crl_generation_job_queue_depth', 'gauge', 'Generation jobs waiting to run.')
 
-# Add favicon route after app initialization
-def setup_favicon(app):
-    """
-    Set up favicon route with error handling
-    
-    Args:
-        app (Flask): Flask application instance
-    """
-    static_dir = os.path.join(os.path.dirname(__file__), 'static')
-    
-    @app.route('/favicon.ico')
-    def favicon():
-        try:
-            favicon_path = create_default_favicon(static_dir)
-            
-            if favicon_path and os.path.exists(favicon_path):
-                return send_from_directory(
-                    os.path.dirname(favicon_path), 
-                    os.path.basename(favicon_path), 
-                    mimetype='image/x-icon'
-                )
-            
-            # Fallback to no content
-            return '', 204
-        
-        except Exception as e:
-            app.logger.error(f"Favicon serving error: {e}")
-            return '', 204
+def metadata_cache_samples():
+    """Hit and miss counters of both TemplateMetadataCache tiers."""
+    stats = template_metadata_cache.stats()
+    for tier in ('memory', 'persistent'):
+        yield 'crl_metadata_cache_hits_total', {'tier': tier}, stats[tier]['hits']
+        yield 'crl_metadata_cache_misses_total', {'tier': tier}, stats[tier]['misses']
 
-# Call favicon setup after CORS initialization
-setup_favicon(app)
+metrics_registry.add_collector(metadata_cache_samples)
+
+# Backpressure for endpoints that write to disk; reads are never limited
+WRITE_ENDPOINTS = ('generate_template', 'generate_template_batch', 'enqueue_generation_job')
+write_admission = AdmissionController(
+    max_concurrent=int(os.environ.get('CRL_WRITE_CONCURRENCY', '2')),
+    max_queue=int(os.environ.get('CRL_WRITE_QUEUE', '16')),
+    queue_timeout=float(os.environ.get('CRL_WRITE_QUEUE_TIMEOUT', '5')),
+    read_threshold=int(os.environ.get('CRL_WRITE_READ_THRESHOLD', '2')) or None,
+    max_read_hold=float(os.environ.get('CRL_WRITE_READ_HOLD', '0.5'))
+)
+init_admission_control(app, write_admission, WRITE_ENDPOINTS)
+
+# Log the stack of requests running longer than CRL_SLOW_REQUEST_SECONDS (0 disables)
+slow_request_watchdog = None
+if float(os.environ.get('CRL_SLOW_REQUEST_SECONDS', '2')) > 0:
+    slow_request_watchdog = SlowRequestWatchdog(
+        threshold=float(os.environ.get('CRL_SLOW_REQUEST_SECONDS', '2')),
+        sample_rate=float(os.environ.get('CRL_SLOW_REQUEST_SAMPLE_RATE', '1')),
+        max_reports=int(os.environ.get('CRL_SLOW_REQUEST_MAX_REPORTS', '10')),
+        logger=app.logger
+    )
+    init_slow_request_watchdog(app, slow_request_watchdog)
+
+# Opt-in per-request profiling; requests must carry a token signed with CRL_PROFILING_SECRET
+request_profiler = None
+if os.environ.get('CRL_PROFILING', '').lower() in ('1', 'true', 'yes', 'on'):
+    if os.environ.get('CRL_PROFILING_SECRET'):
+        request_profiler = RequestProfiler(
+            os.path.join(os.path.dirname(__file__), '..', 'logs', 'profiles'),
+            os.environ['CRL_PROFILING_SECRET'],
+            max_profiles=int(os.environ.get('CRL_PROFILING_RETENTION', '50'))
+        )
+        init_profiling(app, request_profiler, exclude_endpoints=('list_profiles', 'download_profile'))
+    else:
+        app.logger.warning("CRL_PROFILING is set but CRL_PROFILING_SECRET is not; profiling stays disabled")
+
+# Static assets are read and fingerprinted once at startup; the favicon is precomputed
+static_assets = AssetTable(os.path.join(os.path.dirname(__file__), 'static'))
+init_static_assets(app, static_assets)
+serve_favicon(app, static_assets)
 
 # Paths
 TEMPLATES_DIR = os.path.join(os.path.dirname(__file__), '..', 'Templates_NEW')
 MARKDOWN_DIR = os.path.join(os.path.dirname(__file__), '..', 'Templates_Markdown')
 GENERATED_TEMPLATES_DIR = os.path.join(os.path.dirname(__file__), '..', 'Generated_Templates')
+LIBRARY_DIR = os.path.join(os.path.dirname(__file__), '..', 'Library_Resources')
+SEARCH_INDEX_PATH = os.environ.get(
+    'CRL_SEARCH_INDEX', os.path.join(os.path.dirname(__file__), '..', 'cache', 'search_index.bin'))
+SUGGEST_POPULARITY_PATH = os.environ.get(
+    'CRL_SUGGEST_POPULARITY', os.path.join(os.path.dirname(__file__), '..', 'cache', 'template_popularity.json'))
+JOBS_DB_PATH = os.environ.get(
+    'CRL_JOBS_DB', os.path.join(os.path.dirname(__file__), '..', 'cache', 'jobs.sqlite3'))
+IDEMPOTENCY_DB_PATH = os.environ.get(
+    'CRL_IDEMPOTENCY_DB', os.path.join(os.path.dirname(__file__), '..', 'cache', 'idempotency.sqlite3'))
 
 # Ensure generated templates directory exists
 os.makedirs(GENERATED_TEMPLATES_DIR, exist_ok=True)
 
+# Build the template catalog once at startup
+template_catalog = TemplateCatalog(TEMPLATES_DIR, MARKDOWN_DIR)
+
+# Listing page sizes
+INDEX_PAGE_SIZE = 50
+API_PAGE_SIZE = 100
+API_MAX_PAGE_SIZE = 1000
+LISTING_FIELDS = ('name', 'kind', 'file_count', 'directory_count')
+
+# Bulk metadata access
+METADATA_BATCH_MAX_NAMES = 1000
+EXPORT_CHUNK_RECORDS = 64
+
+# Facet filters over enriched template metadata
+metadata_enricher = MetadataEnricher(TEMPLATES_DIR)
+
+def describe_template(entry):
+    """Derive facet values for a template directory from its name and one read of its README."""
+    try:
+        return facet_values(metadata_enricher.generate_facet_metadata(entry.name))
+    except OSError as e:
+        app.logger.warning(f"Could not derive facets for {entry.name}: {e}")
+        return {}
+
+template_facets = CatalogFacets(template_catalog, describe_template,
+                                index_path=metadata_enricher.facets_file)
+
+# Full-text search; each source root gets its own processor so @include
+# directives stay confined to that root
+def _text_extractor(root_path):
+    processor = ContentProcessor(root_path, render_cache=markdown_cache)
+    return lambda path: processor.extract_text(path)[1]
+
+library_search = LibrarySearch(
+    template_catalog,
+    LIBRARY_DIR,
+    extractors={
+        'template': _text_extractor(TEMPLATES_DIR),
+        'markdown': _text_extractor(MARKDOWN_DIR),
+        'knowledge_block': _text_extractor(LIBRARY_DIR),
+    },
+    index_path=SEARCH_INDEX_PATH
+)
+
+# Type-ahead suggestions over template names, titles and tags
+def describe_suggestion(entry):
+    """Derive the title and tags a template is suggested under; both come from its name alone."""
+    if entry.kind != 'new':
+        return os.path.splitext(entry.name)[0].replace('_', ' '), []
+    metadata = metadata_enricher.derive_name_metadata(entry.name)
+    return metadata['title'], metadata['tags']
+
+template_suggest = CatalogSuggest(template_catalog, describe_suggestion,
+                                  popularity_path=SUGGEST_POPULARITY_PATH,
+                                  save_interval=float(os.environ.get('CRL_SUGGEST_SAVE_INTERVAL', '300')) or None)
+
+# Background generation of heavy tools/template_generator types
+def publish_generated_template(job):
+    """Make a template written by a finished job visible."""
+    if job['status'] != 'succeeded':
+        app.logger.warning(f"Generation job {job['id']} failed: {job['error']}")
+        log_template_generation(job['params']['template_type'], job['params']['name'], 'error')
+        return
+    path = job['result']['path']
+    template_catalog.refresh(path)
+    library_search.refresh_template(path)
+    template_suggest.refresh_template(path)
+    log_template_generation(job['params']['template_type'], job['params']['name'], 'success')
+
+# Retried POST /generate_template requests carrying an Idempotency-Key replay the first response
+idempotent_generation = IdempotentExecutor(IdempotencyStore(
+    IDEMPOTENCY_DB_PATH, ttl=float(os.environ.get('CRL_IDEMPOTENCY_TTL', '86400'))))
+
+generation_jobs = JobQueue(
+    JobStore(JOBS_DB_PATH),
+    handlers={'generate': run_generation_job},
+    max_workers=int(os.environ.get('CRL_JOB_WORKERS', '2')),
+    on_complete=publish_generated_template,
+    recover_interval=float(os.environ.get('CRL_JOB_RECOVER_INTERVAL', '60')) or None,
+    finished_ttl=float(os.environ.get('CRL_JOB_TTL', '604800'))
+)
+
 # Global error handler
 @app.errorhandler(Exception)
 def handle_global_error(error):
     """
     Global error handler for unhandled exceptions
     
-    Provides a consistent error response and logs the error
+    Provides a consistent error response. Logging is rate-limited per error
+    class, and only server errors are logged with a traceback.
     """
-    # Log the full error traceback
-    app.logger.error(f"Unhandled Exception: {str(error)}", exc_info=True)
-    
-    # Determine the appropriate error response
     if isinstance(error, HTTPException):
-        return create_error_response({
-            'message': error.description,
-            'status_code': error.code,
-            'details': {}
-        })
+        error_log_limiter.log(app.logger, error, error.code,
+                              f"HTTP {error.code} for {request.method} {request.path}: {error.description}")
+        return http_error_response(error)
     
     # For unexpected errors
+    error_log_limiter.log(app.logger, error, 500, f"Unhandled Exception on {request.method} {request.path}: {error}")
     error_info = {
         'message': 'An unexpected server error occurred',
         'status_code': 500,
@@ -167,12 +314,13 @@ def sanitize_filename(filename):
     sanitized = sanitized.replace(' ', '_')
     return sanitized[:255]  # Limit filename length
 
-def load_template_metadata(template_path: str) -> Dict[str, Any]:
+def load_template_metadata(template_path: str, catalog_entry=None) -> Dict[str, Any]:
     """
     Advanced metadata loading with comprehensive error handling.
     
     Args:
         template_path (str): Path to template directory
+        catalog_entry (CatalogEntry, optional): Catalog entry supplying file and directory counts
     
     Returns:
         Dictionary of template metadata
@@ -205,8 +353,12 @@ def load_template_metadata(template_path: str) -> Dict[str, Any]:
             }
         
         # Enrich metadata with additional information
-        metadata['file_count'] = len([f for f in os.listdir(template_path) if os.path.isfile(os.path.join(template_path, f))])
-        metadata['directory_count'] = len([d for d in os.listdir(template_path) if os.path.isdir(os.path.join(template_path, d))])
+        if catalog_entry is not None:
+            metadata['file_count'] = catalog_entry.file_count
+            metadata['directory_count'] = catalog_entry.directory_count
+        else:
+            metadata['file_count'] = len([f for f in os.listdir(template_path) if os.path.isfile(os.path.join(template_path, f))])
+            metadata['directory_count'] = len([d for d in os.listdir(template_path) if os.path.isdir(os.path.join(template_path, d))])
         
         return metadata
     
@@ -265,29 +417,121 @@ def get_template_metadata(template_name: str):
         JSON response with template metadata
     """
     try:
-        template_path = os.path.join(TEMPLATES_DIR, template_name)
+        # Unknown names are rejected from memory by the catalog
+        catalog_entry = template_catalog.get(template_name)
         
-        if not os.path.exists(template_path):
+        if catalog_entry is None or catalog_entry.kind != 'new':
             raise TemplateGenerationError(
                 'Template not found', 
                 details={'template_name': template_name}
             )
         
-        # Use cached metadata
-        metadata = template_metadata_cache.get_metadata(template_path)
-        
-        # Validate template structure
-        from tools.template_generator.validator import TemplateValidator
-        validation_report = TemplateValidator.validate_template_structure(template_path)
-        
-        metadata['validation'] = validation_report
-        
-        return jsonify(metadata), 200
+        return jsonify(template_metadata_record(catalog_entry)), 200
+    
+    except TemplateGenerationError as e:
+        # Unknown names are routine; handle_error logs them rate-limited
+        return create_error_response(handle_error(e))
     
     except Exception as e:
         app.logger.error(f"Metadata retrieval error: {e}")
         return create_error_response(handle_error(e))
 
+def template_metadata_record(catalog_entry, include_validation: bool = True) -> Dict[str, Any]:
+    """
+    Build the metadata record served for one generated template.
+
+    Args:
+        catalog_entry (CatalogEntry): Catalog entry of a Templates_NEW directory
+        include_validation (bool, optional): Attach the template structure validation report
+
+    Returns:
+        dict: Cached metadata, plus 'validation' when requested
+    """
+    # Use cached metadata
+    metadata = template_metadata_cache.get_metadata(catalog_entry.path)
+
+    if include_validation:
+        # Validate template structure
+        from tools.template_generator.validator import TemplateValidator
+        metadata['validation'] = TemplateValidator().validate(Path(catalog_entry.path))
+
+    return metadata
+
+def _bulk_metadata_record(catalog_entry, include_validation: bool) -> Dict[str, Any]:
+    """Metadata record for bulk responses; a failing template yields an error record instead of failing the batch."""
+    try:
+        return template_metadata_record(catalog_entry, include_validation)
+    except Exception as e:
+        app.logger.error(f"Metadata retrieval error for {catalog_entry.name}: {e}")
+        return {'name': catalog_entry.name, 'type': 'error', 'description': f'Metadata loading failed: {e}'}
+
+def _validation_requested() -> bool:
+    """Read the ``validation`` query flag of the bulk metadata endpoints; off by default."""
+    return request.args.get('validation', 'false').lower() in ('1', 'true', 'yes', 'on')
+
+@app.route('/api/templates/export.ndjson')
+def export_template_metadata():
+    """
+    Stream the metadata of every generated template as newline-delimited JSON.
+
+    Records are produced while the response is written, a chunk of lines at
+    a time, so memory use does not grow with the catalog.
+
+    Query parameters:
+        validation: 'true' to attach a validation report to every record
+    """
+    access_log.info("API: Template metadata export requested")
+    include_validation = _validation_requested()
+    # Iterate over the catalog snapshot taken now; later changes do not affect this export
+    entries = template_catalog.entries('new')
+
+    def generate():
+        lines = []
+        for entry in entries:
+            lines.append(json.dumps(_bulk_metadata_record(entry, include_validation), default=str))
+            if len(lines) >= EXPORT_CHUNK_RECORDS:
+                yield '\n'.join(lines) + '\n'
+                lines = []
+        if lines:
+            yield '\n'.join(lines) + '\n'
+
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson',
+                    headers={'Content-Disposition': 'attachment; filename="templates.ndjson"'})
+
+@app.route('/api/template_metadata:batch', methods=['POST'])
+def batch_template_metadata():
+    """
+    Look up the metadata of many generated templates in one request.
+
+    Request body:
+        names: List of template names (at most 1000)
+
+    Query parameters:
+        validation: 'true' to attach a validation report to every record
+
+    Returns:
+        JSON with 'templates' (metadata records in request order, duplicates
+        dropped) and 'not_found' (names that are not generated templates)
+    """
+    data = request.get_json(silent=True)
+    names = data.get('names') if isinstance(data, dict) else None
+    if not isinstance(names, list) or not all(isinstance(name, str) for name in names):
+        abort(400, description="names must be a list of template names")
+    if len(names) > METADATA_BATCH_MAX_NAMES:
+        abort(400, description=f"at most {METADATA_BATCH_MAX_NAMES} names per request")
+
+    app.logger.info(f"API: Metadata batch of {len(names)} templates requested")
+    include_validation = _validation_requested()
+    templates, not_found = [], []
+    for name in dict.fromkeys(names):
+        catalog_entry = template_catalog.get(name)
+        if catalog_entry is None or catalog_entry.kind != 'new':
+            not_found.append(name)
+            continue
+        templates.append(_bulk_metadata_record(catalog_entry, include_validation))
+
+    return jsonify({'templates': templates, 'not_found': not_found})
+
 def validate_template_type(template_type):
     """
     Adaptive template type validation
@@ -326,79 +570,168 @@ def validate_template_type(template_type):
         }
     )
 
+# Generated file contents per predefined template type
+TEMPLATE_CONTENTS = {
+    'web_app': "# {name} Web Application Template\n\n## Overview\n\n## Key Features\n\n## Getting Started\n",
+    'document': "# {name} Document Template\n\n## Introduction\n\n## Main Sections\n\n## Conclusion\n",
+    'script': "# {name} Script Template\n\n## Purpose\n\n## Usage\n\n## Dependencies\n",
+    'data_analysis': "# {name} Data Analysis Template\n\n## Dataset\n\n## Methodology\n\n## Insights\n"
+}
+# Default content for custom types
+DEFAULT_CUSTOM_CONTENT = "# {name} Custom Template\n\n## Purpose\n\n## Key Components\n\n## Notes\n"
+
+# Batch generation limits
+GENERATE_BATCH_MAX_ITEMS = 500
+GENERATE_BATCH_WORKERS = int(os.environ.get('CRL_GENERATE_BATCH_WORKERS', '8'))
+
+def parse_template_spec(data: Dict[str, Any]):
+    """
+    Validate a generation request body.
+
+    Args:
+        data (dict): Request body with 'template_type' and 'name'
+
+    Returns:
+        tuple: (normalized template type, sanitized template name)
+
+    Raises:
+        TemplateGenerationError: If a field is missing or the type is invalid
+    """
+    missing_fields = [field for field in ('template_type', 'name') if field not in data]
+    if missing_fields:
+        raise TemplateGenerationError(
+            f"Missing required fields: {', '.join(missing_fields)}",
+            details={'missing_fields': missing_fields}
+        )
+    template_type = validate_template_type(data.get('template_type'))
+    template_name = sanitize_filename(data.get('name', f'New_{template_type}_Template'))
+    return template_type, template_name
+
+def write_template(template_type: str, template_name: str) -> Dict[str, Any]:
+    """
+    Create a template directory with its README and template file.
+
+    Callers make the new directory visible to the catalog afterwards.
+
+    Args:
+        template_type (str): Validated template type
+        template_name (str): Sanitized template name
+
+    Returns:
+        dict: Success payload returned to the client
+    """
+    # Generate unique template ID
+    template_id = str(uuid.uuid4().int)[:8]
+    
+    # Create template metadata
+    metadata = TemplateMetadata(
+        template_id=template_id, 
+        template_type=template_type, 
+        name=template_name
+    )
+    
+    # Generate template with structured directory
+    template_dir_name = f"{template_id}_{template_name}"
+    generated_path = os.path.join(TEMPLATES_DIR, template_dir_name)
+    os.makedirs(generated_path, exist_ok=True)
+    
+    # Create template files
+    readme_path = os.path.join(generated_path, 'README.md')
+    template_path = os.path.join(generated_path, 'template.md')
+    
+    # Write README with enhanced metadata
+    with open(readme_path, 'w') as f:
+        f.write(f"""# {template_name}
+## Template Metadata
+- **Type**: {template_type}
+- **Generated**: {datetime.utcnow().isoformat()}
+- **Template ID**: {template_id}
+- **Origin**: {'Predefined' if template_type in TEMPLATE_CONTENTS else 'Custom'}
+""")
+    
+    # Write template content
+    with open(template_path, 'w') as f:
+        f.write(TEMPLATE_CONTENTS.get(template_type, DEFAULT_CUSTOM_CONTENT).format(name=template_name))
+    
+    app.logger.info(f"Template generated successfully: {generated_path}")
+    
+    return {
+        'status': 'success',
+        'template_id': template_id,
+        'path': template_dir_name,
+        'message': f'Template {template_name} generated successfully',
+        'type': template_type,
+        'metadata': metadata.to_dict()
+    }
+
 @app.route('/generate_template', methods=['POST'])
 def generate_template():
+    """
+    Generate a template.
+
+    With an ``Idempotency-Key`` header the template is generated at most
+    once per key: retries get the original response (marked with
+    ``Idempotent-Replayed: true``), concurrent duplicates in this process
+    wait for the first request, duplicates of a request still running in
+    another process get 409 with Retry-After, and reusing a key with a
+    different body is rejected with 422.
+    """
+    key = request.headers.get('Idempotency-Key')
+    if key is None:
+        return _generate_template()
+    key = key.strip()
+    if not key or len(key) > MAX_KEY_LENGTH:
+        abort(400, description=f"Idempotency-Key must be 1-{MAX_KEY_LENGTH} characters")
+
+    def run():
+        response, status_code = _generate_template()
+        return status_code, response.get_data(as_text=True)
+
+    try:
+        status_code, body, replayed = idempotent_generation.execute(
+            f"generate_template:{key}", request_fingerprint(request.get_data()), run)
+    except IdempotencyError as e:
+        app.logger.warning(f"Idempotent generation rejected for key {key!r}: {e.message}")
+        details = {'idempotency_key': key}
+        if e.retry_after is not None:
+            details['retry_after'] = e.retry_after
+        response, status_code = create_error_response({'message': e.message, 'status_code': e.status_code,
+                                                       'details': details})
+        if e.retry_after is not None:
+            response.headers['Retry-After'] = str(e.retry_after)
+        return response, status_code
+
+    response = Response(body, status=status_code, mimetype='application/json')
+    response.headers['Idempotency-Key'] = key
+    if replayed:
+        app.logger.info(f"Replayed generation response for Idempotency-Key {key!r}")
+        response.headers['Idempotent-Replayed'] = 'true'
+    return response
+
+def _generate_template():
     """Advanced template generation endpoint with comprehensive error handling."""
     try:
         # Log incoming request details
-        app.logger.info(f"Template generation request received: {request.get_json()}")
+        app.logger.debug(f"Template generation request received: {request.get_json()}")
         
         # Validate request
         validate_request(request, ['template_type', 'name'])
         
-        data = request.get_json()
-        template_type = validate_template_type(data.get('template_type'))
-        template_name = sanitize_filename(data.get('name', f'New_{template_type}_Template'))
+        template_type, template_name = parse_template_spec(request.get_json())
         
         app.logger.info(f"Processing template generation: type={template_type}, name={template_name}")
         
-        # Generate unique template ID
-        template_id = str(uuid.uuid4().int)[:8]
-        
-        # Create template metadata
-        metadata = TemplateMetadata(
-            template_id=template_id, 
-            template_type=template_type, 
-            name=template_name
-        )
-        
-        # Generate template with structured directory
-        template_dir_name = f"{template_id}_{template_name}"
-        generated_path = os.path.join(TEMPLATES_DIR, template_dir_name)
-        os.makedirs(generated_path, exist_ok=True)
-        
-        # Create template files
-        readme_path = os.path.join(generated_path, 'README.md')
-        template_path = os.path.join(generated_path, 'template.md')
+        result = write_template(template_type, template_name)
         
-        # Enhanced template content generation
-        template_contents = {
-            'web_app': f"# {template_name} Web Application Template\n\n## Overview\n\n## Key Features\n\n## Getting Started\n",
-            'document': f"# {template_name} Document Template\n\n## Introduction\n\n## Main Sections\n\n## Conclusion\n",
-            'script': f"# {template_name} Script Template\n\n## Purpose\n\n## Usage\n\n## Dependencies\n",
-            'data_analysis': f"# {template_name} Data Analysis Template\n\n## Dataset\n\n## Methodology\n\n## Insights\n"
-        }
-        
-        # Default content for custom types
-        default_custom_content = f"# {template_name} Custom Template\n\n## Purpose\n\n## Key Components\n\n## Notes\n"
-        
-        # Write README with enhanced metadata
-        with open(readme_path, 'w') as f:
-            f.write(f"""# {template_name}
-## Template Metadata
-- **Type**: {template_type}
-- **Generated**: {datetime.utcnow().isoformat()}
-- **Template ID**: {template_id}
-- **Origin**: {'Predefined' if template_type in {'web_app', 'document', 'script', 'data_analysis'} else 'Custom'}
-""")
-        
-        # Write template content
-        with open(template_path, 'w') as f:
-            f.write(template_contents.get(template_type, default_custom_content))
+        # Make the new template visible without waiting for the catalog poll
+        template_catalog.refresh(result['path'])
+        library_search.refresh_template(result['path'])
+        template_suggest.refresh_template(result['path'])
         
         # Log successful generation
         log_template_generation(template_type, template_name, 'success')
         
-        app.logger.info(f"Template generated successfully: {generated_path}")
-        
-        return jsonify({
-            'status': 'success',
-            'template_id': template_id,
-            'path': template_dir_name,
-            'message': f'Template {template_name} generated successfully',
-            'type': template_type,
-            'metadata': metadata.to_dict()
-        }), 201
+        return jsonify(result), 201
     
     except TemplateGenerationError as e:
         # Specific error handling for template generation
@@ -410,36 +743,221 @@ def generate_template():
         app.logger.error(f"Unexpected error in template generation: {e}", exc_info=True)
         return create_error_response(handle_error(e))
 
+@app.route('/generate_template/batch', methods=['POST'])
+def generate_template_batch():
+    """
+    Generate many templates in one request.
+
+    Every spec is validated before anything is written; valid specs are then
+    written concurrently by a bounded thread pool. Invalid or failed specs
+    do not stop the others. The catalog is refreshed once at the end, which
+    search, suggestions and facets pick up as a single change.
+
+    Request body:
+        templates: List of {template_type, name} specs (at most 500); a bare
+            JSON list is accepted too
+
+    Returns:
+        201 with per-item results if every spec succeeded, otherwise 207.
+        Each result carries its 'index' in the request and either the
+        single-generation success payload or status 'error' with a message.
+    """
+    data = request.get_json(silent=True)
+    specs = data.get('templates') if isinstance(data, dict) else data
+    if not isinstance(specs, list) or not specs:
+        abort(400, description="templates must be a non-empty list of {template_type, name} specs")
+    if len(specs) > GENERATE_BATCH_MAX_ITEMS:
+        abort(400, description=f"at most {GENERATE_BATCH_MAX_ITEMS} templates per batch")
+
+    app.logger.info(f"Batch template generation request received: {len(specs)} templates")
+
+    results = [None] * len(specs)
+    valid = []
+    for index, spec in enumerate(specs):
+        try:
+            if not isinstance(spec, dict):
+                raise TemplateGenerationError("Template spec must be an object")
+            valid.append((index,) + parse_template_spec(spec))
+        except TemplateGenerationError as e:
+            results[index] = {'index': index, 'status': 'error', 'message': e.message, 'details': e.details}
+
+    def generate(item):
+        index, template_type, template_name = item
+        try:
+            return index, template_type, template_name, write_template(template_type, template_name)
+        except Exception as e:
+            app.logger.error(f"Batch generation of {template_name} failed: {e}", exc_info=True)
+            return index, template_type, template_name, None
+
+    generated = []
+    if valid:
+        with ThreadPoolExecutor(max_workers=min(GENERATE_BATCH_WORKERS, len(valid)),
+                                thread_name_prefix='generate-batch') as pool:
+            for index, template_type, template_name, result in pool.map(generate, valid):
+                if result is None:
+                    results[index] = {'index': index, 'status': 'error',
+                                      'message': f'Template {template_name} could not be written'}
+                    log_template_generation(template_type, template_name, 'error')
+                else:
+                    results[index] = dict(result, index=index)
+                    generated.append(result['path'])
+                    log_template_generation(template_type, template_name, 'success')
+
+    # One catalog change for the whole batch
+    if generated:
+        template_catalog.refresh_many(generated)
+
+    succeeded = len(generated)
+    app.logger.info(f"Batch template generation finished: {succeeded}/{len(specs)} succeeded")
+    return jsonify({
+        'status': 'success' if succeeded == len(specs) else 'partial' if succeeded else 'error',
+        'succeeded': succeeded,
+        'failed': len(specs) - succeeded,
+        'results': results
+    }), 201 if succeeded == len(specs) else 207
+
+@app.route('/jobs/generate', methods=['POST'])
+def enqueue_generation_job():
+    """
+    Queue generation of a tools/template_generator template type.
+
+    Request body:
+        template_type: Registered generator type (e.g. microservices, data_science)
+        name: Template name
+
+    Returns:
+        202 with the job id; poll the URL in the Location header for progress
+    """
+    from tools.template_generator import TemplateTypeRegistry
+    import tools.template_generator.types  # noqa: F401  registers the template types
+
+    try:
+        validate_request(request, ['template_type', 'name'])
+        data = request.get_json()
+        template_type = data.get('template_type')
+        if TemplateTypeRegistry.get(template_type) is None:
+            raise TemplateGenerationError(
+                f"Unknown generator template type: {template_type}",
+                details={'allowed_types': TemplateTypeRegistry.list_types()}
+            )
+        template_name = sanitize_filename(data.get('name') or f'New_{template_type}_Template')
+    except TemplateGenerationError as e:
+        app.logger.warning(f"Generation job rejected: {e.message}")
+        return create_error_response(handle_error(e))
+
+    job = generation_jobs.submit('generate', {
+        'template_type': template_type,
+        'name': template_name,
+        'directory_name': f"{str(uuid.uuid4().int)[:8]}_{template_name}",
+        'output_dir': os.path.abspath(TEMPLATES_DIR)
+    })
+    app.logger.info(f"Generation job {job['id']} queued: type={template_type}, name={template_name}")
+    status_url = f"/jobs/{job['id']}"
+    return jsonify({'job_id': job['id'], 'status': job['status'], 'status_url': status_url}), 202, {
+        'Location': status_url}
+
+def require_profiler():
+    """Return the request profiler, or 404 unless profiling is enabled and the request is signed for its path."""
+    token = request.headers.get(PROFILE_HEADER) or request.args.get(PROFILE_PARAM)
+    if request_profiler is None or not request_profiler.authorized(request.path, token):
+        abort(404)
+    return request_profiler
+
+@app.route('/debug/profiles')
+def list_profiles():
+    """Recent request profiles, newest first."""
+    profiler = require_profiler()
+    try:
+        limit = min(max(int(request.args.get('limit', 50)), 1), profiler.max_profiles)
+    except ValueError:
+        abort(400, description="limit must be an integer")
+    return jsonify({'profiles': profiler.recent(limit)})
+
+@app.route('/debug/profiles/<profile_id>')
+def download_profile(profile_id):
+    """Download a stored profile as a pstats file."""
+    path = require_profiler().path_for(profile_id)
+    if path is None:
+        abort(404)
+    return send_from_directory(os.path.dirname(path), os.path.basename(path),
+                               mimetype='application/octet-stream', as_attachment=True)
+
+@app.route('/metrics')
+def prometheus_metrics():
+    """Request, generation, cache and job metrics of all server processes in Prometheus text format."""
+    job_metrics = generation_jobs.metrics()
+    live_samples = [('crl_generation_job_queue_depth', {}, job_metrics['queue_depth'])]
+    live_samples.extend(('crl_generation_jobs', {'status': status}, count)
+                        for status, count in job_metrics['jobs'].items())
+    return Response(metrics_registry.render(live_samples), mimetype='text/plain; version=0.0.4')
+
+@app.route('/jobs/metrics')
+def generation_job_metrics():
+    """Queue depth, job counts and recent job latency percentiles."""
+    return jsonify(generation_jobs.metrics())
+
+@app.route('/jobs/<job_id>')
+def generation_job_status(job_id):
+    """
+    Report a generation job's status and progress stage.
+
+    Args:
+        job_id (str): Id returned by POST /jobs/generate
+    """
+    job = generation_jobs.get(job_id)
+    if job is None:
+        abort(404, description="Job not found")
+    return jsonify({
+        'job_id': job['id'],
+        'status': job['status'],
+        'stage': job['stage'],
+        'template_type': job['params']['template_type'],
+        'name': job['params']['name'],
+        'result': job['result'],
+        'error': job['error'],
+        'attempts': job['attempts'],
+        'queued_seconds': job['queued_seconds'],
+        'run_seconds': job['run_seconds']
+    })
+
 @app.route('/')
 def index():
     """Main index page showing available templates."""
-    app.logger.info("Index page accessed")
-    # List templates from both NEW and Markdown directories
-    new_templates = [d for d in os.listdir(TEMPLATES_DIR) if os.path.isdir(os.path.join(TEMPLATES_DIR, d))]
-    markdown_templates = [d for d in os.listdir(MARKDOWN_DIR) if d.endswith('.md')]
-    
+    access_log.info("Index page accessed")
+    # Render the first page of each list; the page fetches the rest on scroll
+    new_page, new_cursor, new_total = template_catalog.page(limit=INDEX_PAGE_SIZE, kind='new')
+    markdown_page, markdown_cursor, markdown_total = template_catalog.page(limit=INDEX_PAGE_SIZE, kind='markdown')
     return render_template('index.html', 
-                           new_templates=new_templates, 
-                           markdown_templates=markdown_templates)
+                           new_templates=[entry.name for entry in new_page], 
+                           markdown_templates=[entry.name for entry in markdown_page],
+                           new_templates_cursor=new_cursor,
+                           markdown_templates_cursor=markdown_cursor,
+                           total_templates=new_total + markdown_total)
 
 @app.route('/template/<template_name>')
 def view_template(template_name):
     """View a specific template."""
-    app.logger.info(f"Template {template_name} accessed")
+    access_log.info(f"Template {template_name} accessed")
     
     # Search in NEW templates directory
-    new_template_path = None
-    for potential_template in os.listdir(TEMPLATES_DIR):
-        if potential_template.endswith(template_name):
-            new_template_path = os.path.join(TEMPLATES_DIR, potential_template)
-            break
-    
-    if not new_template_path or not os.path.exists(new_template_path):
-        # If no template found, return a helpful message
+    catalog_entry = template_catalog.resolve(template_name)
+    
+    if catalog_entry is None:
+        # If no template found, return a helpful message; a 404 is not cached
         return render_template('template_view.html', 
                                template_name=template_name, 
                                readme_content="Template not found", 
-                               template_content="No template content available")
+                               template_content="No template content available"), 404
+    
+    template_suggest.record_view(catalog_entry.name)
+    if catalog_entry.kind == 'markdown':
+        # A markdown template is a single file with no README or metadata
+        return render_template('template_view.html',
+                               template_name=catalog_entry.name[:-3],
+                               readme_content="No README available",
+                               template_content=markdown_cache.render_file(catalog_entry.path))
+
+    new_template_path = catalog_entry.path
     
     # Look for README and template files
     readme_path = os.path.join(new_template_path, 'README.md')
@@ -447,21 +965,19 @@ def view_template(template_name):
     
     # Read README
     try:
-        with open(readme_path, 'r') as f:
-            readme_content = markdown2.markdown(f.read())
+        readme_content = markdown_cache.render_file(readme_path)
     except FileNotFoundError:
         readme_content = "No README available"
     
     # Read template content
     try:
-        with open(template_path, 'r') as f:
-            template_content = markdown2.markdown(f.read())
+        template_content = markdown_cache.render_file(template_path)
     except FileNotFoundError:
         template_content = "No template content available"
     
     # Try to load metadata
     try:
-        metadata = load_template_metadata(new_template_path)
+        metadata = load_template_metadata(new_template_path, catalog_entry)
     except Exception:
         metadata = {"name": os.path.basename(new_template_path)}
     
@@ -472,15 +988,113 @@ def view_template(template_name):
 
 @app.route('/api/templates')
 def list_templates():
-    """API endpoint to list all templates."""
-    app.logger.info("API: Templates listed")
-    new_templates = [d for d in os.listdir(TEMPLATES_DIR) if os.path.isdir(os.path.join(TEMPLATES_DIR, d))]
-    markdown_templates = [d for d in os.listdir(MARKDOWN_DIR) if d.endswith('.md')]
-    
-    return jsonify({
-        'new_templates': new_templates,
-        'markdown_templates': markdown_templates
-    })
+    """
+    API endpoint to list templates one page at a time.
+
+    Query parameters:
+        limit: Page size (default 100, at most 1000)
+        cursor: ``next_cursor`` from the previous page
+        kind: Restrict to 'new' or 'markdown' templates
+        fields: Comma-separated subset of name, kind, file_count, directory_count
+        category, difficulty, tag, type: Facet filters; repeat a parameter to accept
+            any of several values. Filtering restricts the listing to Templates_NEW.
+        facets: 'true' to include facet counts without filtering
+    """
+    access_log.info("API: Templates listed")
+    try:
+        limit = min(int(request.args.get('limit', API_PAGE_SIZE)), API_MAX_PAGE_SIZE)
+    except ValueError:
+        abort(400, description="limit must be an integer")
+    if limit < 1:
+        abort(400, description="limit must be positive")
+
+    fields = LISTING_FIELDS
+    if request.args.get('fields'):
+        fields = tuple(field.strip() for field in request.args['fields'].split(',') if field.strip())
+        unknown = [field for field in fields if field not in LISTING_FIELDS]
+        if unknown:
+            abort(400, description=f"Unknown fields: {', '.join(unknown)}")
+
+    filters = {facet: request.args.getlist(facet) for facet in FACETS if request.args.getlist(facet)}
+    include_facets = bool(filters) or request.args.get('facets', '').lower() in ('1', 'true', 'yes')
+    kind = request.args.get('kind')
+    if filters and kind not in (None, 'new'):
+        abort(400, description="Facet filters only apply to kind=new")
+
+    try:
+        if filters:
+            entries, next_cursor, total = template_facets.page(
+                filters, cursor=request.args.get('cursor'), limit=limit)
+        else:
+            entries, next_cursor, total = template_catalog.page(
+                cursor=request.args.get('cursor'), limit=limit, kind=kind)
+    except ValueError as e:
+        abort(400, description=str(e))
+
+    payload = {
+        'templates': [{field: getattr(entry, field) for field in fields} for entry in entries],
+        'next_cursor': next_cursor,
+        'total': total,
+        'limit': limit
+    }
+    if include_facets:
+        payload['facets'] = template_facets.counts(filters)
+    response = jsonify(payload)
+
+    # The catalog validator plus the query identifies a plain page without hashing
+    # the body; facet values come from file contents, so those pages are hashed.
+    if not include_facets:
+        response.set_etag(hashlib.sha1(
+            f"{template_catalog.etag}?{request.query_string.decode('latin-1')}".encode('utf-8')).hexdigest())
+    return response
+
+@app.route('/api/search')
+def search_templates():
+    """
+    Full-text search over templates and knowledge blocks.
+
+    Query parameters:
+        q: Query text; words in double quotes must appear as a phrase
+        limit: Number of results (default 10, at most 50)
+    """
+    query = request.args.get('q', '').strip()
+    if not query:
+        abort(400, description="q is required")
+    try:
+        limit = min(int(request.args.get('limit', 10)), 50)
+    except ValueError:
+        abort(400, description="limit must be an integer")
+    if limit < 1:
+        abort(400, description="limit must be positive")
+
+    access_log.info(f"API: Search for {query!r}")
+    result = library_search.search(query, limit)
+    response = jsonify(result)
+    # took_ms differs on every request; leave it out so unchanged results revalidate
+    response.set_etag(compute_etag(json.dumps(
+        {key: value for key, value in result.items() if key != 'took_ms'}, sort_keys=True).encode('utf-8')))
+    return response
+
+@app.route('/api/suggest')
+def suggest_templates():
+    """
+    Type-ahead suggestions for template names, titles and tags.
+
+    Query parameters:
+        q: Typed prefix
+        limit: Number of suggestions (default 10, at most 25)
+    """
+    prefix = request.args.get('q', '').strip()
+    if not prefix:
+        abort(400, description="q is required")
+    try:
+        limit = min(int(request.args.get('limit', 10)), 25)
+    except ValueError:
+        abort(400, description="limit must be an integer")
+    if limit < 1:
+        abort(400, description="limit must be positive")
+
+    return jsonify({'query': prefix, 'suggestions': template_suggest.suggest(prefix, limit)})
 
 @app.route('/api/template_types', methods=['GET'])
 def get_template_types():
@@ -528,14 +1142,15 @@ def get_template_types():
 @app.route('/api/template_preview/<template_name>')
 def template_preview(template_name):
     """Provide a lightweight preview of a template."""
-    app.logger.info(f"API: Template {template_name} preview requested")
-    template_path = os.path.join(TEMPLATES_DIR, template_name)
+    access_log.info(f"API: Template {template_name} preview requested")
+    catalog_entry = template_catalog.get(template_name)
     
-    if not os.path.exists(template_path):
+    if catalog_entry is None or catalog_entry.kind != 'new':
         app.logger.warning(f"Template {template_name} not found")
         abort(404, description="Template not found")
     
-    metadata = load_template_metadata(template_path)
+    template_suggest.record_view(catalog_entry.name)
+    metadata = load_template_metadata(catalog_entry.path, catalog_entry)
     
     # Extract preview content
     preview = {
@@ -564,15 +1179,11 @@ def health_check():
         'checks': {
             'database': 'not_applicable',
             'templates_dir': os.path.exists(TEMPLATES_DIR)
-        }
+        },
+        'write_admission': write_admission.stats(),
+        'logging': log_pipeline.stats()
     }), 200
 
-@app.route('/static/<path:filename>')
-def serve_static(filename):
-    """Serve static files."""
-    app.logger.info(f"Static file {filename} served")
-    return send_from_directory(os.path.join(os.path.dirname(__file__), 'static'), filename)
-
 def log_template_generation(template_type, template_name, status):
     """Log template generation events."""
     log_entry = {
@@ -583,6 +1194,20 @@ def log_template_generation(template_type, template_name, status):
         'status': status
     }
     app.logger.info(json.dumps(log_entry))
+    metrics_registry.inc('crl_template_generations_total', {'template_type': template_type, 'status': status})
+
+# Optional cache warmup before the first request; gunicorn.conf.py turns it
+# on for `gunicorn --preload`, where it runs once in the master before forking
+if os.environ.get('CRL_CACHE_WARMUP', '').lower() in ('1', 'true', 'yes', 'on'):
+    warm_caches(
+        template_catalog,
+        template_metadata_cache,
+        markdown_cache,
+        max_workers=int(os.environ.get('CRL_CACHE_WARMUP_WORKERS', '8')),
+        log=app.logger
+    )
+    library_search.resync()
+    template_suggest.ensure_current()
 
 if __name__ == '__main__':
     # Create templates directory if not exists
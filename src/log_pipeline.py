@@ -0,0 +1,198 @@
+import json
+import queue
+import random
+import logging
+import threading
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Dict, Iterable, Optional
+
+from .procutil import register_after_fork
+
+# Attributes every LogRecord has; anything else was passed through ``extra``
+_RECORD_ATTRIBUTES = frozenset(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+
+class JsonFormatter(logging.Formatter):
+    """Format records as one JSON object per line, including fields passed through ``extra``."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'timestamp': datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+            'source': f"{record.filename}:{record.lineno}",
+            'pid': record.process,
+            'thread': record.threadName
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRIBUTES and key not in entry:
+                entry[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry['exception'] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Keep only a fraction of low-severity records from chosen loggers.
+
+    Rates apply to a logger and its children; records above ``max_level``
+    (warnings and errors by default) always pass.
+    """
+
+    def __init__(self, rates: Dict[str, float], max_level: int = logging.INFO):
+        """
+        Initialize the filter.
+
+        Args:
+            rates (dict): Logger name to fraction of records kept
+            max_level (int, optional): Highest level that is sampled
+        """
+        super().__init__()
+        self.rates = dict(rates)
+        self.max_level = max_level
+        self._resolved: Dict[str, Optional[float]] = {}
+
+    def _rate(self, name: str) -> Optional[float]:
+        rate = self._resolved.get(name, False)
+        if rate is False:
+            rate = None
+            candidate = name
+            while candidate:
+                if candidate in self.rates:
+                    rate = self.rates[candidate]
+                    break
+                candidate = candidate.rpartition('.')[0]
+            self._resolved[name] = rate
+        return rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno > self.max_level:
+            return True
+        rate = self._rate(record.name)
+        return rate is None or random.random() < rate
+
+
+def parse_sampling_rates(spec: str) -> Dict[str, float]:
+    """
+    Parse a sampling specification such as ``'werkzeug=0.1,src.local_server.access=0.25'``.
+
+    Args:
+        spec (str): Comma-separated logger=rate pairs
+
+    Returns:
+        dict: Logger name to rate
+
+    Raises:
+        ValueError: If an entry is malformed or a rate is outside 0-1
+    """
+    rates = {}
+    for item in filter(None, (part.strip() for part in spec.split(','))):
+        name, _, rate = item.partition('=')
+        value = float(rate)
+        if not name or not 0 <= value <= 1:
+            raise ValueError(f"Invalid log sampling entry: {item!r}")
+        rates[name.strip()] = value
+    return rates
+
+
+class _DroppingQueueHandler(QueueHandler):
+    """QueueHandler that drops records when the queue is full instead of blocking or printing errors."""
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Merge arguments now, while they still hold their current values,
+        # but leave formatting to the listener thread
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class _BlockingStopListener(QueueListener):
+    """QueueListener whose stop() waits for room in a full queue rather than failing."""
+
+    def enqueue_sentinel(self):
+        self.queue.put(self._sentinel)
+
+
+class LogPipeline:
+    """
+    Hand log records to a background thread that writes them to the real handlers.
+
+    Request threads only put the record on a bounded queue; formatting,
+    file writes and rotation happen on the listener thread. When the queue
+    is full, records are dropped and counted rather than slowing requests
+    down.
+    """
+
+    def __init__(self, handlers: Iterable[logging.Handler], max_queue: int = 10000,
+                 sampling: Optional[Dict[str, float]] = None):
+        """
+        Initialize and start the pipeline.
+
+        Args:
+            handlers (iterable): Handlers the listener writes to
+            max_queue (int, optional): Records buffered before new ones are dropped
+            sampling (dict, optional): Logger name to fraction of INFO records kept
+        """
+        self.handlers = list(handlers)
+        self.max_queue = max_queue
+        self.handler = _DroppingQueueHandler(queue.Queue(max_queue))
+        if sampling:
+            self.handler.addFilter(SamplingFilter(sampling))
+        self.listener = None
+        self._lock = threading.Lock()
+        self.start()
+        register_after_fork(self, '_restart_after_fork')
+
+    def start(self):
+        """Start the listener thread."""
+        with self._lock:
+            if self.listener is None:
+                self.listener = _BlockingStopListener(self.handler.queue, *self.handlers, respect_handler_level=True)
+                self.listener.start()
+
+    def stop(self):
+        """Write out every queued record and stop the listener thread."""
+        with self._lock:
+            listener, self.listener = self.listener, None
+        if listener is not None:
+            listener.stop()
+        for handler in self.handlers:
+            try:
+                handler.flush()
+            except (OSError, ValueError):
+                # At interpreter exit the handler's stream may already be closed
+                pass
+
+    def _restart_after_fork(self):
+        """The listener thread and the queue's locks do not survive fork(); start over in the child."""
+        self._lock = threading.Lock()
+        self.handler.queue = queue.Queue(self.max_queue)
+        self.listener = None
+        self.start()
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Report queue state.
+
+        Returns:
+            dict: Records waiting and records dropped in this process
+        """
+        return {'queued': self.handler.queue.qsize(), 'dropped': self.handler.dropped}
@@ -0,0 +1,349 @@
+import os
+import json
+import time
+import threading
+from collections import defaultdict
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+
+from flask import g, request
+
+from .procutil import file_lock, process_alive, process_start, register_after_fork
+
+# Latency histogram bucket bounds in seconds
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# A sample is (metric name, labels, value)
+Sample = Tuple[str, Dict[str, str], float]
+
+
+def _label_key(labels: Optional[Dict[str, Any]]) -> Tuple[Tuple[str, str], ...]:
+    return tuple(sorted((name, str(value)) for name, value in labels.items())) if labels else ()
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(labels: Iterable[Tuple[str, str]]) -> str:
+    rendered = ','.join(f'{name}="{_escape(value)}"' for name, value in labels)
+    return f'{{{rendered}}}' if rendered else ''
+
+
+def _format_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class MetricsRegistry:
+    """
+    Counters, gauges and histograms shared by every server process.
+
+    Each process keeps its own values in memory, updated under a single
+    uncontended lock, and a background thread writes them to
+    ``<directory>/metrics_<pid>_<start time>.json`` every ``flush_interval``
+    seconds; the start time tells a reused pid from the process that wrote
+    the file. collect() folds the counters and histograms of processes
+    that have exited into ``aggregate.json`` and deletes their snapshots,
+    then merges the aggregate with the live snapshots. Totals therefore
+    survive worker restarts while the directory stays small, and gauges
+    only count processes that are still running.
+    """
+
+    AGGREGATE_FILE = 'aggregate.json'
+
+    def __init__(self, directory: str, flush_interval: float = 5.0, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        """
+        Initialize the registry.
+
+        Args:
+            directory (str): Directory shared by all processes for snapshots
+            flush_interval (float, optional): Seconds between snapshot writes
+            buckets (tuple, optional): Histogram bucket upper bounds in seconds
+        """
+        self.directory = directory
+        self.flush_interval = flush_interval
+        self.buckets = tuple(buckets)
+        os.makedirs(directory, exist_ok=True)
+
+        self._metrics: Dict[str, Tuple[str, str]] = {}
+        self._collectors = []
+        self._lock = threading.Lock()
+        self._reset()
+        register_after_fork(self, '_reset')
+
+    def _reset(self):
+        """Start from empty values; a forked child must not re-report its parent's samples."""
+        self._lock = threading.Lock()
+        self._values = defaultdict(float)
+        self._histograms = {}
+        self._thread = None
+        self._stop = threading.Event()
+        self._pid = os.getpid()
+        self._started = process_start(self._pid) or repr(time.time())
+
+    def describe(self, name: str, kind: str, help_text: str):
+        """
+        Declare a metric.
+
+        Args:
+            name (str): Metric name
+            kind (str): 'counter', 'gauge' or 'histogram'
+            help_text (str): HELP line for the exposition
+        """
+        self._metrics[name] = (kind, help_text)
+
+    def add_collector(self, collector: Callable[[], Iterable[Sample]]):
+        """
+        Register a function whose samples are read whenever this process writes its snapshot.
+
+        Suited to counters kept elsewhere, such as cache statistics.
+
+        Args:
+            collector (callable): Returns (name, labels, value) samples
+        """
+        self._collectors.append(collector)
+
+    def _ensure_flusher(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='metrics-flush', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while not self._stop.wait(self.flush_interval):
+            try:
+                self.flush()
+            except OSError:
+                pass
+
+    def inc(self, name: str, labels: Optional[Dict[str, Any]] = None, value: float = 1.0):
+        """
+        Increment a counter, or move a gauge by ``value``.
+
+        Args:
+            name (str): Metric name
+            labels (dict, optional): Label values
+            value (float, optional): Amount to add; may be negative for gauges
+        """
+        key = (name, _label_key(labels))
+        with self._lock:
+            self._values[key] += value
+        if self._thread is None:
+            self._ensure_flusher()
+
+    def observe(self, name: str, value: float, labels: Optional[Dict[str, Any]] = None):
+        """
+        Record a histogram observation.
+
+        Args:
+            name (str): Metric name
+            value (float): Observed value in seconds
+            labels (dict, optional): Label values
+        """
+        key = (name, _label_key(labels))
+        index = len(self.buckets)
+        for position, bound in enumerate(self.buckets):
+            if value <= bound:
+                index = position
+                break
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            histogram[index] += 1
+            histogram[-1] += value
+        if self._thread is None:
+            self._ensure_flusher()
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Capture this process's values, including collector samples.
+
+        Returns:
+            dict: JSON-serialisable snapshot
+        """
+        with self._lock:
+            values = list(self._values.items())
+            histograms = [(key, list(counts)) for key, counts in self._histograms.items()]
+        samples = [[name, list(map(list, labels)), value] for (name, labels), value in values]
+        for collector in self._collectors:
+            for name, labels, value in collector():
+                samples.append([name, list(map(list, _label_key(labels))), value])
+        return {
+            'pid': self._pid,
+            'started': self._started,
+            'written_at': time.time(),
+            'samples': samples,
+            'histograms': [[name, list(map(list, labels)), counts] for (name, labels), counts in histograms]
+        }
+
+    def flush(self):
+        """Write this process's snapshot, replacing the previous one atomically."""
+        self._write(f'metrics_{self._pid}_{self._started}.json', self.snapshot())
+
+    def _write(self, file: str, data: Dict[str, Any]):
+        path = os.path.join(self.directory, file)
+        temp_path = f'{path}.{self._pid}.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f)
+        os.replace(temp_path, path)
+
+    def _read(self, file: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(os.path.join(self.directory, file), encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _merge(self, values: Dict[Tuple, float], histograms: Dict[Tuple, list], snapshot: Dict[str, Any],
+               gauges: bool = True):
+        """Add a snapshot's samples and histogram counts to ``values`` and ``histograms``."""
+        for name, labels, value in snapshot['samples']:
+            if gauges or self._metrics.get(name, ('counter',))[0] != 'gauge':
+                values[(name, tuple(map(tuple, labels)))] += value
+        for name, labels, counts in snapshot['histograms']:
+            merged = histograms.setdefault((name, tuple(map(tuple, labels))), [0] * len(counts))
+            for position, count in enumerate(counts):
+                merged[position] += count
+
+    def _fold_exited(self, exited: Iterable[str]):
+        """
+        Add the counters and histograms of exited processes to the aggregate file and delete their snapshots.
+
+        The aggregate lists the snapshots already folded into it, so a
+        collector that dies before deleting them cannot count them twice.
+        """
+        with file_lock(os.path.join(self.directory, 'metrics.lock')):
+            aggregate = self._read(self.AGGREGATE_FILE) or {'samples': [], 'histograms': [], 'folded': []}
+            values, histograms = defaultdict(float), {}
+            self._merge(values, histograms, aggregate)
+            folded = set(aggregate['folded'])
+            for file in exited:
+                snapshot = None if file in folded else self._read(file)
+                if snapshot is not None:
+                    self._merge(values, histograms, snapshot, gauges=False)
+                    folded.add(file)
+            # Names of snapshots that are gone can no longer be counted twice
+            folded = [file for file in sorted(folded) if os.path.exists(os.path.join(self.directory, file))]
+            self._write(self.AGGREGATE_FILE, {
+                'samples': [[name, list(map(list, labels)), value] for (name, labels), value in values.items()],
+                'histograms': [[name, list(map(list, labels)), counts] for (name, labels), counts in histograms.items()],
+                'folded': folded
+            })
+            for file in folded:
+                try:
+                    os.remove(os.path.join(self.directory, file))
+                except FileNotFoundError:
+                    pass
+
+    def close(self):
+        """Stop the flush thread and write a final snapshot."""
+        self._stop.set()
+        self.flush()
+
+    def collect(self) -> Tuple[Dict[Tuple, float], Dict[Tuple, list]]:
+        """
+        Merge the snapshots of all processes, refreshing this process's first.
+
+        Returns:
+            tuple: Sample values and histogram counts keyed by (name, labels)
+        """
+        self.flush()
+        snapshots, exited = [], []
+        for file in os.listdir(self.directory):
+            if not (file.startswith('metrics_') and file.endswith('.json')):
+                continue
+            snapshot = self._read(file)
+            if snapshot is None:
+                continue
+            if process_alive(snapshot['pid'], snapshot.get('started')):
+                snapshots.append(snapshot)
+            else:
+                exited.append(file)
+        if exited:
+            self._fold_exited(exited)
+
+        values = defaultdict(float)
+        histograms = {}
+        aggregate = self._read(self.AGGREGATE_FILE)
+        if aggregate is not None:
+            self._merge(values, histograms, aggregate)
+        for snapshot in snapshots:
+            self._merge(values, histograms, snapshot)
+        return values, histograms
+
+    def render(self, live_samples: Iterable[Sample] = ()) -> str:
+        """
+        Render every process's metrics in the Prometheus text format.
+
+        Args:
+            live_samples (iterable, optional): Extra (name, labels, value)
+                samples read at scrape time from state already shared by
+                all processes, such as the job store
+
+        Returns:
+            str: Exposition text
+        """
+        values, histograms = self.collect()
+        for name, labels, value in live_samples:
+            values[(name, _label_key(labels))] = value
+
+        families = defaultdict(list)
+        for (name, labels), value in values.items():
+            families[name].append((labels, value))
+        for (name, labels), counts in histograms.items():
+            families[name].append((labels, counts))
+
+        lines = []
+        for name in sorted(families):
+            kind, help_text = self._metrics.get(name, ('untyped', ''))
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} {kind}')
+            for labels, value in sorted(families[name]):
+                if kind != 'histogram':
+                    lines.append(f'{name}{_format_labels(labels)} {_format_value(value)}')
+                    continue
+                cumulative = 0
+                for bound, count in zip(self.buckets + (float('inf'),), value):
+                    cumulative += count
+                    le = '+Inf' if bound == float('inf') else repr(bound)
+                    lines.append(f'{name}_bucket{_format_labels(labels + (("le", le),))} {cumulative}')
+                lines.append(f'{name}_sum{_format_labels(labels)} {_format_value(value[-1])}')
+                lines.append(f'{name}_count{_format_labels(labels)} {cumulative}')
+        return '\n'.join(lines) + '\n'
+
+
+def init_metrics(app, registry: MetricsRegistry):
+    """
+    Count requests per route and record their latency and in-flight count.
+
+    Requests that match no route are labelled '<unmatched>' so arbitrary
+    paths cannot create new series.
+
+    Args:
+        app (Flask): Flask application instance
+        registry (MetricsRegistry): Registry the samples are recorded in
+    """
+    registry.describe('crl_http_requests_total', 'counter', 'HTTP requests by method, route and status.')
+    registry.describe('crl_http_request_duration_seconds', 'histogram', 'HTTP request latency by method and route.')
+    registry.describe('crl_http_requests_in_flight', 'gauge', 'HTTP requests currently being handled.')
+
+    @app.before_request
+    def start_request_metrics():
+        g.metrics_started = time.perf_counter()
+        registry.inc('crl_http_requests_in_flight')
+
+    @app.after_request
+    def record_response_status(response):
+        g.metrics_status = response.status_code
+        return response
+
+    @app.teardown_request
+    def finish_request_metrics(error=None):
+        started = g.pop('metrics_started', None)
+        if started is None:
+            return
+        status = g.pop('metrics_status', 500)
+        route = request.url_rule.rule if request.url_rule is not None else '<unmatched>'
+        registry.inc('crl_http_requests_in_flight', value=-1)
+        registry.inc('crl_http_requests_total', {'method': request.method, 'route': route, 'status': status})
+        registry.observe('crl_http_request_duration_seconds', time.perf_counter() - started,
+                         {'method': request.method, 'route': route})
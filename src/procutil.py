@@ -0,0 +1,66 @@
+import os
+import weakref
+from contextlib import contextmanager
+from typing import Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows, where the development server runs a single process
+    fcntl = None
+
+
+def register_after_fork(obj, method_name: str):
+    """
+    Call ``obj.<method_name>()`` in child processes after a fork.
+
+    Threads and SQLite connections do not survive ``fork()``, which gunicorn
+    uses to start workers (with ``--preload`` after the app was imported).
+    Only a weak reference is held so short-lived instances can be collected.
+    """
+    if not hasattr(os, 'register_at_fork'):
+        return
+    ref = weakref.ref(obj)
+
+    def after_in_child():
+        target = ref()
+        if target is not None:
+            getattr(target, method_name)()
+
+    os.register_at_fork(after_in_child=after_in_child)
+
+
+@contextmanager
+def file_lock(path: str):
+    """Hold an exclusive lock on ``path`` across processes, where the platform supports it."""
+    if fcntl is None:
+        yield
+        return
+    with open(path, 'a') as handle:
+        fcntl.flock(handle, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(handle, fcntl.LOCK_UN)
+
+
+def process_start(pid: int) -> Optional[str]:
+    """Start time of a process in clock ticks since boot, or None where there is no /proc."""
+    try:
+        with open(f'/proc/{pid}/stat', 'rb') as f:
+            stat = f.read()
+    except OSError:
+        return None
+    # The command name may contain spaces, so count fields from its closing parenthesis
+    return stat[stat.rindex(b')') + 2:].split()[19].decode()
+
+
+def process_alive(pid: int, started: Optional[str] = None) -> bool:
+    """Whether process ``pid`` is running and, when ``started`` is known, is the one that recorded it rather than a reused pid."""
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    current = process_start(pid)
+    return started is None or current is None or current == started
@@ -0,0 +1,237 @@
+import os
+import io
+import hmac
+import json
+import time
+import uuid
+import pstats
+import hashlib
+import cProfile
+import threading
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional
+
+from flask import g, request
+
+# Header and query parameter carrying a profiling token
+PROFILE_HEADER = 'X-CRL-Profile'
+PROFILE_PARAM = '_profile'
+
+
+def sign_profile_request(secret: str, path: str, expires: int) -> str:
+    """
+    Build the token that asks for ``path`` to be profiled.
+
+    Args:
+        secret (str): Shared profiling secret
+        path (str): Request path, without the query string
+        expires (int): Unix time after which the token is refused
+
+    Returns:
+        str: Token of the form '<expires>.<hex HMAC-SHA256>'
+    """
+    digest = hmac.new(secret.encode('utf-8'), f"{path}\n{expires}".encode('utf-8'), hashlib.sha256).hexdigest()
+    return f"{expires}.{digest}"
+
+
+class RequestProfiler:
+    """
+    Profile single requests on demand with cProfile.
+
+    A request is profiled only if it carries a token from
+    sign_profile_request() for its own path that has not expired, so the
+    feature can stay enabled in production without letting anyone slow the
+    server down. Each profile is written as a pstats file with a JSON
+    summary next to it; only the newest ``max_profiles`` are kept. One
+    request per process is profiled at a time, as Python allows a single
+    active profiler.
+    """
+
+    def __init__(self, directory: str, secret: str, max_profiles: int = 50, max_token_age: int = 3600):
+        """
+        Initialize the profiler.
+
+        Args:
+            directory (str): Directory profiles are written to
+            secret (str): Shared secret tokens are signed with
+            max_profiles (int, optional): Number of profiles kept
+            max_token_age (int, optional): Longest accepted token lifetime in seconds
+        """
+        self.directory = directory
+        self.secret = secret
+        self.max_profiles = max_profiles
+        self.max_token_age = max_token_age
+        self._busy = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def authorized(self, path: str, token: Optional[str]) -> bool:
+        """
+        Check a profiling token.
+
+        Args:
+            path (str): Request path the token must be signed for
+            token (str): Token from the request, if any
+
+        Returns:
+            bool: True if the token is valid and current
+        """
+        if not token or '.' not in token:
+            return False
+        expires, _ = token.split('.', 1)
+        if not expires.isdigit():
+            return False
+        remaining = int(expires) - time.time()
+        if remaining < 0 or remaining > self.max_token_age:
+            return False
+        return hmac.compare_digest(token, sign_profile_request(self.secret, path, int(expires)))
+
+    def start(self) -> Optional[cProfile.Profile]:
+        """
+        Start profiling the current thread.
+
+        Returns:
+            The running profiler, or None if another request is being profiled
+        """
+        if not self._busy.acquire(blocking=False):
+            return None
+        profile = cProfile.Profile()
+        profile.enable()
+        return profile
+
+    def stop(self, profile: cProfile.Profile):
+        """
+        Stop a profiler returned by start().
+
+        Args:
+            profile (cProfile.Profile): Running profiler
+        """
+        profile.disable()
+        self._busy.release()
+
+    def save(self, profile: cProfile.Profile, details: Dict[str, Any], top: int = 15) -> str:
+        """
+        Write a stopped profile and its summary, then apply the retention cap.
+
+        Args:
+            profile (cProfile.Profile): Stopped profiler
+            details (dict): Request details to store in the summary
+            top (int, optional): Number of functions listed in the summary
+
+        Returns:
+            str: Profile id
+        """
+        # Ids sort chronologically, which retention and recent() rely on
+        profile_id = f"{datetime.utcnow().strftime('%Y%m%dT%H%M%S%f')}_{uuid.uuid4().hex[:6]}"
+        profile.dump_stats(os.path.join(self.directory, f"{profile_id}.pstats"))
+
+        stats = pstats.Stats(profile, stream=io.StringIO())
+        functions = []
+        for (filename, line, function), (_, calls, own, cumulative, _) in stats.stats.items():
+            functions.append({'function': f"{os.path.basename(filename)}:{line}({function})",
+                              'calls': calls, 'own_seconds': round(own, 6),
+                              'cumulative_seconds': round(cumulative, 6)})
+        functions.sort(key=lambda entry: entry['cumulative_seconds'], reverse=True)
+
+        summary = dict(details, id=profile_id, created_at=time.time(),
+                       total_seconds=round(stats.total_tt, 6), top_functions=functions[:top])
+        with open(os.path.join(self.directory, f"{profile_id}.json"), 'w', encoding='utf-8') as f:
+            json.dump(summary, f, indent=2)
+        self._apply_retention()
+        return profile_id
+
+    def _apply_retention(self):
+        """Delete the oldest profiles beyond ``max_profiles``."""
+        ids = sorted(file[:-len('.pstats')] for file in os.listdir(self.directory) if file.endswith('.pstats'))
+        for profile_id in ids[:max(len(ids) - self.max_profiles, 0)]:
+            for suffix in ('.pstats', '.json'):
+                try:
+                    os.remove(os.path.join(self.directory, profile_id + suffix))
+                except FileNotFoundError:
+                    pass
+
+    def recent(self, limit: int = 50) -> List[Dict[str, Any]]:
+        """
+        List stored profiles, newest first.
+
+        Args:
+            limit (int, optional): Maximum number of profiles
+
+        Returns:
+            list: Summaries without the per-function breakdown
+        """
+        files = sorted((file for file in os.listdir(self.directory) if file.endswith('.json')), reverse=True)
+        profiles = []
+        for file in files[:limit]:
+            try:
+                with open(os.path.join(self.directory, file), encoding='utf-8') as f:
+                    summary = json.load(f)
+            except (OSError, ValueError):
+                continue
+            summary.pop('top_functions', None)
+            profiles.append(summary)
+        return profiles
+
+    def path_for(self, profile_id: str) -> Optional[str]:
+        """
+        Locate the pstats file of a profile.
+
+        Args:
+            profile_id (str): Profile id
+
+        Returns:
+            Path of the file, or None for unknown ids
+        """
+        if not profile_id.replace('_', '').isalnum():
+            return None
+        path = os.path.join(self.directory, f"{profile_id}.pstats")
+        return path if os.path.exists(path) else None
+
+
+def init_profiling(app, profiler: RequestProfiler, exclude_endpoints: Iterable[str] = ()):
+    """
+    Profile requests that carry a valid token in the X-CRL-Profile header or ``_profile`` query parameter.
+
+    Profiled responses get an X-CRL-Profile-Id header naming the stored
+    profile, or 'busy' if another request was being profiled.
+
+    Args:
+        app (Flask): Flask application instance
+        profiler (RequestProfiler): Profiler shared by the app's requests
+        exclude_endpoints (iterable, optional): Endpoints never profiled, such as the profile index
+    """
+    exclude_endpoints = frozenset(exclude_endpoints)
+
+    @app.before_request
+    def start_profiling():
+        token = request.headers.get(PROFILE_HEADER) or request.args.get(PROFILE_PARAM)
+        if token is None or request.endpoint in exclude_endpoints or not profiler.authorized(request.path, token):
+            return
+        g.profile_started = time.perf_counter()
+        g.profile = profiler.start()
+        if g.profile is None:
+            g.profile_busy = True
+
+    @app.after_request
+    def save_profile(response):
+        profile = g.pop('profile', None)
+        if profile is not None:
+            profiler.stop(profile)
+            profile_id = profiler.save(profile, {
+                'method': request.method,
+                'path': request.path,
+                'endpoint': request.endpoint,
+                'status': response.status_code,
+                'duration_seconds': round(time.perf_counter() - g.pop('profile_started'), 6)
+            })
+            app.logger.info(f"Profiled {request.method} {request.path} as {profile_id}")
+            response.headers['X-CRL-Profile-Id'] = profile_id
+        elif g.pop('profile_busy', False):
+            response.headers['X-CRL-Profile-Id'] = 'busy'
+        return response
+
+    @app.teardown_request
+    def stop_profiling(error=None):
+        # Requests that ended without a response must still release the profiler
+        profile = g.pop('profile', None)
+        if profile is not None:
+            profiler.stop(profile)
@@ -0,0 +1,244 @@
+import os
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Callable, Optional, Tuple
+
+import markdown2
+
+from .cache import SingleFlight
+from .eviction import FrequencySketch
+
+
+class MarkdownRenderCache:
+    """
+    Cache of rendered markdown shared by the Flask server and the static build.
+
+    Entries are keyed on (path, mtime, size, extras, variant), so an edited
+    file is re-rendered on the next read. The in-memory tier is an LRU
+    bounded by the total size of the cached HTML; an optional on-disk tier
+    keeps renders across restarts and between the build and the server.
+    Disk renders are touched when read, and once the tier grows past its
+    byte budget the least recently used files are deleted.
+    """
+
+    def __init__(self, max_bytes: int = 32 * 1024 * 1024, disk_dir: str = None,
+                 admission: str = None, max_disk_bytes: int = 256 * 1024 * 1024):
+        """
+        Initialize the render cache.
+
+        Args:
+            max_bytes (int, optional): Budget for cached HTML held in memory
+            disk_dir (str, optional): Directory for the persistent tier; disabled when None
+            admission (str, optional): 'tinylfu' to admit a new render only when it is
+                accessed more often than the entry it would evict; plain LRU when None
+            max_disk_bytes (int, optional): Budget for the on-disk tier
+        """
+        self.max_bytes = max_bytes
+        self.disk_dir = disk_dir
+        self.max_disk_bytes = max_disk_bytes
+        self.disk_bytes = 0
+
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._flight = SingleFlight()
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.rejections = 0
+        if admission not in (None, 'lru', 'tinylfu'):
+            raise ValueError(f"Unknown admission policy: {admission}")
+        # Renders average a few KB; size the sketch for the budget's entry count
+        self._sketch = FrequencySketch(max_bytes // 4096) if admission == 'tinylfu' else None
+        if self.disk_dir:
+            os.makedirs(self.disk_dir, exist_ok=True)
+            # Also trims a tier left over budget by earlier runs or a lower limit
+            self._collect_disk()
+
+    @staticmethod
+    def _normalize_extras(extras) -> Tuple:
+        if not extras:
+            return ()
+        if isinstance(extras, dict):
+            return tuple(sorted((k, repr(v)) for k, v in extras.items()))
+        return tuple(sorted(extras))
+
+    def _disk_path(self, key: Tuple) -> str:
+        digest = hashlib.sha1(repr(key).encode('utf-8')).hexdigest()
+        return os.path.join(self.disk_dir, f"{digest}.html")
+
+    def _read_disk(self, key: Tuple) -> Optional[str]:
+        path = self._disk_path(key)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                html = f.read()
+            # The mtime records the last use for _collect_disk
+            os.utime(path)
+            return html
+        except OSError:
+            return None
+
+    def _write_disk(self, key: Tuple, html: str):
+        path = self._disk_path(key)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        data = html.encode('utf-8')
+        try:
+            with open(tmp_path, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except OSError:
+            # The disk tier is best effort; memory still holds the render
+            return
+        with self._lock:
+            self.disk_bytes += len(data)
+            over_budget = self.disk_bytes > self.max_disk_bytes
+        if over_budget:
+            self._collect_disk()
+
+    def _collect_disk(self):
+        """Delete the least recently used disk renders until the tier is at 90% of its budget."""
+        files, total = [], 0
+        try:
+            with os.scandir(self.disk_dir) as it:
+                for entry in it:
+                    if not entry.name.endswith('.html'):
+                        continue
+                    try:
+                        stat = entry.stat()
+                    except OSError:
+                        continue
+                    files.append((stat.st_mtime_ns, stat.st_size, entry.path))
+                    total += stat.st_size
+        except OSError:
+            return
+        if total > self.max_disk_bytes:
+            target = self.max_disk_bytes * 9 // 10
+            for _, size, path in sorted(files):
+                if total <= target:
+                    break
+                try:
+                    os.remove(path)
+                except OSError:
+                    # Another process sharing the directory removed it first
+                    pass
+                total -= size
+        with self._lock:
+            self.disk_bytes = total
+
+    def _store(self, key: Tuple, html: str):
+        size = len(html.encode('utf-8'))
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.current_bytes -= previous[1]
+            elif self._sketch is not None and self._entries and self.current_bytes + size > self.max_bytes:
+                # Admission: a render only displaces a more popular LRU victim
+                victim_key = next(iter(self._entries))
+                if self._sketch.frequency(key[0]) <= self._sketch.frequency(victim_key[0]):
+                    self.rejections += 1
+                    return
+            self._entries[key] = (html, size)
+            self.current_bytes += size
+            while self.current_bytes > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self.current_bytes -= evicted_size
+
+    def render_file(self, path: str, extras=None, variant: str = '',
+                    preprocess: Callable[[str], str] = None) -> str:
+        """
+        Render a markdown file to HTML, reusing a cached render when the file is unchanged.
+
+        Args:
+            path (str): Markdown file to render
+            extras (list or dict, optional): markdown2 extras
+            variant (str, optional): Distinguishes renders of the same file produced
+                with a different ``preprocess`` step
+            preprocess (callable, optional): Transform applied to the file text before
+                rendering; must depend on the file content only
+
+        Returns:
+            Rendered HTML
+
+        Raises:
+            FileNotFoundError: If the file does not exist
+        """
+        stat = os.stat(path)
+        key = (os.path.abspath(path), stat.st_mtime_ns, stat.st_size,
+               self._normalize_extras(extras), variant)
+
+        with self._lock:
+            if self._sketch is not None:
+                self._sketch.increment(key[0])
+            cached = self._entries.get(key)
+            if cached is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return cached[0]
+
+        # Concurrent misses for the same render wait on one parse
+        return self._flight.do(key, self._load, key, path, extras, preprocess)
+
+    def _load(self, key: Tuple, path: str, extras, preprocess: Optional[Callable[[str], str]]) -> str:
+        """Fill the memory tier from disk, or render the file on a full miss."""
+        # A previous flight may have finished between the caller's lookup and ours
+        with self._lock:
+            cached = self._entries.get(key)
+            if cached is not None:
+                return cached[0]
+
+        html = self._read_disk(key) if self.disk_dir else None
+        if html is None:
+            with self._lock:
+                self.misses += 1
+            with open(path, 'r', encoding='utf-8') as f:
+                text = f.read()
+            if preprocess is not None:
+                text = preprocess(text)
+            html = markdown2.markdown(text, extras=extras)
+            if self.disk_dir:
+                self._write_disk(key, html)
+        else:
+            with self._lock:
+                self.hits += 1
+
+        self._store(key, html)
+        return html
+
+    def clear(self):
+        """Drop all in-memory renders and, if enabled, the on-disk tier."""
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+        if self.disk_dir and os.path.isdir(self.disk_dir):
+            for file in os.listdir(self.disk_dir):
+                if file.endswith('.html'):
+                    os.remove(os.path.join(self.disk_dir, file))
+            with self._lock:
+                self.disk_bytes = 0
+
+    def stats(self) -> dict:
+        """
+        Report cache effectiveness.
+
+        Returns:
+            dict: Hit/miss counters, memory and disk usage
+        """
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'rejections': self.rejections,
+            'entries': len(self._entries),
+            'bytes': self.current_bytes,
+            'max_bytes': self.max_bytes,
+            'disk_bytes': self.disk_bytes
+        }
+
+
+# Process-wide instance shared by local_server and the Library_Resources build
+markdown_cache = MarkdownRenderCache(
+    disk_dir=os.environ.get('CRL_RENDER_CACHE_DIR'),
+    admission=os.environ.get('CRL_RENDER_CACHE_ADMISSION', 'tinylfu'),
+    max_disk_bytes=int(os.environ.get('CRL_RENDER_CACHE_DISK_BYTES', 256 * 1024 * 1024))
+)
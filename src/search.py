@@ -0,0 +1,832 @@
+import os
+import re
+import sys
+import json
+import math
+import html
+import time
+import zlib
+import bisect
+import heapq
+import operator
+import threading
+from array import array
+from itertools import accumulate, compress
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from .catalog import TemplateCatalog
+from .eviction import LRUCache
+from .facets import bitmap_ids, bitmap_count
+from .procutil import register_after_fork
+
+TOKEN_PATTERN = re.compile(r'\w+', re.UNICODE)
+PHRASE_PATTERN = re.compile(r'"([^"]+)"')
+MAX_TOKEN_LENGTH = 64
+
+INDEX_MAGIC = b'KLSEARCH1\n'
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Split text into lowercase index terms.
+
+    Args:
+        text (str): Plain text
+
+    Returns:
+        list: Terms in document order
+    """
+    return [token for token in TOKEN_PATTERN.findall(text.lower()) if len(token) <= MAX_TOKEN_LENGTH]
+
+
+def make_snippet(text: str, terms: Iterable[str], width: int = 30) -> str:
+    """
+    Pick the window of ``width`` words holding the most query terms and
+    highlight them.
+
+    Args:
+        text (str): Plain document text
+        terms (iterable): Lowercase query terms
+        width (int, optional): Snippet length in words
+
+    Returns:
+        str: HTML-escaped snippet with matches wrapped in <mark>
+    """
+    terms = set(terms)
+    tokens = list(TOKEN_PATTERN.finditer(text))
+    if not tokens:
+        return ''
+    hits = [index for index, match in enumerate(tokens) if match.group().lower() in terms]
+
+    start = best = 0
+    low = 0
+    for high, position in enumerate(hits):
+        while position - hits[low] >= width:
+            low += 1
+        if high - low + 1 > best:
+            best = high - low + 1
+            start = max(hits[low] - 3, 0)
+    end = min(start + width, len(tokens))
+
+    parts = ['…' if start else '']
+    cursor = tokens[start].start()
+    for match in tokens[start:end]:
+        parts.append(html.escape(text[cursor:match.start()]))
+        word = html.escape(match.group())
+        parts.append(f'<mark>{word}</mark>' if match.group().lower() in terms else word)
+        cursor = match.end()
+    if end < len(tokens):
+        parts.append('…')
+    return ' '.join(''.join(parts).split())
+
+
+class _Impact:
+    """Score-ordered copy of one feature's postings below ``watermark``."""
+    __slots__ = ('watermark', 'ordered_ids', 'ordered_scores', 'scores', 'bitmap')
+
+    def __init__(self, watermark: int, ordered_ids: array, ordered_scores: array, scores: array, bitmap: int):
+        self.watermark = watermark
+        self.ordered_ids = ordered_ids
+        self.ordered_scores = ordered_scores
+        self.scores = scores
+        self.bitmap = bitmap
+
+
+def _ids_bitmap(ids: Iterable[int]) -> int:
+    """Build an int bitset from document ids."""
+    bits = bytearray()
+    for doc_id in ids:
+        byte = doc_id >> 3
+        if byte >= len(bits):
+            bits.extend(bytes(byte + 1 - len(bits)))
+        bits[byte] |= 1 << (doc_id & 7)
+    return int.from_bytes(bits, 'little')
+
+
+def _pair_hash(pair: str) -> int:
+    """Stable 32-bit key of a word pair; Python's hash() changes per process."""
+    return zlib.crc32(pair.encode('utf-8'))
+
+
+class SearchIndex:
+    """
+    Positional inverted index ranked with BM25.
+
+    Document ids only grow: a changed document is removed (tombstoned) and
+    re-added under a new id, so every posting list stays sorted and updates
+    are appends. Tombstones are dropped when the index is compacted on
+    save; as in Lucene, document frequencies include them until then.
+
+    Word postings are parallel ``array('I')`` columns of document ids, term
+    frequencies and positions. Adjacent word pairs are indexed too, so a
+    phrase narrows its candidates before any positions are read; pair
+    postings live in a fixed number of hashed buckets of flat arrays to
+    bound the per-pair overhead. Pairs are keyed by a 32-bit hash, so
+    phrase matches are confirmed against word positions: up front for
+    longer phrases, and for two-word phrases only as the ranking loop
+    reaches a document. A two-word phrase's total is therefore exact for
+    the documents visited and may count a hash collision among the rest.
+
+    Queries run Fagin's threshold algorithm over impact-ordered postings,
+    so the top results of a common word cost about ``limit`` steps.
+    Impact orders of features with at least ``HEAVY_POSTINGS`` postings are
+    cached; documents added after an order was computed are scored
+    directly until prepare() rebuilds it.
+    """
+
+    K1 = 1.2
+    B = 0.75
+    HEAVY_POSTINGS = 256
+    PAIR_BUCKETS = 16384
+
+    def __init__(self):
+        """Create an empty index."""
+        self.documents = []
+        self.lengths = array('I')
+        self.keys = {}
+        self.total_length = 0
+        self._tombstones = set()
+        self._tombstone_bits = 0
+        self._word_ids = {}
+        self._word_tfs = {}
+        self._offsets = {}
+        self._positions = {}
+        self._pair_hashes = [array('I') for _ in range(self.PAIR_BUCKETS)]
+        self._pair_ids = [array('I') for _ in range(self.PAIR_BUCKETS)]
+        self._pair_tfs = [array('I') for _ in range(self.PAIR_BUCKETS)]
+        self._norms = array('d')
+        self._impacts = {}
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    @property
+    def deleted(self) -> int:
+        """Number of tombstoned documents awaiting compaction."""
+        return len(self._tombstones)
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Look up a document's stored fields.
+
+        Args:
+            key (str): Document key
+
+        Returns:
+            dict or None
+        """
+        doc_id = self.keys.get(key)
+        return self.documents[doc_id] if doc_id is not None else None
+
+    def _norm(self, length: int) -> float:
+        """BM25 length normalisation against the current average length."""
+        average = self.total_length / len(self.keys) if self.keys else 0
+        return self.K1 * (1 - self.B + self.B * length / average) if average else self.K1
+
+    def _weight(self, frequency: int) -> float:
+        """BM25 idf times (k1 + 1) for a feature in ``frequency`` documents."""
+        return math.log(1 + (len(self.documents) - frequency + 0.5) / (frequency + 0.5)) * (self.K1 + 1)
+
+    def add(self, key: str, text: str, **fields: Any) -> int:
+        """
+        Index a document, replacing any previous version with the same key.
+
+        Args:
+            key (str): Unique document key
+            text (str): Plain text to index
+            **fields: Stored fields returned with search results
+
+        Returns:
+            int: Internal document id
+        """
+        tokens = tokenize(text)
+        term_positions = {}
+        for position, token in enumerate(tokens):
+            term_positions.setdefault(token, []).append(position)
+        pair_counts = {}
+        for pair in map(' '.join, zip(tokens, tokens[1:])):
+            pair_counts[pair] = pair_counts.get(pair, 0) + 1
+
+        with self._lock:
+            self.remove(key)
+            doc_id = len(self.documents)
+            for term, positions in term_positions.items():
+                if term not in self._word_ids:
+                    for column in (self._word_ids, self._word_tfs, self._offsets, self._positions):
+                        column[term] = array('I')
+                self._word_ids[term].append(doc_id)
+                self._word_tfs[term].append(len(positions))
+                self._offsets[term].append(len(self._positions[term]))
+                self._positions[term].extend(positions)
+            for pair, count in pair_counts.items():
+                pair_key = _pair_hash(pair)
+                bucket = pair_key % self.PAIR_BUCKETS
+                self._pair_hashes[bucket].append(pair_key)
+                self._pair_ids[bucket].append(doc_id)
+                self._pair_tfs[bucket].append(count)
+
+            self.documents.append(dict(fields, key=key))
+            self.lengths.append(len(tokens))
+            self.keys[key] = doc_id
+            self.total_length += len(tokens)
+            self._norms.append(self._norm(len(tokens)))
+            return doc_id
+
+    def remove(self, key: str) -> bool:
+        """
+        Tombstone a document.
+
+        Args:
+            key (str): Document key
+
+        Returns:
+            bool: True if the document was indexed
+        """
+        with self._lock:
+            doc_id = self.keys.pop(key, None)
+            if doc_id is None:
+                return False
+            self.documents[doc_id] = None
+            self.total_length -= self.lengths[doc_id]
+            self._norms[doc_id] = math.inf
+            self._tombstones.add(doc_id)
+            self._tombstone_bits |= 1 << doc_id
+            return True
+
+    def _postings(self, feature: str) -> Tuple[Any, Optional[array], Optional[array]]:
+        """
+        Return the cache key, document ids and term frequencies of a word or word pair.
+        """
+        if ' ' not in feature:
+            return feature, self._word_ids.get(feature), self._word_tfs.get(feature)
+        pair_key = _pair_hash(feature)
+        bucket = pair_key % self.PAIR_BUCKETS
+        selectors = list(map(pair_key.__eq__, self._pair_hashes[bucket]))
+        ids = array('I', compress(self._pair_ids[bucket], selectors))
+        if not ids:
+            return pair_key, None, None
+        return pair_key, ids, array('I', compress(self._pair_tfs[bucket], selectors))
+
+    def _impact(self, cache_key: Any, ids: array, tfs: array) -> _Impact:
+        impact = self._impacts.get(cache_key)
+        if impact is None:
+            weight = self._weight(len(ids))
+            denominators = map(operator.add, tfs, map(self._norms.__getitem__, ids))
+            scores = array('d', map(weight.__mul__, map(operator.truediv, tfs, denominators)))
+            order = sorted(range(len(ids)), key=scores.__getitem__, reverse=True)
+            impact = _Impact(len(self.documents), array('I', map(ids.__getitem__, order)),
+                             array('d', map(scores.__getitem__, order)), scores, _ids_bitmap(ids))
+            if len(ids) >= self.HEAVY_POSTINGS:
+                self._impacts[cache_key] = impact
+        return impact
+
+    def _feature(self, feature: str) -> Optional[Dict[str, Any]]:
+        """Posting view of one word or word pair for a query, or None if absent."""
+        cache_key, ids, tfs = self._postings(feature)
+        if ids is None:
+            return None
+        impact = self._impact(cache_key, ids, tfs)
+        tail = bisect.bisect_left(ids, impact.watermark)
+        view = {'ids': ids, 'tfs': tfs, 'impact': impact, 'weight': self._weight(len(ids))}
+        tail_ids = ids[tail:]
+        tail_scores = [self._score(view, doc_id) for doc_id in tail_ids]
+        order = sorted(range(len(tail_ids)), key=tail_scores.__getitem__, reverse=True)
+        view['tail'] = ([tail_ids[i] for i in order], [tail_scores[i] for i in order])
+        view['bitmap'] = impact.bitmap | _ids_bitmap(tail_ids)
+        view['max_score'] = max(impact.ordered_scores[:1].tolist() + view['tail'][1][:1] + [0.0])
+        return view
+
+    def _score(self, view: Dict[str, Any], doc_id: int) -> float:
+        """Score of one document for a feature view; 0 if it lacks the feature."""
+        ids = view['ids']
+        index = bisect.bisect_left(ids, doc_id)
+        if index == len(ids) or ids[index] != doc_id:
+            return 0.0
+        if doc_id < view['impact'].watermark:
+            return view['impact'].scores[index]
+        tf = view['tfs'][index]
+        return view['weight'] * tf / (tf + self._norms[doc_id])
+
+    def _contains_phrase(self, doc_id: int, phrase: List[str]) -> bool:
+        """Check word positions for a phrase of two or more words."""
+        starts = None
+        for offset, term in enumerate(phrase):
+            ids = self._word_ids[term]
+            index = bisect.bisect_left(ids, doc_id)
+            if index == len(ids) or ids[index] != doc_id:
+                return False
+            start = self._offsets[term][index]
+            shifted = map(offset.__rsub__, self._positions[term][start:start + self._word_tfs[term][index]])
+            starts = set(shifted) if starts is None else starts.intersection(shifted)
+            if not starts:
+                return False
+        return True
+
+    def search(self, query: str, limit: int = 10) -> Tuple[List[Tuple[float, Dict[str, Any]]], int, List[str]]:
+        """
+        Rank documents against a query.
+
+        Bare words are optional and ranked by BM25; quoted phrases must
+        appear verbatim in every result.
+
+        Args:
+            query (str): Query text, e.g. ``email "press release"``
+            limit (int, optional): Number of results
+
+        Returns:
+            tuple: ([(score, stored fields)], total matches, query terms)
+        """
+        phrases = [phrase for phrase in map(tokenize, PHRASE_PATTERN.findall(query)) if phrase]
+        words = tokenize(PHRASE_PATTERN.sub(' ', query))
+        terms = list(dict.fromkeys(words + [term for phrase in phrases for term in phrase]))
+
+        required = []
+        for phrase in phrases:
+            required.extend(map(' '.join, zip(phrase, phrase[1:])) if len(phrase) > 1 else phrase)
+        required = list(dict.fromkeys(required))
+        long_phrases = [phrase for phrase in phrases if len(phrase) > 2]
+        # Pair keys are hashes, so pair postings may hold colliding pairs;
+        # two-word phrases are confirmed only for the documents visited below
+        pair_phrases = [phrase for phrase in phrases if len(phrase) == 2]
+
+        with self._lock:
+            views = {}
+            for feature in required:
+                views[feature] = self._feature(feature)
+                if views[feature] is None:
+                    return [], 0, terms
+            optional = []
+            for word in dict.fromkeys(words):
+                if word not in views:
+                    views[word] = self._feature(word)
+                    if views[word] is not None:
+                        optional.append(word)
+            if not required and not optional:
+                return [], 0, terms
+
+            matches = None
+            if required:
+                matches = views[required[0]]['bitmap']
+                for feature in required[1:]:
+                    matches &= views[feature]['bitmap']
+                matches &= ~self._tombstone_bits
+                if long_phrases:
+                    matches = _ids_bitmap(
+                        doc_id for doc_id in bitmap_ids(matches)
+                        if all(self._contains_phrase(doc_id, phrase) for phrase in long_phrases))
+                total = bitmap_count(matches)
+            else:
+                union = 0
+                for word in optional:
+                    union |= views[word]['bitmap']
+                total = bitmap_count(union & ~self._tombstone_bits)
+
+            # Threshold algorithm: walk the driving lists in score order until
+            # no unseen document can beat the current top results
+            driving = []
+            for feature in (required or optional):
+                view = views[feature]
+                driving.append((view['impact'].ordered_ids, view['impact'].ordered_scores))
+                if view['tail'][0]:
+                    driving.append(view['tail'])
+            scoring = [views[feature] for feature in required + optional]
+            bonus = sum(views[word]['max_score'] for word in optional) if required else 0.0
+
+            heap, seen = [], set(self._tombstones)
+            longest = max(len(ordered_ids) for ordered_ids, _ in driving)
+            for depth in range(longest):
+                threshold = bonus
+                for ordered_ids, ordered_scores in driving:
+                    if depth >= len(ordered_ids):
+                        continue
+                    threshold += ordered_scores[depth]
+                    doc_id = ordered_ids[depth]
+                    if doc_id in seen or (matches is not None and not (matches >> doc_id) & 1):
+                        continue
+                    seen.add(doc_id)
+                    if pair_phrases and not all(self._contains_phrase(doc_id, phrase) for phrase in pair_phrases):
+                        total -= 1
+                        continue
+                    score = sum(self._score(view, doc_id) for view in scoring)
+                    if len(heap) < limit:
+                        heapq.heappush(heap, (score, -doc_id))
+                    elif score > heap[0][0]:
+                        heapq.heapreplace(heap, (score, -doc_id))
+                if len(heap) >= limit and heap[0][0] >= threshold:
+                    break
+
+            results = [(score, self.documents[-neg_id]) for score, neg_id in sorted(heap, reverse=True)]
+            return results, total, terms
+
+    def prepare(self):
+        """
+        Recompute length norms and the impact order of every heavy feature.
+
+        Queries stay exact without this, but run faster once the impact
+        orders cover recently added documents.
+        """
+        with self._lock:
+            self._norms = array('d', (
+                self._norm(length) if document is not None else math.inf
+                for document, length in zip(self.documents, self.lengths)
+            ))
+            self._impacts = {}
+            for word, ids in self._word_ids.items():
+                if len(ids) >= self.HEAVY_POSTINGS:
+                    self._impact(word, ids, self._word_tfs[word])
+            for hashes in self._pair_hashes:
+                if len(hashes) < self.HEAVY_POSTINGS:
+                    continue
+                counts = {}
+                for pair_key in hashes:
+                    counts[pair_key] = counts.get(pair_key, 0) + 1
+                for pair_key, count in counts.items():
+                    if count >= self.HEAVY_POSTINGS:
+                        bucket = pair_key % self.PAIR_BUCKETS
+                        selectors = list(map(pair_key.__eq__, hashes))
+                        self._impact(pair_key, array('I', compress(self._pair_ids[bucket], selectors)),
+                                     array('I', compress(self._pair_tfs[bucket], selectors)))
+
+    def compact(self):
+        """Drop tombstoned documents, renumber the rest and recompute derived state."""
+        with self._lock:
+            if not self._tombstones:
+                return
+            remap = array('i', [-1]) * len(self.documents)
+            documents, lengths = [], array('I')
+            for doc_id, document in enumerate(self.documents):
+                if document is not None:
+                    remap[doc_id] = len(documents)
+                    documents.append(document)
+                    lengths.append(self.lengths[doc_id])
+
+            for term in list(self._word_ids):
+                ids, tfs = self._word_ids[term], self._word_tfs[term]
+                offsets, positions = self._offsets[term], self._positions[term]
+                keep = [index for index, doc_id in enumerate(ids) if remap[doc_id] >= 0]
+                if not keep:
+                    for column in (self._word_ids, self._word_tfs, self._offsets, self._positions):
+                        del column[term]
+                    continue
+                new_offsets, new_positions = array('I'), array('I')
+                for index in keep:
+                    new_offsets.append(len(new_positions))
+                    new_positions.extend(positions[offsets[index]:offsets[index] + tfs[index]])
+                self._word_ids[term] = array('I', (remap[ids[index]] for index in keep))
+                self._word_tfs[term] = array('I', map(tfs.__getitem__, keep))
+                self._offsets[term], self._positions[term] = new_offsets, new_positions
+
+            for bucket in range(self.PAIR_BUCKETS):
+                ids = self._pair_ids[bucket]
+                selectors = [remap[doc_id] >= 0 for doc_id in ids]
+                self._pair_hashes[bucket] = array('I', compress(self._pair_hashes[bucket], selectors))
+                self._pair_tfs[bucket] = array('I', compress(self._pair_tfs[bucket], selectors))
+                self._pair_ids[bucket] = array('I', map(remap.__getitem__, compress(ids, selectors)))
+
+            self.documents, self.lengths = documents, lengths
+            self.keys = {document['key']: doc_id for doc_id, document in enumerate(documents)}
+            self._tombstones = set()
+            self._tombstone_bits = 0
+            self.prepare()
+
+    def save(self, path: str):
+        """
+        Compact the index and write it atomically.
+
+        The file is a magic line followed by a zlib stream holding a JSON
+        header (stored fields, word table and pair bucket sizes) and the
+        posting columns as raw arrays. Word document ids are stored as gaps
+        and position offsets are implied by the term frequencies, so the
+        columns compress well.
+
+        Args:
+            path (str): Destination file
+        """
+        with self._lock:
+            self.compact()
+            body = [self.lengths.tobytes()]
+            word_table = []
+            for term in sorted(self._word_ids):
+                ids = self._word_ids[term]
+                gaps = array('I', ids[:1]) + array('I', map(operator.sub, ids[1:], ids[:-1]))
+                body.extend((gaps.tobytes(), self._word_tfs[term].tobytes(), self._positions[term].tobytes()))
+                word_table.append([term, len(ids), len(self._positions[term])])
+            for columns in (self._pair_hashes, self._pair_ids, self._pair_tfs):
+                body.extend(column.tobytes() for column in columns)
+            header = json.dumps({
+                'byteorder': sys.byteorder,
+                'documents': self.documents,
+                'words': word_table,
+                'pair_buckets': [len(column) for column in self._pair_ids]
+            }, separators=(',', ':')).encode('utf-8')
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        with open(temp_path, 'wb') as f:
+            f.write(INDEX_MAGIC)
+            compressor = zlib.compressobj(6)
+            f.write(compressor.compress(len(header).to_bytes(8, 'little') + header))
+            for chunk in body:
+                f.write(compressor.compress(chunk))
+            f.write(compressor.flush())
+        os.replace(temp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> Optional['SearchIndex']:
+        """
+        Read an index written by save() and prepare it for queries.
+
+        Args:
+            path (str): Index file
+
+        Returns:
+            SearchIndex or None if the file is missing, unreadable or
+            written with a different pair bucket count
+        """
+        try:
+            with open(path, 'rb') as f:
+                if f.read(len(INDEX_MAGIC)) != INDEX_MAGIC:
+                    return None
+                data = zlib.decompress(f.read())
+            header_length = int.from_bytes(data[:8], 'little')
+            header = json.loads(data[8:8 + header_length].decode('utf-8'))
+        except (OSError, ValueError, zlib.error):
+            return None
+        if len(header.get('pair_buckets', ())) != cls.PAIR_BUCKETS:
+            return None
+
+        index = cls()
+        swap = header['byteorder'] != sys.byteorder
+        view = memoryview(data)
+        position = 8 + header_length
+
+        def column(count: int) -> array:
+            nonlocal position
+            values = array('I')
+            values.frombytes(view[position:position + count * values.itemsize])
+            position += count * values.itemsize
+            if swap:
+                values.byteswap()
+            return values
+
+        index.documents = header['documents']
+        index.lengths = column(len(index.documents))
+        for term, count, position_count in header['words']:
+            index._word_ids[term] = array('I', accumulate(column(count)))
+            index._word_tfs[term] = column(count)
+            index._offsets[term] = array('I', accumulate(index._word_tfs[term], initial=0))[:-1]
+            index._positions[term] = column(position_count)
+        for columns in (index._pair_hashes, index._pair_ids, index._pair_tfs):
+            columns[:] = [column(count) for count in header['pair_buckets']]
+        index.keys = {document['key']: doc_id for doc_id, document in enumerate(index.documents)}
+        index.total_length = sum(index.lengths)
+        index.prepare()
+        return index
+
+
+class LibrarySearch:
+    """
+    Full-text search over templates, markdown templates and knowledge blocks.
+
+    Keeps a SearchIndex in step with the template catalog and the
+    Library_Resources knowledge block folders. Catalog additions and
+    removals are applied on the next query; in-place edits are picked up by
+    a file fingerprint check that a background thread runs every
+    ``resync_interval`` seconds, which also persists the index, so queries
+    never pay for the stat sweep or the save.
+    """
+
+    def __init__(self, catalog: TemplateCatalog, library_dir: str,
+                 extractors: Dict[str, Callable[[str], str]], index_path: Optional[str] = None,
+                 resync_interval: float = 300.0, text_cache_size: int = 1024):
+        """
+        Initialize library search.
+
+        Args:
+            catalog (TemplateCatalog): Catalog of Templates_NEW and Templates_Markdown
+            library_dir (str): Library_Resources directory holding knowledge blocks
+            extractors (dict): Source name ('template', 'markdown', 'knowledge_block')
+                to a callable returning plain text for a file path
+            index_path (str, optional): File the index is persisted to
+            resync_interval (float, optional): Minimum seconds between fingerprint checks
+            text_cache_size (int, optional): Extracted document texts kept for snippets
+        """
+        self.catalog = catalog
+        self.library_dir = library_dir
+        self.extractors = extractors
+        self.index_path = index_path
+        self.resync_interval = resync_interval
+        self.index = None
+        self.dirty = False
+        self._catalog_version = None
+        self._last_resync = 0.0
+        self._lock = threading.Lock()
+        # Plain text of recent hits, keyed by their files' mtimes and sizes
+        self._texts = LRUCache(text_cache_size)
+        self._reset_resync_thread()
+        register_after_fork(self, '_reset_resync_thread')
+
+    def _reset_resync_thread(self):
+        """Forget the resync thread; it does not survive a fork."""
+        self._resync_thread = None
+        self._stop = threading.Event()
+
+    def _start_resync_thread(self):
+        with self._lock:
+            if self._resync_thread is not None:
+                return
+            self._resync_thread = threading.Thread(target=self._resync_loop, name='search-resync', daemon=True)
+        self._resync_thread.start()
+
+    def _resync_loop(self):
+        while not self._stop.wait(max(self.resync_interval - (time.monotonic() - self._last_resync), 0.0)):
+            if time.monotonic() - self._last_resync >= self.resync_interval:
+                self.resync()
+
+    def stop(self):
+        """Stop the background resync thread."""
+        self._stop.set()
+
+    @staticmethod
+    def _fingerprint(paths: List[str]) -> List[List[Any]]:
+        fingerprint = []
+        for path in paths:
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            fingerprint.append([os.path.basename(path), stat.st_mtime_ns, stat.st_size])
+        return fingerprint
+
+    def _catalog_sources(self) -> Dict[str, Dict[str, Any]]:
+        sources = {}
+        for entry in self.catalog.entries():
+            if entry.kind == 'new':
+                sources[f"template:{entry.name}"] = {
+                    'source': 'template', 'title': entry.name, 'url': f"/template/{entry.name}",
+                    'paths': [os.path.join(entry.path, 'README.md'), os.path.join(entry.path, 'template.md')]
+                }
+            else:
+                sources[f"markdown:{entry.name}"] = {
+                    'source': 'markdown', 'title': entry.name[:-3], 'url': f"/template/{entry.name}",
+                    'paths': [entry.path]
+                }
+        return sources
+
+    def _library_sources(self) -> Dict[str, Dict[str, Any]]:
+        sources = {}
+        try:
+            with os.scandir(self.library_dir) as it:
+                folders = [d for d in it if d.is_dir() and d.name.split('_', 1)[0].isdigit()]
+        except OSError:
+            return sources
+        for folder in folders:
+            try:
+                with os.scandir(folder.path) as it:
+                    paths = sorted(f.path for f in it if f.is_file() and f.name.endswith('.md'))
+            except OSError:
+                continue
+            if paths:
+                sources[f"knowledge_block:{folder.name}"] = {
+                    'source': 'knowledge_block', 'title': folder.name.split('_', 1)[-1].replace('_', ' '),
+                    'url': None, 'paths': paths
+                }
+        return sources
+
+    def _index_source(self, key: str, source: Dict[str, Any], fingerprint: List[List[Any]]):
+        extract = self.extractors[source['source']]
+        texts = [source['title']]
+        for path in source['paths']:
+            try:
+                texts.append(extract(path))
+            except (OSError, UnicodeDecodeError):
+                continue
+        self.index.add(key, '\n'.join(texts), source=source['source'], title=source['title'],
+                       url=source['url'], paths=source['paths'], fingerprint=fingerprint)
+
+    def _apply(self, sources: Dict[str, Dict[str, Any]], check_fingerprints: bool,
+               prefixes: Tuple[str, ...]) -> int:
+        """Index new or changed sources and drop vanished ones under ``prefixes``."""
+        changes = 0
+        for key, source in sources.items():
+            document = self.index.get(key)
+            if document is not None and not check_fingerprints:
+                continue
+            fingerprint = self._fingerprint(source['paths'])
+            if document is None or document.get('fingerprint') != fingerprint:
+                self._index_source(key, source, fingerprint)
+                changes += 1
+        for key in [key for key in self.index.keys if key.startswith(prefixes) and key not in sources]:
+            self.index.remove(key)
+            changes += 1
+        return changes
+
+    def resync(self):
+        """Check every indexed file's fingerprint and persist the index if anything changed."""
+        with self._lock:
+            self._resync_locked()
+
+    def _resync_locked(self):
+        """resync() with the lock already held."""
+        if self.index is None:
+            self.index = (SearchIndex.load(self.index_path) if self.index_path else None) or SearchIndex()
+        version = self.catalog.version
+        changes = self._apply(self._catalog_sources(), True, ('template:', 'markdown:'))
+        changes += self._apply(self._library_sources(), True, ('knowledge_block:',))
+        self._catalog_version = version
+        self._last_resync = time.monotonic()
+        if changes or self.dirty:
+            self.dirty = False
+            if self.index_path:
+                self.index.save(self.index_path)
+            self.index.prepare()
+
+    def ensure_current(self):
+        """Bring the index up to date with catalog changes; the first call loads and resyncs it."""
+        if self.index is None:
+            with self._lock:
+                if self.index is None:
+                    self._resync_locked()
+        if self._resync_thread is None:
+            self._start_resync_thread()
+        self.catalog.ensure_fresh()
+        if self.catalog.version != self._catalog_version:
+            with self._lock:
+                version = self.catalog.version
+                if self._apply(self._catalog_sources(), False, ('template:', 'markdown:')):
+                    self.dirty = True
+                self._catalog_version = version
+
+    def refresh_template(self, name: str):
+        """
+        Re-index one template directory after it was generated or changed.
+
+        Args:
+            name (str): Template directory name
+        """
+        if self.index is None:
+            return
+        entry = self.catalog.get(name)
+        with self._lock:
+            key = f"template:{name}"
+            if entry is None:
+                self.index.remove(key)
+            else:
+                source = {'source': 'template', 'title': name, 'url': f"/template/{name}",
+                          'paths': [os.path.join(entry.path, 'README.md'), os.path.join(entry.path, 'template.md')]}
+                self._index_source(key, source, self._fingerprint(source['paths']))
+            self.dirty = True
+
+    def _document_text(self, document: Dict[str, Any]) -> str:
+        """Plain text of a hit, extracted again only when one of its files changed."""
+        key = (document['source'], tuple(document['paths']), json.dumps(self._fingerprint(document['paths'])))
+        text = self._texts.get(key)
+        if text is None:
+            texts = []
+            for path in document['paths']:
+                try:
+                    texts.append(self.extractors[document['source']](path))
+                except (OSError, UnicodeDecodeError):
+                    continue
+            text = '\n'.join(texts)
+            self._texts.put(key, text)
+        return text
+
+    def save(self):
+        """Persist the index if it changed since it was last written."""
+        with self._lock:
+            if self.index is not None and self.dirty and self.index_path:
+                self.index.save(self.index_path)
+                self.dirty = False
+
+    def search(self, query: str, limit: int = 10) -> Dict[str, Any]:
+        """
+        Run a query and build highlighted snippets for the results.
+
+        Args:
+            query (str): Query text; quote words to require a phrase
+            limit (int, optional): Number of results
+
+        Returns:
+            dict: Query, total matches, results and elapsed milliseconds
+        """
+        started = time.perf_counter()
+        self.ensure_current()
+        hits, total, terms = self.index.search(query, limit)
+
+        results = []
+        for score, document in hits:
+            results.append({
+                'title': document['title'],
+                'source': document['source'],
+                'url': document['url'],
+                'score': round(score, 4),
+                'snippet': make_snippet(self._document_text(document), terms)
+            })
+        return {
+            'query': query,
+            'total': total,
+            'results': results,
+            'took_ms': round((time.perf_counter() - started) * 1000, 2)
+        }
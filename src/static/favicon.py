@@ -1,41 +1,19 @@
-from flask import send_from_directory
-import os
+from flask import Response, request
 
-def serve_favicon(app):
+def serve_favicon(app, assets):
     """
-    Serve favicon with proper error handling
+    Serve the favicon precomputed in the asset table
     
     Args:
         app (Flask): Flask application instance
+        assets (AssetTable): Static assets loaded at startup
     """
+    favicon_asset = assets.get('favicon.ico')
+    
     @app.route('/favicon.ico')
     def favicon():
-        try:
-            # Ensure static directory exists
-            static_dir = os.path.join(app.root_path, 'static')
-            os.makedirs(static_dir, exist_ok=True)
-            
-            # Default favicon generation
-            default_favicon_path = os.path.join(static_dir, 'favicon.ico')
-            
-            # If favicon doesn't exist, create a minimal one
-            if not os.path.exists(default_favicon_path):
-                from PIL import Image, ImageDraw
-                
-                # Create a simple 16x16 icon
-                icon = Image.new('RGBA', (16, 16), (255, 255, 255, 0))
-                draw = ImageDraw.Draw(icon)
-                draw.rectangle([0, 0, 15, 15], fill=(33, 150, 243, 255))  # Material Blue
-                
-                icon.save(default_favicon_path, 'ICO')
-            
-            return send_from_directory(
-                static_dir, 
-                'favicon.ico', 
-                mimetype='image/x-icon'
-            )
-        
-        except Exception as e:
-            # Log the error but return a 204 No Content
-            app.logger.error(f"Favicon error: {e}")
-            return '', 204
+        # Browsers request this fixed URL, so it is cached for a day rather than forever
+        response = Response(favicon_asset.body, mimetype='image/x-icon')
+        response.headers['Cache-Control'] = 'public, max-age=86400'
+        response.set_etag(favicon_asset.etag)
+        return response.make_conditional(request)
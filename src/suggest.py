@@ -0,0 +1,411 @@
+import os
+import re
+import json
+import bisect
+import logging
+import heapq
+import threading
+import time
+from array import array
+from itertools import chain
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from .catalog import TemplateCatalog, CatalogEntry
+from .eviction import LRUCache
+from .procutil import file_lock, register_after_fork
+
+SEPARATOR_PATTERN = re.compile(r'[\s_\-]+')
+
+
+def normalize(text: str) -> str:
+    """
+    Fold text to the form suggestion keys and prefixes are compared in.
+
+    Args:
+        text (str): Name, title, tag or typed prefix
+
+    Returns:
+        str: Lowercase text with underscores, dashes and whitespace runs as single spaces
+    """
+    return SEPARATOR_PATTERN.sub(' ', text.lower()).strip()
+
+
+class SuggestIndex:
+    """
+    Prefix index over template names, titles and tags.
+
+    Keys live in one sorted list with a parallel ``array('I')`` of document
+    ids, so every key starting with a prefix is a contiguous slice found by
+    two bisects. Titles are indexed from each word onwards, so "rel" finds
+    "Press Release". Candidates are ranked by a popularity snapshot that is
+    refreshed at most every ``rerank_interval`` seconds, and results are
+    cached until the index or the snapshot changes, so broad one-letter
+    prefixes are ranked once per snapshot.
+    """
+
+    def __init__(self, rerank_interval: float = 60.0, cache_size: int = 1024):
+        """
+        Create an empty index.
+
+        Args:
+            rerank_interval (float, optional): Minimum seconds between popularity snapshots
+            cache_size (int, optional): Number of suggestion lists kept in memory
+        """
+        self.rerank_interval = rerank_interval
+        self.documents = []
+        self.ids = {}
+        self._keys = []
+        self._key_ids = array('I')
+        self._popularity = array('I')
+        self._ranking = array('I')
+        self._ranked_at = 0.0
+        self._results = LRUCache(cache_size)
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @staticmethod
+    def _document_keys(name: str, title: str, tags: List[str]) -> List[Tuple[str, str]]:
+        """(normalized key, field) pairs for one template, first occurrence of a key wins."""
+        keys = {}
+        keys.setdefault(normalize(name), 'name')
+        words = normalize(title).split(' ')
+        for start in range(len(words)):
+            keys.setdefault(' '.join(words[start:]), 'title')
+        for tag in tags:
+            keys.setdefault(normalize(tag), 'tag')
+        keys.pop('', None)
+        return list(keys.items())
+
+    def _document_id(self, name: str) -> int:
+        """Id of ``name``, allocated on first use; call with the lock held."""
+        doc_id = self.ids.get(name)
+        if doc_id is None:
+            doc_id = len(self.documents)
+            self.documents.append(None)
+            self._popularity.append(0)
+            self._ranking.append(0)
+            self.ids[name] = doc_id
+        return doc_id
+
+    def update(self, documents: Iterable[Tuple[str, str, List[str], Dict[str, Any]]], removed: Iterable[str] = ()):
+        """
+        Index many templates and drop others with a single sort of the key list.
+
+        add() inserts into the sorted key list one key at a time, which is
+        linear per key; building or rebuilding the whole index goes through
+        here instead.
+
+        Args:
+            documents (iterable): (name, title, tags, fields) per template to index
+            removed (iterable, optional): Names of templates to drop
+        """
+        prepared = [(name, title, self._document_keys(name, title, tags), fields)
+                    for name, title, tags, fields in documents]
+        with self._lock:
+            dropped = set()
+            for name in chain(removed, (name for name, _, _, _ in prepared)):
+                doc_id = self.ids.get(name)
+                if doc_id is not None and self.documents[doc_id] is not None:
+                    self.documents[doc_id] = None
+                    dropped.add(doc_id)
+            pairs = [pair for pair in zip(self._keys, self._key_ids) if pair[1] not in dropped]
+            for name, title, keys, fields in prepared:
+                doc_id = self._document_id(name)
+                self.documents[doc_id] = dict(fields, name=name, title=title, keys=keys)
+                pairs.extend((key, doc_id) for key, _ in keys)
+            pairs.sort()
+            self._keys = [key for key, _ in pairs]
+            self._key_ids = array('I', (doc_id for _, doc_id in pairs))
+            self._results.clear()
+
+    def add(self, name: str, title: str, tags: List[str], **fields: Any):
+        """
+        Index a template, replacing any previous version with the same name.
+
+        Each key is inserted into the sorted key list, so this suits single
+        templates; use update() for many.
+
+        Args:
+            name (str): Template name
+            title (str): Display title
+            tags (list): Tags the template can be found by
+            **fields: Extra fields returned with each suggestion
+        """
+        keys = self._document_keys(name, title, tags)
+        with self._lock:
+            self.remove(name)
+            doc_id = self._document_id(name)
+            self.documents[doc_id] = dict(fields, name=name, title=title, keys=keys)
+            for key, _ in keys:
+                position = bisect.bisect_right(self._keys, key)
+                self._keys.insert(position, key)
+                self._key_ids.insert(position, doc_id)
+            self._results.clear()
+
+    def remove(self, name: str) -> bool:
+        """
+        Drop a template's keys. Its id and popularity are kept for re-adds.
+
+        Args:
+            name (str): Template name
+
+        Returns:
+            bool: True if the template was indexed
+        """
+        with self._lock:
+            doc_id = self.ids.get(name)
+            if doc_id is None or self.documents[doc_id] is None:
+                return False
+            for key, _ in self.documents[doc_id]['keys']:
+                position = bisect.bisect_left(self._keys, key)
+                while self._key_ids[position] != doc_id:
+                    position += 1
+                del self._keys[position]
+                del self._key_ids[position]
+            self.documents[doc_id] = None
+            self._results.clear()
+            return True
+
+    def record(self, name: str, count: int = 1):
+        """
+        Count views of a template towards its popularity.
+
+        Args:
+            name (str): Template name
+            count (int, optional): Number of views
+        """
+        with self._lock:
+            self._popularity[self._document_id(name)] += count
+
+    def popularity(self) -> Dict[str, int]:
+        """
+        Current view counts.
+
+        Returns:
+            dict: Template name to views, omitting templates never viewed
+        """
+        with self._lock:
+            return {name: self._popularity[doc_id] for name, doc_id in self.ids.items() if self._popularity[doc_id]}
+
+    def suggest(self, prefix: str, limit: int = 10) -> List[Dict[str, Any]]:
+        """
+        Return the most popular templates with a key starting with ``prefix``.
+
+        Args:
+            prefix (str): Typed text
+            limit (int, optional): Number of suggestions
+
+        Returns:
+            list: Stored fields plus ``matched`` (the field that matched) per
+            template, most popular first, ties by name
+        """
+        prefix = normalize(prefix)
+        if not prefix:
+            return []
+        with self._lock:
+            if time.monotonic() - self._ranked_at >= self.rerank_interval:
+                self._ranking = array('I', self._popularity)
+                self._ranked_at = time.monotonic()
+                self._results.clear()
+            cache_key = (prefix, limit)
+            cached = self._results.get(cache_key)
+            if cached is not None:
+                return cached
+
+            start = bisect.bisect_left(self._keys, prefix)
+            end = bisect.bisect_left(self._keys, prefix + '\uffff', start)
+            candidates = set(self._key_ids[start:end])
+            ranking, documents = self._ranking, self.documents
+            top = heapq.nsmallest(limit, candidates, key=lambda doc_id: (-ranking[doc_id], documents[doc_id]['name']))
+
+            results = []
+            for doc_id in top:
+                document = documents[doc_id]
+                matched = next(field for key, field in document['keys'] if key.startswith(prefix))
+                results.append({**{k: v for k, v in document.items() if k != 'keys'}, 'matched': matched})
+            self._results.put(cache_key, results)
+            return results
+
+
+class CatalogSuggest:
+    """
+    Suggestion index kept in step with a TemplateCatalog.
+
+    Catalog additions, removals and modified directories are applied on the
+    next query. View counts are persisted to ``popularity_path`` every
+    ``save_interval`` seconds and on save(); each worker adds only its own
+    new views to the file while holding a lock on ``<popularity_path>.lock``,
+    so counts from several processes accumulate instead of overwriting
+    each other.
+    """
+
+    def __init__(self, catalog: TemplateCatalog, describe: Callable[[CatalogEntry], Tuple[str, List[str]]],
+                 popularity_path: Optional[str] = None, rerank_interval: float = 60.0,
+                 save_interval: Optional[float] = 300.0):
+        """
+        Initialize catalog suggestions.
+
+        Args:
+            catalog (TemplateCatalog): Catalog supplying the templates
+            describe (callable): Returns (title, tags) for a catalog entry
+            popularity_path (str, optional): JSON file holding view counts
+            rerank_interval (float, optional): Minimum seconds between popularity snapshots
+            save_interval (float, optional): Seconds between background saves of view counts; None disables
+        """
+        self.catalog = catalog
+        self.describe = describe
+        self.popularity_path = popularity_path
+        self.save_interval = save_interval
+        self.index = SuggestIndex(rerank_interval=rerank_interval)
+        self._known = {}
+        self._pending = {}
+        self._version = None
+        self._lock = threading.Lock()
+        self._load_popularity()
+        self._reset_save_thread()
+        register_after_fork(self, '_reset_save_thread')
+
+    def _reset_save_thread(self):
+        """Forget the save thread and the parent's unsaved views; neither belongs to a forked child."""
+        self._save_thread = None
+        self._stop = threading.Event()
+        self._pending = {}
+
+    def _start_save_thread(self):
+        with self._lock:
+            if self._save_thread is not None:
+                return
+            self._save_thread = threading.Thread(target=self._save_loop, name='suggest-save', daemon=True)
+        self._save_thread.start()
+
+    def _save_loop(self):
+        while not self._stop.wait(self.save_interval):
+            try:
+                self.save()
+            except OSError as e:
+                logging.getLogger(__name__).error(f"Could not save template view counts: {e}")
+
+    def stop(self):
+        """Stop the background save thread."""
+        self._stop.set()
+
+    def _load_popularity(self):
+        if not self.popularity_path:
+            return
+        try:
+            with open(self.popularity_path, 'r', encoding='utf-8') as f:
+                counts = json.load(f)
+        except (OSError, ValueError):
+            return
+        for name, count in counts.items():
+            if isinstance(count, int) and count > 0:
+                self.index.record(name, count)
+
+    def _add(self, entry: CatalogEntry):
+        title, tags = self.describe(entry)
+        self.index.add(entry.name, title, tags, kind=entry.kind, url=f"/template/{entry.name}")
+        self._known[entry.name] = entry.mtime_ns
+
+    def ensure_current(self):
+        """Apply catalog changes since the last call."""
+        self.catalog.ensure_fresh()
+        if self._version == self.catalog.version:
+            return
+        with self._lock:
+            version = self.catalog.version
+            if self._version == version:
+                return
+            entries = {entry.name: entry for entry in self.catalog.entries()}
+            removed = [name for name in self._known if name not in entries]
+            changed = [entry for name, entry in entries.items() if self._known.get(name, -1) != entry.mtime_ns]
+            documents = []
+            for entry in changed:
+                title, tags = self.describe(entry)
+                documents.append((entry.name, title, tags, {'kind': entry.kind, 'url': f"/template/{entry.name}"}))
+            self.index.update(documents, removed)
+            for name in removed:
+                del self._known[name]
+            for entry in changed:
+                self._known[entry.name] = entry.mtime_ns
+            self._version = version
+
+    def refresh_template(self, name: str):
+        """
+        Re-index one template after it was generated or changed.
+
+        Args:
+            name (str): Template directory name
+        """
+        if self._version is None:
+            return
+        entry = self.catalog.get(name)
+        with self._lock:
+            if entry is None:
+                self.index.remove(name)
+                self._known.pop(name, None)
+            else:
+                self._add(entry)
+
+    def record_view(self, name: str):
+        """
+        Count one view of a template.
+
+        Args:
+            name (str): Template name
+        """
+        self.index.record(name)
+        with self._lock:
+            self._pending[name] = self._pending.get(name, 0) + 1
+        if self._save_thread is None and self.popularity_path and self.save_interval:
+            self._start_save_thread()
+
+    def save(self):
+        """
+        Add views recorded since the last save to the popularity file.
+
+        Raises:
+            OSError: If the file cannot be written; the views are kept for the next save
+        """
+        if not self.popularity_path:
+            return
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(self.popularity_path)), exist_ok=True)
+            # The read, merge and replace must not interleave with another worker's
+            with file_lock(f"{self.popularity_path}.lock"):
+                try:
+                    with open(self.popularity_path, 'r', encoding='utf-8') as f:
+                        counts = json.load(f)
+                except (OSError, ValueError):
+                    counts = {}
+                for name, count in pending.items():
+                    counts[name] = counts.get(name, 0) + count
+
+                temp_path = f"{self.popularity_path}.{os.getpid()}.tmp"
+                with open(temp_path, 'w', encoding='utf-8') as f:
+                    json.dump(counts, f, separators=(',', ':'))
+                os.replace(temp_path, self.popularity_path)
+        except OSError:
+            with self._lock:
+                for name, count in pending.items():
+                    self._pending[name] = self._pending.get(name, 0) + count
+            raise
+
+    def suggest(self, prefix: str, limit: int = 10) -> List[Dict[str, Any]]:
+        """
+        Suggest templates for a typed prefix.
+
+        Args:
+            prefix (str): Typed text
+            limit (int, optional): Number of suggestions
+
+        Returns:
+            list: Suggestions, most popular first
+        """
+        self.ensure_current()
+        return self.index.suggest(prefix, limit)
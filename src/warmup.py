@@ -0,0 +1,72 @@
+import os
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, Any
+
+from .catalog import TemplateCatalog
+from .cache import TemplateMetadataCache
+from .render_cache import MarkdownRenderCache
+
+logger = logging.getLogger(__name__)
+
+
+def _warm_template(template_path: str, metadata_cache: TemplateMetadataCache,
+                   render_cache: MarkdownRenderCache):
+    """Load one template's metadata and rendered markdown into the caches."""
+    metadata_cache.get_metadata(template_path)
+    for filename in ('README.md', 'template.md'):
+        try:
+            render_cache.render_file(os.path.join(template_path, filename))
+        except FileNotFoundError:
+            pass
+
+
+def warm_caches(catalog: TemplateCatalog, metadata_cache: TemplateMetadataCache,
+                render_cache: MarkdownRenderCache, max_workers: int = 8,
+                log: logging.Logger = None) -> Dict[str, Any]:
+    """
+    Fill the catalog, metadata cache and render cache before serving traffic.
+
+    Args:
+        catalog (TemplateCatalog): Template catalog to rebuild
+        metadata_cache (TemplateMetadataCache): Metadata cache to fill
+        render_cache (MarkdownRenderCache): Render cache to fill
+        max_workers (int, optional): Size of the warmup thread pool
+        log (Logger, optional): Logger for progress messages
+
+    Returns:
+        dict: Number of templates warmed, failures and duration in seconds
+    """
+    log = log or logger
+    started = time.perf_counter()
+
+    catalog.rebuild()
+    names = catalog.new_templates
+    total = len(names)
+    log.info(f"Cache warmup started: {total} templates, {max_workers} threads")
+
+    warmed = failed = 0
+    progress_step = max(total // 10, 1)
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='cache-warmup') as pool:
+        futures = {
+            pool.submit(_warm_template, catalog.get(name).path, metadata_cache, render_cache): name
+            for name in names if catalog.get(name) is not None
+        }
+        for future in as_completed(futures):
+            try:
+                future.result()
+                warmed += 1
+            except Exception as e:
+                failed += 1
+                log.warning(f"Cache warmup failed for {futures[future]}: {e}")
+            done = warmed + failed
+            if done % progress_step == 0 or done == total:
+                log.info(f"Cache warmup progress: {done}/{total} templates")
+
+    # Persist before serving (and before gunicorn --preload forks workers)
+    metadata_cache.flush()
+
+    duration = time.perf_counter() - started
+    log.info(f"Cache warmup finished: {warmed} warmed, {failed} failed in {duration:.2f}s")
+    return {'warmed': warmed, 'failed': failed, 'duration': duration}
@@ -0,0 +1,174 @@
+import os
+import sys
+import time
+import random
+import logging
+import threading
+import traceback
+from typing import Any, Dict, Optional
+
+from flask import request
+
+from .procutil import register_after_fork
+
+# Longest request body kept for slow-request reports
+MAX_BODY_CHARS = 2048
+
+
+class SlowRequestWatchdog:
+    """
+    Log the stack of requests that run longer than a threshold.
+
+    Request threads only add and remove an entry in a dict, which needs no
+    lock. A background thread scans the entries every ``interval`` seconds
+    and, for each request past ``threshold`` seconds, logs the request and
+    its thread's current stack once. ``sample_rate`` limits tracking to a
+    fraction of requests, and at most ``max_reports`` reports are logged
+    per minute; reports beyond that are counted and mentioned in the next
+    one.
+    """
+
+    def __init__(self, threshold: float = 2.0, interval: float = 0.5, sample_rate: float = 1.0,
+                 max_reports: int = 10, logger: Optional[logging.Logger] = None):
+        """
+        Initialize the watchdog.
+
+        Args:
+            threshold (float, optional): Seconds after which a request is reported
+            interval (float, optional): Seconds between scans
+            sample_rate (float, optional): Fraction of requests tracked
+            max_reports (int, optional): Reports logged per minute
+            logger (logging.Logger, optional): Logger reports are written to
+        """
+        self.threshold = threshold
+        self.interval = interval
+        self.sample_rate = sample_rate
+        self.max_reports = max_reports
+        self.logger = logger or logging.getLogger(__name__)
+        self.reported = 0
+        self.suppressed = 0
+        self._reset()
+        register_after_fork(self, '_reset')
+
+    def _reset(self):
+        """Forget requests and the scan thread; neither survives a fork."""
+        self._requests: Dict[int, Dict[str, Any]] = {}
+        self._window_start = time.monotonic()
+        self._window_reports = 0
+        self._thread = None
+        self._stop = threading.Event()
+
+    def track(self, details: Dict[str, Any]) -> bool:
+        """
+        Start watching the calling thread's request, subject to sampling.
+
+        Args:
+            details (dict): Request description included in reports
+
+        Returns:
+            bool: True if the request is being watched
+        """
+        if self.sample_rate < 1.0 and random.random() >= self.sample_rate:
+            return False
+        if self._thread is None:
+            self._start_thread()
+        self._requests[threading.get_ident()] = dict(details, started=time.monotonic(), reported=False)
+        return True
+
+    def untrack(self) -> Optional[Dict[str, Any]]:
+        """
+        Stop watching the calling thread's request.
+
+        Returns:
+            The request's entry, or None if it was not watched
+        """
+        return self._requests.pop(threading.get_ident(), None)
+
+    def _start_thread(self):
+        self._thread = threading.Thread(target=self._run, name='slow-request-watchdog', daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.check()
+            except Exception as e:
+                self.logger.error(f"Slow request watchdog failed: {e}")
+
+    def stop(self):
+        """Stop the scan thread."""
+        self._stop.set()
+
+    def _allow_report(self, now: float) -> bool:
+        if now - self._window_start >= 60:
+            self._window_start = now
+            self._window_reports = 0
+        if self._window_reports >= self.max_reports:
+            return False
+        self._window_reports += 1
+        return True
+
+    def check(self) -> int:
+        """
+        Report every watched request that has passed the threshold and was not reported yet.
+
+        Returns:
+            int: Number of reports logged
+        """
+        now = time.monotonic()
+        overdue = [(ident, entry) for ident, entry in list(self._requests.items())
+                   if not entry['reported'] and now - entry['started'] >= self.threshold]
+        if not overdue:
+            return 0
+
+        frames = sys._current_frames()
+        logged = 0
+        for ident, entry in overdue:
+            entry['reported'] = True
+            if not self._allow_report(now):
+                self.suppressed += 1
+                continue
+            frame = frames.get(ident)
+            stack = ''.join(traceback.format_stack(frame)) if frame is not None else '(thread finished)\n'
+            details = {key: value for key, value in entry.items() if key not in ('started', 'reported')}
+            suppressed, self.suppressed = self.suppressed, 0
+            message = (f"Slow request still running after {now - entry['started']:.2f}s: {details}"
+                       + (f" ({suppressed} earlier reports suppressed)" if suppressed else '')
+                       + f"\nStack of thread {ident}:\n{stack}")
+            self.logger.warning(message.rstrip())
+            self.reported += 1
+            logged += 1
+        return logged
+
+
+def init_slow_request_watchdog(app, watchdog: SlowRequestWatchdog):
+    """
+    Watch every request with ``watchdog`` and log how long reported requests took in the end.
+
+    Reports include the method, route, view arguments, query string and,
+    for small bodies, the request body.
+
+    Args:
+        app (Flask): Flask application instance
+        watchdog (SlowRequestWatchdog): Watchdog shared by the app's requests
+    """
+
+    @app.before_request
+    def watch_request():
+        details = {
+            'pid': os.getpid(),
+            'method': request.method,
+            'route': request.url_rule.rule if request.url_rule is not None else request.path,
+            'view_args': request.view_args or {},
+            'query': request.query_string.decode('utf-8', 'replace')
+        }
+        if request.content_length and request.content_length <= MAX_BODY_CHARS:
+            details['body'] = request.get_data(as_text=True)
+        watchdog.track(details)
+
+    @app.teardown_request
+    def unwatch_request(error=None):
+        entry = watchdog.untrack()
+        if entry is not None and entry['reported']:
+            app.logger.warning(f"Slow request {entry['method']} {entry['route']} finished after "
+                               f"{time.monotonic() - entry['started']:.2f}s")
@@ -0,0 +1,73 @@
+import threading
+from flask import Flask
+from src.admission import AdmissionController, AdmissionRejected, init_admission_control
+
+def test_writes_queue_then_shed_with_retry_after():
+    """Writes beyond the limit wait in a bounded queue; past it they are rejected."""
+    controller = AdmissionController(max_concurrent=1, max_queue=1, queue_timeout=5, read_threshold=None)
+    first = controller.acquire_write()
+
+    queued = threading.Thread(target=lambda: controller.release_write(controller.acquire_write()))
+    queued.start()
+    while controller.waiting == 0:
+        pass
+
+    try:
+        controller.acquire_write()
+    except AdmissionRejected as e:
+        assert e.retry_after >= 1
+    else:
+        raise AssertionError('third write should have been rejected')
+
+    controller.release_write(first)
+    queued.join(timeout=5)
+    assert controller.stats()['admitted'] == 2
+    assert controller.stats()['rejected'] == 1
+
+def test_busy_reads_hold_queued_writes_back():
+    """A queued write waits while reads are at the threshold and times out into a 429."""
+    controller = AdmissionController(max_concurrent=1, max_queue=4, queue_timeout=0.05, read_threshold=1,
+                                     max_read_hold=5)
+    app = Flask(__name__)
+    init_admission_control(app, controller, ['write'])
+
+    @app.route('/write', methods=['POST'])
+    def write():
+        return 'written'
+
+    client = app.test_client()
+    controller.begin_read()
+    assert client.post('/write').status_code == 200
+
+    # The slot frees up while the write is queued, but the read keeps it waiting
+    first = controller.acquire_write()
+    threading.Timer(0.01, controller.release_write, [first]).start()
+    response = client.post('/write')
+    assert response.status_code == 429
+    assert int(response.headers['Retry-After']) >= 1
+    assert controller.stats()['active_writes'] == 0
+    controller.end_read()
+
+    assert client.post('/write').status_code == 200
+    assert controller.stats()['active_reads'] == 0
+    assert controller.stats()['rejected'] == 1
+
+def test_reads_cannot_starve_writes():
+    """Queued writes start once the read hold runs out, even if reads never drop."""
+    controller = AdmissionController(max_concurrent=1, max_queue=4, queue_timeout=5, read_threshold=1,
+                                     max_read_hold=0.05)
+    controller.begin_read()
+    first = controller.acquire_write()
+
+    results = []
+    queued = threading.Thread(target=lambda: results.append(controller.acquire_write()))
+    queued.start()
+    while controller.waiting == 0:
+        pass
+    controller.release_write(first)
+    queued.join(timeout=5)
+
+    assert len(results) == 1
+    controller.release_write(results[0])
+    controller.end_read()
+    assert controller.stats()['rejected'] == 0
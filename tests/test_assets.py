@@ -0,0 +1,47 @@
+import struct
+from flask import Flask, render_template_string
+from src.assets import AssetTable, init_static_assets, build_default_favicon
+
+def make_app(static_dir):
+    app = Flask(__name__, static_folder=None)
+    assets = AssetTable(str(static_dir))
+    init_static_assets(app, assets)
+    return app, assets
+
+def test_fingerprinted_assets_are_immutable(tmp_path):
+    """url_for points at the content-hashed name, which is served from memory with an immutable policy."""
+    (tmp_path / 'css').mkdir()
+    (tmp_path / 'css' / 'app.css').write_text('body { color: red; }')
+    (tmp_path / 'handler.py').write_text('# not an asset')
+    app, assets = make_app(tmp_path)
+
+    with app.test_request_context():
+        url = render_template_string("{{ url_for('static', filename='css/app.css') }}")
+    assert url.startswith('/static/css/app.') and url.endswith('.css') and url != '/static/css/app.css'
+
+    client = app.test_client()
+    response = client.get(url)
+    assert response.status_code == 200
+    assert response.data == b'body { color: red; }'
+    assert response.mimetype == 'text/css'
+    assert response.headers['Cache-Control'] == 'public, max-age=31536000, immutable'
+    assert client.get(url, headers={'If-None-Match': response.headers['ETag']}).status_code == 304
+
+    plain = client.get('/static/css/app.css')
+    assert plain.status_code == 200
+    assert plain.headers['Cache-Control'] == 'public, max-age=0'
+    assert client.get('/static/handler.py').status_code == 404
+
+    # Changing the content changes the URL
+    (tmp_path / 'css' / 'app.css').write_text('body { color: blue; }')
+    assert AssetTable(str(tmp_path)).url_path('css/app.css') != assets.url_path('css/app.css')
+
+def test_default_favicon_is_precomputed(tmp_path):
+    """Without a favicon.ico on disk a valid 16x16 icon is synthesised at startup."""
+    _, assets = make_app(tmp_path)
+    icon = assets.get('favicon.ico').body
+    assert icon == build_default_favicon()
+    reserved, kind, count = struct.unpack('<HHH', icon[:6])
+    width, height, _, _, planes, bits, size, offset = struct.unpack('<BBBBHHII', icon[6:22])
+    assert (reserved, kind, count, width, height, bits) == (0, 1, 1, 16, 16, 32)
+    assert offset + size == len(icon)
@@ -0,0 +1,193 @@
+import os
+import time
+import threading
+import pytest
+import src.cache as cache_module
+from src.cache import SQLiteCacheStore, SingleFlight, TemplateMetadataCache, WriteBehindWriter
+from src.eviction import WTinyLFUCache, create_memory_cache
+
+@pytest.fixture
+def store(tmp_path):
+    """Create a small persistent store."""
+    return SQLiteCacheStore(str(tmp_path / 'cache.sqlite3'), ttl=60, max_bytes=200)
+
+def test_store_round_trip_and_counters(store):
+    """Stored values are returned and hits/misses are counted."""
+    assert store.get('missing') is None
+    store.set('template', {'name': 'template', 'file_count': 2})
+
+    assert store.get('template') == {'name': 'template', 'file_count': 2}
+    assert store.stats()['hits'] == 1
+    assert store.stats()['misses'] == 1
+
+def test_store_expires_entries(tmp_path):
+    """Entries older than the TTL are treated as misses."""
+    store = SQLiteCacheStore(str(tmp_path / 'cache.sqlite3'), ttl=0.01)
+    store.set('template', {'name': 'template'})
+    time.sleep(0.02)
+
+    assert store.get('template') is None
+    store.flush_accesses()
+    assert len(store) == 0
+
+def test_store_reads_are_buffered(store):
+    """Reads leave the database untouched until buffered accesses are flushed."""
+    store.set('template', {'name': 'template'})
+    read_hits = lambda: store._connection().execute("SELECT hits FROM entries WHERE key = 'template'").fetchone()[0]
+    changes = store._connection().total_changes
+
+    store.get('template')
+    store.get('template')
+    assert store._connection().total_changes == changes
+    assert read_hits() == 0
+
+    store.flush_accesses()
+    assert read_hits() == 2
+
+def test_store_evicts_least_recently_used(store):
+    """Exceeding the size cap evicts the least recently read entries first."""
+    for index in range(4):
+        store.set(f'template_{index}', {'payload': 'x' * 30})
+    store.get('template_0')
+
+    store.set('template_4', {'payload': 'x' * 30})
+    store.set('template_5', {'payload': 'x' * 30})
+
+    assert store.total_bytes() <= store.max_bytes
+    assert store.get('template_0') is not None
+    assert store.get('template_1') is None
+    assert store.stats()['evictions'] > 0
+
+def test_metadata_cache_uses_persistent_tier(tmp_path):
+    """A fresh cache instance serves metadata persisted by a previous one."""
+    template_dir = tmp_path / 'Templates_NEW' / '01_Case_Study_Template'
+    template_dir.mkdir(parents=True)
+    (template_dir / 'README.md').write_text('# readme')
+    cache_dir = str(tmp_path / 'cache')
+
+    first_cache = TemplateMetadataCache(cache_dir=cache_dir)
+    first = first_cache.get_metadata(str(template_dir))
+    first_cache.flush()
+    second_cache = TemplateMetadataCache(cache_dir=cache_dir)
+
+    assert second_cache.get_metadata(str(template_dir)) == first
+    assert second_cache.stats()['persistent']['hits'] == 1
+
+def test_metadata_cache_detects_directory_changes(tmp_path):
+    """Adding a file to a template invalidates both cache tiers immediately."""
+    template_dir = tmp_path / '01_Case_Study_Template'
+    template_dir.mkdir()
+    (template_dir / 'README.md').write_text('# readme')
+    cache = TemplateMetadataCache(cache_dir=str(tmp_path / 'cache'))
+
+    assert cache.get_metadata(str(template_dir))['file_count'] == 1
+
+    (template_dir / 'template.md').write_text('# template')
+    os.utime(template_dir, ns=(0, 1))
+
+    assert cache.get_metadata(str(template_dir))['file_count'] == 2
+    cache.flush()
+    assert TemplateMetadataCache(cache_dir=str(tmp_path / 'cache')).get_metadata(str(template_dir))['file_count'] == 2
+
+def test_single_flight_runs_one_computation_per_key():
+    """Concurrent callers for one key share a single computation."""
+    flight = SingleFlight()
+    calls = []
+    barrier = threading.Barrier(16)
+    release = threading.Event()
+
+    def compute():
+        calls.append(1)
+        release.wait(timeout=5)
+        return {'value': 42}
+
+    def worker(results):
+        barrier.wait()
+        results.append(flight.do('template', compute))
+
+    results = []
+    threads = [threading.Thread(target=worker, args=(results,)) for _ in range(16)]
+    for thread in threads:
+        thread.start()
+    while flight.in_flight() == 0:
+        time.sleep(0.001)
+    time.sleep(0.05)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert len(results) == 16
+    assert all(result is results[0] for result in results)
+
+def test_metadata_cache_coalesces_concurrent_misses(tmp_path, monkeypatch):
+    """A cold template is scanned once even when many threads miss together."""
+    template_dir = tmp_path / '01_Case_Study_Template'
+    template_dir.mkdir()
+    (template_dir / 'README.md').write_text('# readme')
+    cache = TemplateMetadataCache(cache_dir=str(tmp_path / 'cache'))
+
+    listdir_calls = []
+    real_listdir = os.listdir
+
+    def slow_listdir(path):
+        listdir_calls.append(path)
+        time.sleep(0.05)
+        return real_listdir(path)
+
+    monkeypatch.setattr(cache_module.os, 'listdir', slow_listdir)
+    barrier = threading.Barrier(8)
+
+    def worker():
+        barrier.wait()
+        cache.get_metadata(str(template_dir))
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    # One computation lists the directory twice (files, then subdirectories)
+    assert len(listdir_calls) == 2
+    assert cache.stats()['persistent']['misses'] == 1
+
+def test_write_behind_coalesces_and_flushes(store):
+    """Repeated writes to one key collapse and become visible once flushed."""
+    store.max_bytes = 1024 * 1024
+    writer = WriteBehindWriter(store, flush_interval=0.5)
+    try:
+        for version in range(5):
+            writer.put('template', {'version': version})
+
+        assert writer.get('template') == {'version': 4}
+        assert writer.flush(timeout=5)
+        assert store.get('template') == {'version': 4}
+        assert writer.stats()['written'] < 5
+    finally:
+        writer.close()
+
+@pytest.mark.parametrize('policy', ['lru', 'tinylfu'])
+def test_memory_cache_policies_bound_size(policy):
+    """Every eviction policy stays within its capacity."""
+    cache = create_memory_cache(policy, 10)
+    for index in range(100):
+        cache.put(index, {'index': index})
+
+    assert len(cache) <= 10
+    assert cache.stats()['policy'] == policy
+
+def test_tinylfu_resists_scans():
+    """A one-off sweep does not flush the frequently used hot set."""
+    cache = WTinyLFUCache(100)
+    hot_keys = [f'hot_{index}' for index in range(50)]
+    for _ in range(5):
+        for key in hot_keys:
+            if cache.get(key) is None:
+                cache.put(key, True)
+
+    for index in range(1000):
+        if cache.get(f'crawl_{index}') is None:
+            cache.put(f'crawl_{index}', True)
+
+    assert sum(cache.get(key) is not None for key in hot_keys) >= 45
@@ -0,0 +1,103 @@
+import os
+import pytest
+from src.catalog import TemplateCatalog
+
+@pytest.fixture
+def template_roots(tmp_path):
+    """Create a small Templates_NEW / Templates_Markdown pair."""
+    templates_dir = tmp_path / 'Templates_NEW'
+    markdown_dir = tmp_path / 'Templates_Markdown'
+    for name in ['01_Case_Study_Template', '12345678_Test_Template']:
+        (templates_dir / name / 'assets').mkdir(parents=True)
+        (templates_dir / name / 'README.md').write_text('# readme')
+    markdown_dir.mkdir()
+    (markdown_dir / 'Press Release Template.md').write_text('# press')
+    (markdown_dir / 'notes.txt').write_text('ignored')
+    return str(templates_dir), str(markdown_dir)
+
+def test_catalog_lists_templates(template_roots):
+    """Catalog exposes sorted template names and per-template counts."""
+    catalog = TemplateCatalog(*template_roots)
+
+    assert catalog.new_templates == ['01_Case_Study_Template', '12345678_Test_Template']
+    assert catalog.markdown_templates == ['Press Release Template.md']
+
+    entry = catalog.get('01_Case_Study_Template')
+    assert entry.file_count == 1
+    assert entry.directory_count == 1
+
+def test_catalog_resolves_aliases_and_suffixes(template_roots):
+    """Lookups match exact names, id-stripped aliases and arbitrary suffixes."""
+    catalog = TemplateCatalog(*template_roots)
+
+    assert catalog.resolve('01_Case_Study_Template').name == '01_Case_Study_Template'
+    assert catalog.resolve('Test_Template').name == '12345678_Test_Template'
+    assert catalog.resolve('Study_Template').name == '01_Case_Study_Template'
+    assert catalog.resolve('Press Release Template.md').kind == 'markdown'
+    assert catalog.resolve('Missing_Template') is None
+
+def test_catalog_picks_up_changes(template_roots):
+    """New templates and edits inside a template are reflected without a restart."""
+    templates_dir, _ = template_roots
+    catalog = TemplateCatalog(*template_roots, poll_interval=0)
+    version = catalog.version
+
+    os.makedirs(os.path.join(templates_dir, '02_White_Paper_Template'))
+    assert '02_White_Paper_Template' in catalog.new_templates
+    assert catalog.version > version
+
+    readme = os.path.join(templates_dir, '02_White_Paper_Template', 'README.md')
+    with open(readme, 'w') as f:
+        f.write('# white paper')
+    os.utime(os.path.dirname(readme), ns=(0, 1))
+    assert catalog.get('02_White_Paper_Template').file_count == 1
+
+def test_warm_caches_fills_metadata_and_render_caches(template_roots, tmp_path):
+    """Warmup visits every template before the first request."""
+    from src.cache import TemplateMetadataCache
+    from src.render_cache import MarkdownRenderCache
+    from src.warmup import warm_caches
+
+    catalog = TemplateCatalog(*template_roots)
+    metadata_cache = TemplateMetadataCache(cache_dir=str(tmp_path / 'cache'))
+    render_cache = MarkdownRenderCache()
+
+    result = warm_caches(catalog, metadata_cache, render_cache, max_workers=2)
+
+    assert result == {'warmed': 2, 'failed': 0, 'duration': result['duration']}
+    assert len(metadata_cache.store) == 2
+    assert render_cache.stats()['entries'] == 2
+
+def test_catalog_rejects_unknown_names_from_memory(template_roots):
+    """Repeated misses are answered by the negative cache until the catalog changes."""
+    templates_dir, _ = template_roots
+    catalog = TemplateCatalog(*template_roots, poll_interval=0)
+
+    assert catalog.get('wp-login.php') is None
+    assert catalog.get('wp-login.php') is None
+    assert catalog.negative_hits == 1
+    assert '01_Case_Study_Template' in catalog._state.bloom
+
+    os.makedirs(os.path.join(templates_dir, 'wp-login.php'))
+    assert catalog.get('wp-login.php') is not None
+
+def test_catalog_pages_are_stable_across_inserts(template_roots):
+    """Cursor pages continue after the last entry seen even when templates are added."""
+    templates_dir, _ = template_roots
+    catalog = TemplateCatalog(*template_roots, poll_interval=0)
+
+    first, cursor, total = catalog.page(limit=1)
+    assert [entry.name for entry in first] == ['01_Case_Study_Template']
+    assert total == 3
+
+    os.makedirs(os.path.join(templates_dir, '00_Early_Template'))
+    rest, next_cursor, total = catalog.page(cursor=cursor, limit=10)
+    assert [entry.name for entry in rest] == ['12345678_Test_Template', 'Press Release Template.md']
+    assert next_cursor is None
+    assert total == 4
+
+    markdown, _, markdown_total = catalog.page(kind='markdown')
+    assert [entry.kind for entry in markdown] == ['markdown']
+    assert markdown_total == 1
+    with pytest.raises(ValueError):
+        catalog.page(cursor='not-a-cursor')
@@ -98,3 +98,38 @@ def test_cache_invalidation():
         # Clean up test directory
         import shutil
         shutil.rmtree(test_dir, ignore_errors=True)
+
+def test_error_logging_is_rate_limited_per_class():
+    """Repeated errors of one class are suppressed and summarised; 4xx carry no traceback."""
+    import logging
+    from werkzeug.exceptions import NotFound
+    from src.error_handler import ErrorLogLimiter
+
+    records = []
+    logger = logging.getLogger('test_error_limiter')
+    logger.propagate = False
+    logger.setLevel(logging.INFO)
+    logger.addHandler(type('ListHandler', (logging.Handler,), {'emit': lambda self, record: records.append(record)})())
+    limiter = ErrorLogLimiter(max_per_window=2, window=0.2)
+
+    logged = [limiter.log(logger, NotFound(), 404, 'not found') for _ in range(5)]
+    assert logged == [True, True, False, False, False]
+    assert limiter.log(logger, ValueError('boom'), 500, 'server error')
+    assert all(record.exc_info is None for record in records[:2])
+    assert records[2].exc_info[0] is ValueError
+
+    import time
+    time.sleep(0.25)
+    assert limiter.log(logger, NotFound(), 404, 'not found')
+    assert records[-1].getMessage() == 'not found (3 similar errors suppressed)'
+
+def test_http_errors_keep_json_body_and_headers(client):
+    """Unknown URLs get the standard JSON error; 405 keeps its Allow header."""
+    response = client.get('/no/such/page')
+    assert response.status_code == 404
+    assert response.get_json()['error']['details'] == {}
+    assert response.get_data() == client.get('/another/missing/page').get_data()
+
+    response = client.delete('/health')
+    assert response.status_code == 405
+    assert 'GET' in response.headers['Allow']
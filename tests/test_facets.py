@@ -0,0 +1,109 @@
+import os
+import random
+from src.catalog import TemplateCatalog
+from src.facets import FacetIndex, CatalogFacets, facet_values
+
+DOCUMENTS = {
+    '01_Case_Study_Template': {'category': ['Fundamentals'], 'difficulty': ['Beginner'], 'tag': ['case', 'study']},
+    '07_Social_Media_Template': {'category': ['Fundamentals'], 'difficulty': ['Intermediate'], 'tag': ['social']},
+    '12345678_Report': {'category': ['Uncategorized'], 'type': ['document'], 'tag': ['report']},
+}
+
+def test_facet_index_filters_and_counts():
+    """Filters AND across facets, OR within a facet, and counts cover the result set."""
+    index = FacetIndex(DOCUMENTS)
+
+    matches = index.match({'category': ['Fundamentals'], 'difficulty': ['Beginner', 'Intermediate']})
+    names, more = index.slice(matches)
+    assert names == ['01_Case_Study_Template', '07_Social_Media_Template']
+    assert not more
+    assert index.counts(matches)['difficulty'] == {'Beginner': 1, 'Intermediate': 1}
+    assert index.match({'type': ['script']}) == 0
+
+    names, more = index.slice(index.all, after='01_Case_Study_Template', limit=1)
+    assert names == ['07_Social_Media_Template'] and more
+
+def test_facet_index_round_trips_through_disk(tmp_path):
+    """Saved postings rebuild the same index."""
+    path = str(tmp_path / 'library_facets.json')
+    FacetIndex(DOCUMENTS).save(path)
+
+    loaded = FacetIndex.load(path)
+    assert loaded.names == sorted(DOCUMENTS)
+    assert loaded.document('12345678_Report') == DOCUMENTS['12345678_Report']
+    assert facet_values({'tags': ['b', 'a'], 'template_type': None}) == {'tag': ['a', 'b']}
+
+def test_catalog_facets_describe_only_new_templates(tmp_path):
+    """After a catalog change only the added template is described again."""
+    templates_dir = tmp_path / 'Templates_NEW'
+    (templates_dir / '01_Case_Study_Template').mkdir(parents=True)
+    catalog = TemplateCatalog(str(templates_dir), str(tmp_path / 'Templates_Markdown'), poll_interval=0)
+    described = []
+
+    def describe(entry):
+        described.append(entry.name)
+        return {'tag': entry.name.lower().split('_')[1:]}
+
+    facets = CatalogFacets(catalog, describe)
+    assert facets.counts({})['tag']['case'] == 1
+
+    os.makedirs(templates_dir / '02_Case_Notes')
+    entries, next_cursor, total = facets.page({'tag': ['case']}, limit=1)
+    assert [entry.name for entry in entries] == ['01_Case_Study_Template']
+    assert total == 2
+    entries, next_cursor, _ = facets.page({'tag': ['case']}, cursor=next_cursor, limit=1)
+    assert [entry.name for entry in entries] == ['02_Case_Notes'] and next_cursor is None
+    assert described == ['01_Case_Study_Template', '02_Case_Notes']
+
+def test_updated_index_matches_a_fresh_build():
+    """Adding, changing and removing templates gives the same postings and counts as rebuilding."""
+    rng = random.Random(7)
+    documents = {f"{i:05d}_Template": {'tag': sorted(rng.sample('abcdefgh', 2)), 'difficulty': [rng.choice('xyz')]}
+                 for i in range(0, 400, 2)}
+    changes = {f"{i:05d}_Template": {'tag': [rng.choice('abcdefghij')]} for i in range(1, 400, 7)}
+    changes.update({name: None for name in rng.sample(sorted(documents), 40)})
+    changes['00010_Template'] = {'type': ['document']}
+    expected_documents = {name: values for name, values in {**documents, **changes}.items() if values is not None}
+
+    updated = FacetIndex(documents).updated(changes)
+    expected = FacetIndex(expected_documents)
+    assert updated.names == expected.names
+    assert updated.to_dict() == expected.to_dict()
+    for filters in ({}, {'tag': ['a']}, {'tag': ['j'], 'difficulty': ['x', 'y']}, {'type': ['document']}):
+        assert updated.counts(updated.match(filters)) == expected.counts(expected.match(filters))
+    brute = {}
+    for values in expected_documents.values():
+        if 'a' in values.get('tag', []):
+            for value in values.get('difficulty', []):
+                brute[value] = brute.get(value, 0) + 1
+    assert expected.counts(expected.match({'tag': ['a']}))['difficulty'] == dict(
+        sorted(brute.items(), key=lambda item: (-item[1], item[0])))
+
+def test_catalog_facets_track_readme_edits_and_stale_seeds(tmp_path):
+    """A seed older than a template is ignored, and README edits are picked up by the resync."""
+    templates_dir = tmp_path / 'Templates_NEW'
+    (templates_dir / '01_Case_Study_Template').mkdir(parents=True)
+    readme = templates_dir / '01_Case_Study_Template' / 'README.md'
+    readme.write_text('- **Type**: document\n')
+    index_path = str(tmp_path / 'library_facets.json')
+    FacetIndex({'01_Case_Study_Template': {'type': ['seeded']}}).save(index_path)
+    os.utime(index_path, ns=(0, 0))
+    catalog = TemplateCatalog(str(templates_dir), str(tmp_path / 'Templates_Markdown'), poll_interval=0)
+
+    def describe(entry):
+        try:
+            with open(os.path.join(entry.path, 'README.md'), encoding='utf-8') as f:
+                return {'type': [f.read().split(': ')[1].strip()]}
+        except FileNotFoundError:
+            return {}
+
+    facets = CatalogFacets(catalog, describe, index_path=index_path)
+    assert facets.counts({})['type'] == {'document': 1}
+
+    readme.write_text('- **Type**: script\n')
+    mtime = readme.stat().st_mtime_ns + 10 ** 9
+    os.utime(readme, ns=(mtime, mtime))
+    os.makedirs(templates_dir / '02_Case_Notes')
+    assert facets.counts({})['type'] == {'document': 1}
+    facets.resync()
+    assert facets.counts({})['type'] == {'script': 1}
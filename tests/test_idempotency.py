@@ -0,0 +1,44 @@
+import threading
+import time
+from src.idempotency import IdempotencyStore, IdempotentExecutor, IdempotencyError
+
+def test_concurrent_duplicates_run_once(tmp_path):
+    """Duplicates arriving while the first request runs share its response."""
+    executor = IdempotentExecutor(IdempotencyStore(str(tmp_path / 'idempotency.sqlite3')))
+    calls = []
+
+    def generate():
+        calls.append(1)
+        time.sleep(0.2)
+        return 201, '{"path": "1_Doc"}'
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(executor.execute('k', 'body', generate)))
+               for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert sorted(replayed for _, _, replayed in results) == [False, True, True, True]
+    assert executor.execute('k', 'body', generate) == (201, '{"path": "1_Doc"}', True)
+
+def test_pending_elsewhere_and_server_errors(tmp_path):
+    """A key held by another process is rejected at once; 5xx responses are not kept."""
+    path = str(tmp_path / 'idempotency.sqlite3')
+    other_process = IdempotencyStore(path)
+    executor = IdempotentExecutor(IdempotencyStore(path), retry_after=2)
+
+    assert other_process.reserve('busy', 'body') is None
+    started = time.monotonic()
+    try:
+        executor.execute('busy', 'body', lambda: (201, '{}'))
+    except IdempotencyError as e:
+        assert (e.status_code, e.retry_after) == (409, 2)
+    else:
+        raise AssertionError('expected a 409 while the key is pending')
+    assert time.monotonic() - started < 1
+
+    assert executor.execute('flaky', 'body', lambda: (500, '{}')) == (500, '{}', False)
+    assert executor.execute('flaky', 'body', lambda: (201, '{}')) == (201, '{}', False)
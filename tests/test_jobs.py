@@ -0,0 +1,88 @@
+import os
+import time
+import subprocess
+import sys
+from src.jobs import JobStore, JobQueue, run_generation_job
+
+def wait_for(queue, job_id, timeout=60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = queue.get(job_id)
+        if job['status'] in ('succeeded', 'failed'):
+            return job
+        time.sleep(0.1)
+    raise AssertionError(f"job {job_id} did not finish")
+
+def test_generation_job_runs_in_pool_and_reports_metrics(tmp_path):
+    """A queued job is generated by a pool process and its outcome persisted."""
+    completed = []
+    queue = JobQueue(JobStore(str(tmp_path / 'jobs.sqlite3')), {'generate': run_generation_job},
+                     max_workers=1, on_complete=completed.append)
+    try:
+        job = queue.submit('generate', {'template_type': 'code', 'directory_name': '1234_Demo',
+                                        'output_dir': str(tmp_path / 'out')})
+        assert job['status'] == 'queued'
+
+        job = wait_for(queue, job['id'])
+        assert job['status'] == 'succeeded', job['error']
+        assert job['result']['path'] == '1234_Demo_code'
+        assert job['result']['files_written'] > 0
+        assert os.path.isdir(tmp_path / 'out' / '1234_Demo_code')
+
+        deadline = time.monotonic() + 10
+        while not completed and time.monotonic() < deadline:
+            time.sleep(0.05)
+        assert [finished['id'] for finished in completed] == [job['id']]
+
+        metrics = queue.metrics()
+        assert metrics['queue_depth'] == 0
+        assert metrics['jobs']['succeeded'] == 1
+        assert metrics['latency']['total_seconds']['p50'] is not None
+    finally:
+        queue.shutdown()
+
+def test_jobs_of_dead_processes_are_recovered(tmp_path):
+    """Work queued by a server process that exited is picked up by another."""
+    store = JobStore(str(tmp_path / 'jobs.sqlite3'))
+    exited = subprocess.Popen([sys.executable, '-c', 'pass'])
+    exited.wait()
+    orphan = store.create('generate', {'template_type': 'code', 'directory_name': '5678_Orphan',
+                                       'output_dir': str(tmp_path / 'out')}, owner=exited.pid)
+
+    queue = JobQueue(store, {'generate': run_generation_job}, max_workers=1)
+    try:
+        assert queue.recover() == 1
+        assert queue.recover() == 0
+        assert wait_for(queue, orphan['id'])['status'] == 'succeeded'
+    finally:
+        queue.shutdown()
+
+def test_jobs_are_recovered_periodically_and_despite_pid_reuse(tmp_path):
+    """A job recorded under this pid by an earlier process is recovered by the background pass."""
+    store = JobStore(str(tmp_path / 'jobs.sqlite3'))
+    queue = JobQueue(store, {'generate': run_generation_job}, max_workers=1, recover_interval=0.05)
+    try:
+        assert queue.get('missing') is None
+        orphan = store.create('generate', {'template_type': 'code', 'directory_name': '9012_Reused',
+                                           'output_dir': str(tmp_path / 'out')},
+                              owner=os.getpid(), owner_started='earlier-process')
+        assert wait_for(queue, orphan['id'])['status'] == 'succeeded'
+        assert store.get(orphan['id'])['attempts'] == 1
+    finally:
+        queue.shutdown()
+
+def test_finished_jobs_are_purged_after_their_ttl(tmp_path):
+    """Only jobs that finished longer than finished_ttl ago are deleted."""
+    store = JobStore(str(tmp_path / 'jobs.sqlite3'))
+    queue = JobQueue(store, {}, recover_interval=None, finished_ttl=3600)
+    old, recent, running = (store.create('generate', {}, owner=os.getpid()) for _ in range(3))
+    store.finish(old['id'], 'succeeded')
+    store.finish(recent['id'], 'failed', error='boom')
+    store.start(running['id'])
+    store._connection().execute('UPDATE jobs SET finished_at = ? WHERE id = ?', (time.time() - 7200, old['id']))
+
+    assert queue.purge() == 1
+    assert store.get(old['id']) is None
+    assert store.get(recent['id'])['status'] == 'failed'
+    assert store.get(running['id'])['status'] == 'running'
+    assert JobQueue(store, {}, finished_ttl=None).purge() == 0
@@ -0,0 +1,76 @@
+import io
+import json
+import logging
+import threading
+from src.log_pipeline import LogPipeline, JsonFormatter, parse_sampling_rates
+
+def make_logger(name, pipeline):
+    logger = logging.getLogger(name)
+    logger.handlers = [pipeline.handler]
+    logger.propagate = False
+    logger.setLevel(logging.INFO)
+    return logger
+
+def test_records_are_written_as_json_with_sampling():
+    """Queued records reach the handler as JSON; sampled loggers lose INFO lines but keep warnings."""
+    stream = io.StringIO()
+    handler = logging.StreamHandler(stream)
+    handler.setFormatter(JsonFormatter())
+    pipeline = LogPipeline([handler], sampling=parse_sampling_rates('test_pipeline.access=0'))
+    logger = make_logger('test_pipeline', pipeline)
+
+    logger.info('generated %s', 'Doc', extra={'template_type': 'code'})
+    logger.getChild('access').info('index page')
+    logger.getChild('access').warning('slow index page')
+    try:
+        raise ValueError('boom')
+    except ValueError:
+        logger.exception('generation failed')
+    pipeline.stop()
+
+    records = [json.loads(line) for line in stream.getvalue().splitlines()]
+    assert [record['message'] for record in records] == ['generated Doc', 'slow index page', 'generation failed']
+    assert records[0]['template_type'] == 'code'
+    assert records[0]['level'] == 'INFO'
+    assert records[1]['logger'] == 'test_pipeline.access'
+    assert 'ValueError: boom' in records[2]['exception']
+
+def test_full_queue_drops_instead_of_blocking():
+    """Records beyond the queue size are counted as dropped while the writer is stuck."""
+    release = threading.Event()
+
+    class StuckHandler(logging.Handler):
+        def emit(self, record):
+            release.wait()
+
+    pipeline = LogPipeline([StuckHandler()], max_queue=2)
+    logger = make_logger('test_pipeline_full', pipeline)
+    for i in range(10):
+        logger.info('line %d', i)
+    assert pipeline.stats()['dropped'] >= 7
+    release.set()
+    pipeline.stop()
+
+def test_invalid_sampling_rate_is_rejected():
+    try:
+        parse_sampling_rates('werkzeug=2')
+    except ValueError:
+        pass
+    else:
+        raise AssertionError('rate above 1 should be rejected')
+
+def test_stop_tolerates_closed_streams(tmp_path):
+    """Stopping after a handler's stream was closed, as at interpreter exit, does not raise."""
+    stream = open(tmp_path / 'app.log', 'w')
+    pipeline = LogPipeline([logging.StreamHandler(stream)])
+    stream.close()
+
+    pipeline.stop()
+    assert pipeline.listener is None
+
+def test_werkzeug_request_lines_share_the_app_pipeline():
+    """The server's werkzeug logger feeds the same queue, so CRL_LOG_SAMPLING rates for it apply."""
+    from src.local_server import app, log_pipeline
+
+    assert log_pipeline.handler in app.logger.handlers
+    assert log_pipeline.handler in logging.getLogger('werkzeug').handlers
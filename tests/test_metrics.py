@@ -0,0 +1,61 @@
+import os
+import json
+import subprocess
+import sys
+from src.metrics import MetricsRegistry
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+def test_metrics_are_merged_across_processes(tmp_path):
+    """Counters of exited processes are kept; their gauges are dropped."""
+    script = (
+        "import sys; from src.metrics import MetricsRegistry\n"
+        "registry = MetricsRegistry(sys.argv[1])\n"
+        "registry.describe('jobs_running', 'gauge', 'Running jobs.')\n"
+        "registry.inc('requests_total', {'route': '/a'}, 2)\n"
+        "registry.inc('jobs_running', value=5)\n"
+        "registry.close()\n"
+    )
+    subprocess.run([sys.executable, '-c', script, str(tmp_path)], cwd=PROJECT_ROOT, check=True)
+
+    registry = MetricsRegistry(str(tmp_path))
+    registry.describe('requests_total', 'counter', 'Requests.')
+    registry.describe('jobs_running', 'gauge', 'Running jobs.')
+    registry.describe('latency_seconds', 'histogram', 'Latency.')
+    registry.inc('requests_total', {'route': '/a'})
+    registry.inc('jobs_running')
+    registry.observe('latency_seconds', 0.02)
+    registry.observe('latency_seconds', 30)
+
+    text = registry.render([('queue_depth', {}, 4)])
+    assert '# TYPE requests_total counter' in text
+    assert 'requests_total{route="/a"} 3' in text
+    assert 'jobs_running 1' in text
+    assert 'latency_seconds_bucket{le="0.01"} 0' in text
+    assert 'latency_seconds_bucket{le="0.025"} 1' in text
+    assert 'latency_seconds_bucket{le="+Inf"} 2' in text
+    assert 'latency_seconds_count 2' in text
+    assert 'queue_depth 4' in text
+
+def test_exited_processes_are_folded_into_the_aggregate(tmp_path):
+    """Snapshots of exited processes, including ones whose pid was reused, are folded into one file."""
+    stale = {'pid': os.getpid(), 'started': 'not-this-process', 'written_at': 0,
+             'samples': [['requests_total', [], 2], ['jobs_running', [], 5]],
+             'histograms': [['latency_seconds', [], [1, 0, 0.004]]]}
+    with open(tmp_path / f'metrics_{os.getpid()}_not-this-process.json', 'w', encoding='utf-8') as f:
+        json.dump(stale, f)
+
+    registry = MetricsRegistry(str(tmp_path), buckets=(0.01,))
+    registry.describe('requests_total', 'counter', 'Requests.')
+    registry.describe('jobs_running', 'gauge', 'Running jobs.')
+    registry.describe('latency_seconds', 'histogram', 'Latency.')
+    registry.inc('requests_total')
+    registry.inc('jobs_running')
+
+    for _ in range(2):
+        text = registry.render()
+        assert 'requests_total 3' in text
+        assert 'jobs_running 1' in text
+        assert 'latency_seconds_count 1' in text
+    files = sorted(file for file in os.listdir(tmp_path) if file.endswith('.json'))
+    assert files == ['aggregate.json', f'metrics_{registry._pid}_{registry._started}.json']
@@ -0,0 +1,49 @@
+import time
+import pstats
+from flask import Flask
+from src.profiling import RequestProfiler, init_profiling, sign_profile_request
+
+def make_app(profiler):
+    app = Flask(__name__)
+
+    @app.route('/slow/<name>')
+    def slow(name):
+        time.sleep(0.01)
+        return name
+
+    init_profiling(app, profiler)
+    return app
+
+def test_only_signed_requests_are_profiled(tmp_path):
+    """Profiles need a current token for the request's own path."""
+    profiler = RequestProfiler(str(tmp_path), 'secret', max_profiles=2)
+    client = make_app(profiler).test_client()
+    expires = int(time.time()) + 60
+
+    assert 'X-CRL-Profile-Id' not in client.get('/slow/a').headers
+    wrong_path = sign_profile_request('secret', '/slow/b', expires)
+    assert 'X-CRL-Profile-Id' not in client.get('/slow/a', headers={'X-CRL-Profile': wrong_path}).headers
+    expired = sign_profile_request('secret', '/slow/a', int(time.time()) - 1)
+    assert 'X-CRL-Profile-Id' not in client.get(f'/slow/a?_profile={expired}').headers
+    assert profiler.recent() == []
+
+    response = client.get('/slow/a', headers={'X-CRL-Profile': sign_profile_request('secret', '/slow/a', expires)})
+    profile_id = response.headers['X-CRL-Profile-Id']
+    stats = pstats.Stats(profiler.path_for(profile_id))
+    assert any('sleep' in function for _, _, function in stats.stats)
+
+    [summary] = profiler.recent()
+    assert summary['id'] == profile_id
+    assert summary['path'] == '/slow/a'
+    assert summary['status'] == 200
+
+def test_retention_keeps_newest_profiles(tmp_path):
+    """Only the newest max_profiles profiles are kept."""
+    profiler = RequestProfiler(str(tmp_path), 'secret', max_profiles=2)
+    client = make_app(profiler).test_client()
+    token = sign_profile_request('secret', '/slow/a', int(time.time()) + 60)
+
+    ids = [client.get(f'/slow/a?_profile={token}').headers['X-CRL-Profile-Id'] for _ in range(3)]
+    assert [summary['id'] for summary in profiler.recent()] == ids[:0:-1]
+    assert profiler.path_for(min(ids)) is None
+    assert profiler.path_for('../etc') is None
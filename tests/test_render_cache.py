@@ -0,0 +1,105 @@
+import os
+import time
+import threading
+import src.render_cache as render_cache_module
+from src.render_cache import MarkdownRenderCache
+
+def test_render_cache_reuses_unchanged_files(tmp_path):
+    """A second render of an unchanged file is served from memory."""
+    readme = tmp_path / 'README.md'
+    readme.write_text('# Title')
+    cache = MarkdownRenderCache()
+
+    first = cache.render_file(str(readme))
+    second = cache.render_file(str(readme))
+
+    assert '<h1>Title</h1>' in first
+    assert first == second
+    assert cache.stats()['hits'] == 1
+    assert cache.stats()['misses'] == 1
+
+def test_render_cache_rerenders_modified_files(tmp_path):
+    """Changing a file's content invalidates its cached render."""
+    readme = tmp_path / 'README.md'
+    readme.write_text('# Old')
+    cache = MarkdownRenderCache()
+    cache.render_file(str(readme))
+
+    readme.write_text('# Newer title')
+    os.utime(readme, ns=(0, 1))
+
+    assert '<h1>Newer title</h1>' in cache.render_file(str(readme))
+
+def test_render_cache_respects_byte_budget_and_disk_tier(tmp_path):
+    """Evicted renders are recovered from the on-disk tier without re-parsing."""
+    files = []
+    for index in range(3):
+        path = tmp_path / f'doc{index}.md'
+        path.write_text(f'# Document {index}')
+        files.append(str(path))
+    cache = MarkdownRenderCache(max_bytes=40, disk_dir=str(tmp_path / 'renders'))
+
+    for path in files:
+        cache.render_file(path)
+    assert cache.current_bytes <= 40
+
+    cache.render_file(files[0])
+    assert cache.stats()['misses'] == 3
+
+def test_render_cache_disk_tier_drops_least_recently_used_renders(tmp_path):
+    """The disk tier stays within its budget, keeping recently read renders, also across restarts."""
+    files = []
+    for index in range(6):
+        path = tmp_path / f'doc{index}.md'
+        path.write_text(f'# Document {index}\n\n' + 'text ' * 40)
+        files.append(str(path))
+    renders = tmp_path / 'renders'
+    cache = MarkdownRenderCache(max_bytes=1, disk_dir=str(renders), max_disk_bytes=1000)
+    render_size = len(cache.render_file(files[0]).encode('utf-8'))
+    for index, path in enumerate(files[1:], start=1):
+        time.sleep(0.01)
+        cache.render_file(files[0] if index % 2 else path)
+        cache.render_file(path)
+
+    sizes = [os.path.getsize(renders / name) for name in os.listdir(renders)]
+    assert sum(sizes) <= 1000 and len(sizes) < len(files)
+    assert cache.stats()['disk_bytes'] == sum(sizes)
+    misses = cache.stats()['misses']
+    time.sleep(0.01)
+    cache.render_file(files[0])
+    assert cache.stats()['misses'] == misses
+
+    restarted = MarkdownRenderCache(disk_dir=str(renders), max_disk_bytes=render_size * 2)
+    assert len(os.listdir(renders)) == 1
+    restarted.render_file(files[0])
+    assert restarted.stats()['misses'] == 0
+
+def test_render_cache_coalesces_concurrent_misses(tmp_path, monkeypatch):
+    """Concurrent requests for a cold page trigger one markdown parse."""
+    readme = tmp_path / 'README.md'
+    readme.write_text('# Title')
+    cache = MarkdownRenderCache()
+    parses = []
+    real_markdown = render_cache_module.markdown2.markdown
+
+    def slow_markdown(text, **kwargs):
+        parses.append(text)
+        time.sleep(0.05)
+        return real_markdown(text, **kwargs)
+
+    monkeypatch.setattr(render_cache_module.markdown2, 'markdown', slow_markdown)
+    barrier = threading.Barrier(8)
+    results = []
+
+    def worker():
+        barrier.wait()
+        results.append(cache.render_file(str(readme)))
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(parses) == 1
+    assert len(set(results)) == 1
@@ -0,0 +1,140 @@
+import os
+import time
+from src.catalog import TemplateCatalog
+from src.search import SearchIndex, LibrarySearch, make_snippet
+
+def build_index():
+    index = SearchIndex()
+    index.add('a', 'Press release template for product launches', title='Press Release')
+    index.add('b', 'Email newsletter template with a press section', title='Newsletter')
+    index.add('c', 'Release notes: the press was not invited to the release party', title='Release Notes')
+    return index
+
+def test_bm25_ranks_term_matches():
+    """Documents matching more and rarer query terms rank first."""
+    results, total, terms = build_index().search('press release launches')
+
+    assert [document['key'] for _, document in results] == ['a', 'c', 'b']
+    assert total == 3
+    assert terms == ['press', 'release', 'launches']
+
+def test_phrase_queries_require_exact_sequence():
+    """Quoted words only match when they appear consecutively."""
+    index = build_index()
+
+    results, total, _ = index.search('"press release"')
+    assert [document['key'] for _, document in results] == ['a']
+    assert total == 1
+
+    results, _, _ = index.search('"release party" press')
+    assert [document['key'] for _, document in results] == ['c']
+    assert index.search('"not invited to the release"')[1] == 1
+    assert index.search('"invited press"')[1] == 0
+
+def test_phrase_matches_survive_pair_hash_collisions(monkeypatch):
+    """Two-word phrases are confirmed against positions when pair keys collide."""
+    monkeypatch.setattr('src.search._pair_hash', lambda pair: 7)
+    index = build_index()
+
+    assert [document['key'] for _, document in index.search('"press release"')[0]] == ['a']
+    assert index.search('"invited press"')[1] == 0
+    assert index.search('"newsletter template"')[1] == 1
+
+def test_index_updates_and_round_trips(tmp_path):
+    """Replaced and removed documents disappear, before and after a save."""
+    index = build_index()
+    index.add('a', 'Sales page template')
+    index.remove('b')
+
+    assert [document['key'] for _, document in index.search('press')[0]] == ['c']
+    assert index.search('sales')[1] == 1
+
+    path = str(tmp_path / 'search_index.bin')
+    index.save(path)
+    loaded = SearchIndex.load(path)
+    assert len(loaded) == 2 and loaded.deleted == 0
+    assert [document['key'] for _, document in loaded.search('"release party"')[0]] == ['c']
+    assert loaded.search('newsletter')[1] == 0
+
+def test_snippet_highlights_best_window():
+    """Snippets centre on the densest run of matches and escape HTML."""
+    text = 'intro ' * 50 + 'the <b>press</b> release went out ' + 'outro ' * 50
+    snippet = make_snippet(text, ['press', 'release'], width=10)
+
+    assert '<mark>press</mark>' in snippet and '<mark>release</mark>' in snippet
+    assert '&lt;b&gt;' in snippet
+    assert snippet.startswith('…') and snippet.endswith('…')
+
+def test_library_search_follows_catalog(tmp_path):
+    """Generated templates are searchable and the index persists across restarts."""
+    templates_dir = tmp_path / 'Templates_NEW'
+    (templates_dir / '01_Case_Study').mkdir(parents=True)
+    (templates_dir / '01_Case_Study' / 'README.md').write_text('# Case study\nCustomer success story')
+    library_dir = tmp_path / 'Library_Resources'
+    (library_dir / '06_Email_Marketing').mkdir(parents=True)
+    (library_dir / '06_Email_Marketing' / 'README.md').write_text('Email marketing success metrics')
+    catalog = TemplateCatalog(str(templates_dir), str(tmp_path / 'Templates_Markdown'), poll_interval=0)
+    read = lambda path: open(path, encoding='utf-8').read()
+    extractors = {'template': read, 'markdown': read, 'knowledge_block': read}
+    index_path = str(tmp_path / 'search_index.bin')
+
+    search = LibrarySearch(catalog, str(library_dir), extractors, index_path=index_path)
+    response = search.search('success')
+    assert response['total'] == 2
+    assert {result['source'] for result in response['results']} == {'template', 'knowledge_block'}
+
+    os.makedirs(templates_dir / '02_Webinar')
+    (templates_dir / '02_Webinar' / 'template.md').write_text('Webinar success checklist')
+    assert search.search('webinar')['results'][0]['url'] == '/template/02_Webinar'
+
+    search.save()
+    restarted = LibrarySearch(catalog, str(library_dir), extractors, index_path=index_path)
+    assert restarted.search('success')['total'] == 3
+
+def test_in_place_edits_are_resynced_in_the_background(tmp_path):
+    """A file edited in place is picked up by the resync thread, not by the query."""
+    templates_dir = tmp_path / 'Templates_NEW'
+    (templates_dir / '01_Case_Study').mkdir(parents=True)
+    readme = templates_dir / '01_Case_Study' / 'README.md'
+    readme.write_text('# Case study\nCustomer story')
+    catalog = TemplateCatalog(str(templates_dir), str(tmp_path / 'Templates_Markdown'), poll_interval=0)
+    read = lambda path: open(path, encoding='utf-8').read()
+    search = LibrarySearch(catalog, str(tmp_path / 'Library_Resources'),
+                           {'template': read, 'markdown': read, 'knowledge_block': read},
+                           index_path=str(tmp_path / 'search_index.bin'), resync_interval=0.1)
+    try:
+        assert search.search('story')['total'] == 1
+        readme.write_text('# Case study\nCustomer testimonial with quotes')
+        deadline = time.monotonic() + 5
+        while search.search('testimonial')['total'] == 0:
+            assert time.monotonic() < deadline, 'edit was not resynced'
+            time.sleep(0.05)
+        assert os.path.exists(tmp_path / 'search_index.bin')
+    finally:
+        search.stop()
+
+def test_snippets_reuse_extracted_text_until_files_change(tmp_path):
+    """A hit's files are extracted once for snippets and again only after they change."""
+    templates_dir = tmp_path / 'Templates_NEW'
+    (templates_dir / '01_Case_Study').mkdir(parents=True)
+    readme = templates_dir / '01_Case_Study' / 'README.md'
+    readme.write_text('# Case study\nCustomer story')
+    catalog = TemplateCatalog(str(templates_dir), str(tmp_path / 'Templates_Markdown'), poll_interval=0)
+    extracted = []
+
+    def read(path):
+        extracted.append(path)
+        return open(path, encoding='utf-8').read()
+
+    search = LibrarySearch(catalog, str(tmp_path / 'Library_Resources'),
+                           {'template': read, 'markdown': read, 'knowledge_block': read},
+                           index_path=None, resync_interval=3600)
+    search.search('story')
+    indexed = len(extracted)
+    assert '<mark>story</mark>' in search.search('story')['results'][0]['snippet']
+    search.search('customer')
+    assert len(extracted) == indexed
+
+    readme.write_text('# Case study\nCustomer story, now with quotes')
+    os.utime(readme, ns=(time.time_ns() + 10**9,) * 2)
+    assert 'quotes' in search.search('customer')['results'][0]['snippet']
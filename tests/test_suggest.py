@@ -0,0 +1,99 @@
+import os
+import json
+import time
+import threading
+from src.catalog import TemplateCatalog
+from src.suggest import SuggestIndex, CatalogSuggest
+
+def test_suggestions_match_prefixes_and_rank_by_popularity():
+    """Names, title words and tags match by prefix; views decide the order."""
+    index = SuggestIndex(rerank_interval=0)
+    index.add('01_Press_Release', 'Press Release', ['press', 'release'])
+    index.add('02_Product_Launch', 'Product Launch', ['product', 'launch'])
+    index.add('03_Release_Notes', 'Release Notes', ['changelog'])
+
+    assert [s['name'] for s in index.suggest('rel')] == ['01_Press_Release', '03_Release_Notes']
+    assert index.suggest('chang')[0]['matched'] == 'tag'
+    assert index.suggest('02 prod')[0]['matched'] == 'name'
+
+    index.record('03_Release_Notes', 3)
+    assert [s['name'] for s in index.suggest('rel')] == ['03_Release_Notes', '01_Press_Release']
+    assert [s['name'] for s in index.suggest('p', limit=1)] == ['01_Press_Release']
+
+    index.remove('03_Release_Notes')
+    assert [s['name'] for s in index.suggest('release')] == ['01_Press_Release']
+    assert index.suggest('   ') == []
+
+def test_bulk_update_matches_incremental_adds():
+    """update() builds the same index as one add() per template, replacing and dropping in one pass."""
+    documents = [(f'{i:04d}_Template', f'Template {i} Guide', [f'tag{i % 7}'], {'kind': 'new'}) for i in range(300)]
+    incremental = SuggestIndex(rerank_interval=0)
+    for name, title, tags, fields in documents:
+        incremental.add(name, title, tags, **fields)
+    bulk = SuggestIndex(rerank_interval=0)
+    bulk.update(documents)
+    assert bulk._keys == incremental._keys
+    assert sorted(zip(bulk._keys, bulk._key_ids)) == sorted(zip(incremental._keys, incremental._key_ids))
+
+    bulk.update([('0001_Template', 'Renamed Guide', [], {'kind': 'new'})], removed=['0002_Template'])
+    assert [s['name'] for s in bulk.suggest('renamed')] == ['0001_Template']
+    assert bulk.suggest('0002') == []
+    assert len(bulk._keys) == len(incremental._keys) - 5 - 5 + 3
+
+def test_catalog_suggest_follows_catalog_and_persists_views(tmp_path):
+    """Generated templates become suggestible and view counts accumulate on disk."""
+    templates_dir = tmp_path / 'Templates_NEW'
+    (templates_dir / '01_Case_Study').mkdir(parents=True)
+    catalog = TemplateCatalog(str(templates_dir), str(tmp_path / 'Templates_Markdown'), poll_interval=0)
+    popularity_path = str(tmp_path / 'popularity.json')
+
+    def describe(entry):
+        title = entry.name.split('_', 1)[1].replace('_', ' ')
+        return title, title.lower().split()
+
+    suggest = CatalogSuggest(catalog, describe, popularity_path=popularity_path, rerank_interval=0)
+    assert [s['name'] for s in suggest.suggest('case')] == ['01_Case_Study']
+
+    os.makedirs(templates_dir / '02_Case_Notes')
+    suggest.refresh_template('02_Case_Notes')
+    suggest.record_view('02_Case_Notes')
+    assert [s['name'] for s in suggest.suggest('case')] == ['02_Case_Notes', '01_Case_Study']
+    suggest.save()
+
+    restarted = CatalogSuggest(catalog, describe, popularity_path=popularity_path, rerank_interval=0)
+    restarted.record_view('02_Case_Notes')
+    restarted.save()
+    assert restarted.index.popularity() == {'02_Case_Notes': 2}
+    assert restarted.suggest('notes')[0]['url'] == '/template/02_Case_Notes'
+
+def test_concurrent_saves_accumulate(tmp_path):
+    """Workers saving at the same time add up their views, and views are saved periodically."""
+    catalog = TemplateCatalog(str(tmp_path / 'Templates_NEW'), str(tmp_path / 'Templates_Markdown'), poll_interval=0)
+    popularity_path = str(tmp_path / 'popularity.json')
+    workers = [CatalogSuggest(catalog, lambda entry: (entry.name, []), popularity_path=popularity_path,
+                              save_interval=None) for _ in range(4)]
+
+    def record_and_save(suggest):
+        for _ in range(25):
+            suggest.record_view('01_Case_Study')
+            suggest.save()
+
+    threads = [threading.Thread(target=record_and_save, args=(suggest,)) for suggest in workers]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    with open(popularity_path, encoding='utf-8') as f:
+        assert json.load(f) == {'01_Case_Study': 100}
+
+    periodic = CatalogSuggest(catalog, lambda entry: (entry.name, []), popularity_path=popularity_path,
+                              save_interval=0.01)
+    periodic.record_view('01_Case_Study')
+    deadline = time.monotonic() + 5
+    counts = None
+    while counts != {'01_Case_Study': 101} and time.monotonic() < deadline:
+        time.sleep(0.01)
+        with open(popularity_path, encoding='utf-8') as f:
+            counts = json.load(f)
+    periodic.stop()
+    assert counts == {'01_Case_Study': 101}
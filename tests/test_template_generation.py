@@ -1,7 +1,8 @@
 import os
 import json
+import shutil
 import pytest
-from src.local_server import app
+from src.local_server import app, TEMPLATES_DIR, template_catalog
 
 @pytest.fixture
 def client():
@@ -10,6 +11,17 @@ def client():
     with app.test_client() as client:
         yield client
 
+@pytest.fixture
+def new_templates():
+    """List template directories generated during the test and delete them afterwards."""
+    existing = set(os.listdir(TEMPLATES_DIR))
+    generated = lambda: sorted(set(os.listdir(TEMPLATES_DIR)) - existing)
+    yield generated
+    names = generated()
+    for name in names:
+        shutil.rmtree(os.path.join(TEMPLATES_DIR, name), ignore_errors=True)
+    template_catalog.refresh_many(names)
+
 def test_template_types_endpoint(client):
     """Test the template types API endpoint."""
     response = client.get('/api/template_types')
@@ -19,7 +31,7 @@ def test_template_types_endpoint(client):
     assert isinstance(data, list)
     assert len(data) > 0, "No template types found"
 
-def test_template_generation(client):
+def test_template_generation(client, new_templates):
     """Test template generation endpoint."""
     template_data = {
         'template_type': 'document',
@@ -35,7 +47,7 @@ def test_template_generation(client):
     result = json.loads(response.data)
     assert result['status'] == 'success'
     assert 'template_id' in result
-    assert 'path' in result
+    assert new_templates() == [result['path']]
 
 def test_invalid_template_generation(client):
     """Test template generation with invalid data."""
@@ -79,3 +91,151 @@ def test_generated_templates_directory():
     
     assert os.path.exists(generated_dir), "Generated templates directory not created"
     assert os.path.isdir(generated_dir), "Generated templates path is not a directory"
+
+def test_conditional_get_returns_not_modified(client):
+    """Listing responses carry a strong ETag and honour If-None-Match."""
+    response = client.get('/api/templates')
+    etag = response.headers.get('ETag')
+
+    assert response.status_code == 200
+    assert etag and not etag.startswith('W/')
+    assert 'max-age=' in response.headers.get('Cache-Control', '')
+
+    cached_response = client.get('/api/templates', headers={'If-None-Match': etag})
+    assert cached_response.status_code == 304
+    assert cached_response.data == b''
+
+def test_search_revalidates_and_missing_templates_are_not_cached(client):
+    """Repeated searches revalidate with 304; a missing template page is a 404 without caching headers."""
+    response = client.get('/api/search', query_string={'q': 'template'})
+    etag = response.headers.get('ETag')
+    assert etag
+    repeated = client.get('/api/search', query_string={'q': 'template'}, headers={'If-None-Match': etag})
+    assert repeated.status_code == 304
+
+    missing = client.get('/template/No_Such_Template')
+    assert missing.status_code == 404
+    assert 'Cache-Control' not in missing.headers
+
+def test_list_templates_paginates_with_field_projection(client):
+    """Following next_cursor walks the whole listing without repeats."""
+    names = []
+    cursor = None
+    while True:
+        params = {'limit': 2, 'fields': 'name'}
+        if cursor:
+            params['cursor'] = cursor
+        response = client.get('/api/templates', query_string=params)
+        assert response.status_code == 200
+        data = response.get_json()
+        assert all(set(item) == {'name'} for item in data['templates'])
+        names.extend(item['name'] for item in data['templates'])
+        cursor = data['next_cursor']
+        if not cursor:
+            break
+
+    assert len(names) == len(set(names)) == data['total']
+    assert client.get('/api/templates?fields=path').status_code == 400
+
+def test_metadata_export_and_batch_agree(client):
+    """The NDJSON export streams one record per template and the batch lookup returns the same records."""
+    response = client.get('/api/templates/export.ndjson?validation=false')
+    assert response.status_code == 200
+    assert response.is_streamed
+    assert response.mimetype == 'application/x-ndjson'
+    records = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    assert records and all('validation' not in record for record in records)
+
+    names = [record['name'] for record in records[:3]]
+    response = client.post('/api/template_metadata:batch?validation=false',
+                           json={'names': names + ['No_Such_Template', names[0]]})
+    assert response.status_code == 200
+    data = response.get_json()
+    assert data['templates'] == records[:3]
+    assert data['not_found'] == ['No_Such_Template']
+    assert client.post('/api/template_metadata:batch', json={'names': 'x'}).status_code == 400
+
+def test_metadata_records_succeed_with_and_without_validation(client):
+    """Bulk records are plain metadata by default and carry a validation report on request."""
+    response = client.get('/api/templates/export.ndjson')
+    records = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    assert records and all(record['type'] != 'error' and 'validation' not in record for record in records)
+
+    names = [record['name'] for record in records[:2]]
+    response = client.post('/api/template_metadata:batch?validation=true', json={'names': names})
+    templates = response.get_json()['templates']
+    assert [record['name'] for record in templates] == names
+    assert all(record['type'] != 'error' and 'is_valid' in record['validation'] for record in templates)
+
+def test_markdown_search_hits_link_to_their_page(client):
+    """Markdown templates found by search open at the URL the hit carries."""
+    results = client.get('/api/search', query_string={'q': '"press release"', 'limit': 50}).get_json()['results']
+    hit = next(result for result in results if result['source'] == 'markdown')
+    response = client.get(hit['url'])
+    assert response.status_code == 200
+    assert hit['title'] in response.get_data(as_text=True)
+    assert 'Template not found' not in response.get_data(as_text=True)
+
+def test_markdown_suggestions_link_to_their_page(client):
+    """Markdown suggestions carry a URL that opens the template."""
+    suggestions = client.get('/api/suggest', query_string={'q': 'press', 'limit': 25}).get_json()['suggestions']
+    suggestion = next(item for item in suggestions if item['kind'] == 'markdown')
+    response = client.get(suggestion['url'])
+    assert response.status_code == 200
+    assert 'Template not found' not in response.get_data(as_text=True)
+
+def test_batch_generation_reports_each_item(client, new_templates):
+    """Valid specs are generated together; invalid ones fail on their own."""
+    specs = [
+        {'template_type': 'document', 'name': 'Batch_Doc'},
+        {'template_type': 'script'},
+        {'template_type': 'web_app', 'name': 'Batch_App'},
+    ]
+    response = client.post('/generate_template/batch', json={'templates': specs})
+    assert response.status_code == 207
+
+    data = response.get_json()
+    assert (data['succeeded'], data['failed']) == (2, 1)
+    assert [result['status'] for result in data['results']] == ['success', 'error', 'success']
+    assert [result['index'] for result in data['results']] == [0, 1, 2]
+    listed = {item['name'] for item in client.get('/api/templates?kind=new&limit=1000&fields=name').get_json()['templates']}
+    for result in (data['results'][0], data['results'][2]):
+        assert result['path'] in listed
+        assert os.path.exists(os.path.join(TEMPLATES_DIR, result['path'], 'template.md'))
+    assert new_templates() == sorted([data['results'][0]['path'], data['results'][2]['path']])
+
+    assert client.post('/generate_template/batch', json={'templates': []}).status_code == 400
+
+def test_idempotency_key_replays_generation(client, new_templates):
+    """A retried request with the same key returns the first result without generating again."""
+    key = f"test-{os.getpid()}-{os.urandom(4).hex()}"
+    body = {'template_type': 'document', 'name': 'Idempotent_Doc'}
+
+    first = client.post('/generate_template', json=body, headers={'Idempotency-Key': key})
+    assert first.status_code == 201
+    assert 'Idempotent-Replayed' not in first.headers
+
+    retry = client.post('/generate_template', json=body, headers={'Idempotency-Key': key})
+    assert retry.status_code == 201
+    assert retry.headers['Idempotent-Replayed'] == 'true'
+    assert retry.get_json()['path'] == first.get_json()['path']
+    assert new_templates() == [first.get_json()['path']]
+
+    reused = client.post('/generate_template', json=dict(body, name='Other_Doc'), headers={'Idempotency-Key': key})
+    assert reused.status_code == 422
+
+def test_metrics_endpoint(client):
+    """Requests and generations show up in the Prometheus exposition."""
+    client.get('/api/template_types')
+    client.get('/no/such/page')
+
+    response = client.get('/metrics')
+    assert response.status_code == 200
+    assert response.mimetype == 'text/plain'
+    text = response.get_data(as_text=True)
+    assert 'crl_http_requests_total{method="GET",route="/api/template_types",status="200"}' in text
+    assert 'route="<unmatched>",status="404"' in text
+    assert 'crl_http_request_duration_seconds_bucket{method="GET",route="/api/template_types",le="+Inf"}' in text
+    assert 'crl_http_requests_in_flight 1' in text
+    assert 'crl_metadata_cache_hits_total{tier="memory"}' in text
+    assert 'crl_generation_job_queue_depth' in text
@@ -0,0 +1,70 @@
+import time
+import logging
+import threading
+from flask import Flask
+from src.watchdog import SlowRequestWatchdog, init_slow_request_watchdog
+
+class ListHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.messages = []
+
+    def emit(self, record):
+        self.messages.append(record.getMessage())
+
+def test_slow_request_stack_is_logged(tmp_path):
+    """A request past the threshold is reported once with its route, arguments and stack."""
+    logger = logging.getLogger('test_watchdog')
+    handler = ListHandler()
+    logger.addHandler(handler)
+    watchdog = SlowRequestWatchdog(threshold=0.05, interval=0.01, logger=logger)
+    app = Flask(__name__)
+    app.logger.addHandler(handler)
+
+    @app.route('/slow/<name>', methods=['POST'])
+    def slow_view(name):
+        time.sleep(0.3)
+        return name
+
+    init_slow_request_watchdog(app, watchdog)
+    try:
+        assert app.test_client().post('/slow/doc?x=1', json={'template_type': 'code'}).status_code == 200
+    finally:
+        watchdog.stop()
+
+    [report] = [message for message in handler.messages if message.startswith('Slow request still running')]
+    assert "'route': '/slow/<name>'" in report
+    assert "'view_args': {'name': 'doc'}" in report
+    assert "'query': 'x=1'" in report
+    assert 'template_type' in report
+    assert 'in slow_view' in report
+    assert any(message.startswith('Slow request POST /slow/<name> finished') for message in handler.messages)
+
+def test_reports_are_rate_limited():
+    """Reports beyond max_reports per minute are suppressed and counted."""
+    logger = logging.getLogger('test_watchdog_rate')
+    handler = ListHandler()
+    logger.addHandler(handler)
+    watchdog = SlowRequestWatchdog(threshold=0, interval=60, max_reports=1, logger=logger)
+    release = threading.Event()
+
+    def request_thread(path):
+        watchdog.track({'route': path})
+        release.wait()
+        watchdog.untrack()
+
+    threads = [threading.Thread(target=request_thread, args=(f'/r{i}',)) for i in range(3)]
+    for thread in threads:
+        thread.start()
+    while len(watchdog._requests) < 3:
+        time.sleep(0.01)
+    try:
+        assert watchdog.check() == 1
+        assert watchdog.check() == 0
+        assert watchdog.suppressed == 2
+        assert len(handler.messages) == 1
+    finally:
+        release.set()
+        for thread in threads:
+            thread.join()
+        watchdog.stop()